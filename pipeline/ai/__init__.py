@@ -1,6 +1,9 @@
 from .bedrock_client import BedrockClient
+from .bedrock_pool import BedrockClientPool, create_bedrock_client
+from .base_analyzer import BaseAnalyzer
 from .terraform_analyzer import TerraformAnalyzer
 from .docker_analyzer import DockerAnalyzer
 from .code_analyzer import CodeAnalyzer
+from .compose_analyzer import ComposeAnalyzer
 
-__all__ = ['BedrockClient', 'TerraformAnalyzer', 'DockerAnalyzer', 'CodeAnalyzer']
+__all__ = ['BedrockClient', 'BedrockClientPool', 'create_bedrock_client', 'BaseAnalyzer', 'TerraformAnalyzer', 'DockerAnalyzer', 'CodeAnalyzer', 'ComposeAnalyzer']
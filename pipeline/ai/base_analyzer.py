@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Base Analyzer - Logique commune aux analyzers IA
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional
+from .bedrock_client import BedrockClient, ISSUES_SCHEMA, COMPACT_ISSUES_SCHEMA
+from .prompt_compactor import CompactedContent, compact
+from .rule_catalog import CATALOGS, COMPACT_FORMAT, expand_issue
+
+
+# Ajouté au prompt statique en mode triage
+TRIAGE_INSTRUCTIONS = """Mode triage: le message peut lister des findings de scanners (F1, F2...) pour ce fichier.
+- Confirme ou écarte chaque finding dans "triage"; écarte les faux positifs (ressource non concernée, contrôle déjà présent ailleurs, contexte non exploitable).
+- Ne répète pas dans "issues" un problème déjà couvert par un finding: "issues" ne contient que les problèmes supplémentaires.
+- Pour les issues, omets "recommendation" et limite "description" à une phrase.
+
+Ajoute à la réponse JSON, un élément par finding: "triage": [["F1", "confirm", 0.9], ["F2", "dismiss", 0.8]]"""
+
+# Ajouté au prompt statique avec compact_prompts
+COMPACT_INSTRUCTIONS = """Le contenu des fichiers est compacté: commentaires, lignes vides et indentation sont retirés.
+Chaque ligne commence par son numéro dans le fichier d'origine ("12|..."): utilise ce numéro comme numéro de ligne."""
+
+
+class BaseAnalyzer:
+    """Analyse un fichier avec Bedrock.
+
+    Le prompt est séparé en une partie statique (instructions, format de
+    réponse), identique pour tous les fichiers et donc mise en cache par
+    Bedrock, et une partie variable contenant le fichier analysé.
+
+    Avec un snapshot (RepoSnapshot) les fichiers sont listés et lus depuis
+    l'index partagé; avec un cache (ResultCache) les issues sont réutilisées
+    tant que le hash du fichier, le modèle et le prompt ne changent pas.
+
+    Avec un rule_engine (RuleEngine) les catégories dont une règle locale
+    fait toutes les vérifications (full_coverage) sont retirées du prompt;
+    les findings des autres règles sont joints au fichier comme contexte, et
+    les fichiers entièrement couverts ne sont pas envoyés à Bedrock.
+
+    Avec un index de similarité (SimilarityIndex) un fichier quasi identique
+    à un fichier déjà analysé réutilise ses issues (lignes remappées) et
+    seuls les hunks modifiés sont envoyés au modèle.
+
+    En mode triage, les findings des scanners (set_findings) sont joints au
+    fichier: le modèle les confirme ou les écarte avec une confiance et ne
+    rapporte que les problèmes supplémentaires, en format court.
+
+    Avec compact_prompts, le fichier est envoyé sans commentaires ni blancs,
+    chaque ligne préfixée par son numéro d'origine (prompt_compactor); les
+    lignes rendues par le modèle sont retraduites avant le post-traitement.
+
+    Avec compact_responses, le modèle répond par codes de catégorie (ligne,
+    sévérité, confiance, une phrase seulement pour critical/high); titre,
+    description et recommandation viennent du catalogue local (rule_catalog).
+    """
+    
+    scanner_type = "ai"
+    max_file_size: Optional[int] = None
+    # Langage des règles locales et catégories vérifiées par le modèle
+    language: Optional[str] = None
+    categories: List[str] = []
+    # Findings non soumis au triage (CVE de paquets: rien à juger dans le fichier)
+    untriaged_types = {"vulnerability"}
+    # Syntaxe du fichier pour la compaction du prompt (prompt_compactor)
+    syntax: Optional[str] = None
+    # Format de réponse détaillé, remplacé par COMPACT_FORMAT avec compact_responses
+    response_format = ""
+    
+    def __init__(self, bedrock_client: BedrockClient, max_workers: int = 1,
+                 snapshot: Optional[Any] = None, cache: Optional[Any] = None,
+                 rule_engine: Optional[Any] = None, similarity: Optional[Any] = None,
+                 compact_prompts: bool = False, compact_responses: bool = False):
+        self.client = bedrock_client
+        self.max_workers = max_workers
+        self.snapshot = snapshot
+        self.cache = cache
+        self.rule_engine = rule_engine
+        self.similarity = similarity
+        # Pool externe partagé (mode multi-projets), à la place du pool local
+        self.executor = None
+        self.triage = False
+        self.compact_prompts = compact_prompts
+        self.compact_responses = compact_responses
+        self.catalog = {entry.code: entry for entry in CATALOGS.get(self.scanner_type, [])}
+        # Fichiers ou extraits envoyés, caractères et tokens estimés avant / après compaction
+        self.compaction = {"excerpts": 0, "original_chars": 0, "compact_chars": 0, "original_tokens": 0, "compact_tokens": 0}
+        self._compaction_lock = threading.Lock()
+        self._findings: Dict[str, List[Dict[str, Any]]] = {}
+        self._system_prompt = None
+        # (fichier, durée) de chaque analyse, pour l'historique des runs
+        self.timings: List[tuple] = []
+        self._timings_lock = threading.Lock()
+    
+    @property
+    def system_prompt(self) -> str:
+        """Partie statique du prompt, construite une seule fois"""
+        if self._system_prompt is None:
+            self._system_prompt = self._build_system_prompt()
+            if self.triage:
+                self._system_prompt += "\n\n" + TRIAGE_INSTRUCTIONS
+            if self.compact_prompts:
+                self._system_prompt += "\n\n" + COMPACT_INSTRUCTIONS
+        return self._system_prompt
+    
+    def analyze_files(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+        """Analyse plusieurs fichiers, en parallèle si max_workers > 1"""
+        if self.similarity is None or len(file_paths) <= 1:
+            return self._analyze_all(file_paths)
+        
+        # Les représentants d'abord, pour que leurs copies réutilisent l'analyse
+        items = []
+        for file_path in file_paths:
+            try:
+                items.append((file_path, self.read_file(file_path)))
+            except (OSError, UnicodeDecodeError):
+                items.append((file_path, ""))
+        leaders, followers = self.similarity.partition(items)
+        
+        results = dict(zip(leaders, self._analyze_all(leaders)))
+        results.update(zip(followers, self._analyze_all(followers)))
+        return [results[file_path] for file_path in file_paths]
+    
+    def analyze_units(self, file_paths: List[str], stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Un résultat par fichier, à la granularité de l'analyzer (fichier, bloc, stage).
+
+        Point d'entrée commun à l'analyse directe et au mode batch (BatchRunner).
+        """
+        return self.analyze_files(file_paths)
+    
+    def _analyze_all(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+        return self._map(self.analyze_file, file_paths)
+    
+    def _map(self, fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        """fn sur chaque élément: pool partagé, pool local si max_workers > 1, sinon en série"""
+        if self.executor is not None:
+            return list(self.executor.map(fn, items))
+        
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
+    
+    def analyze_file(self, file_path: str) -> Dict[str, Any]:
+        """Analyse un fichier avec l'IA"""
+        started = time.monotonic()
+        try:
+            return self._analyze_file(file_path)
+        finally:
+            with self._timings_lock:
+                self.timings.append((file_path, time.monotonic() - started))
+    
+    def _analyze_file(self, file_path: str) -> Dict[str, Any]:
+        try:
+            entry = self.snapshot.get(file_path) if self.snapshot is not None else None
+            
+            # Cache hit: aucune lecture du fichier
+            cache_key = None
+            if self.cache is not None and entry is not None:
+                cache_key = self._cache_key(entry.sha256, file_path)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    result = self._from_cache(file_path, cached)
+                    if self.similarity is not None:
+                        self._remember(file_path, self.read_file(file_path), result)
+                    return result
+            
+            content = self.read_file(file_path)
+            
+            if self.cache is not None and cache_key is None:
+                cache_key = self._cache_key(hashlib.sha256(content.encode("utf-8")).hexdigest(), file_path)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    result = self._from_cache(file_path, cached)
+                    if self.similarity is not None:
+                        self._remember(file_path, content, result)
+                    return result
+            
+            result = self.analyze_content(file_path, content)
+            
+            if cache_key is not None and "error" not in result:
+                self.cache.set(cache_key, self._to_cache(result))
+            
+            return result
+        
+        except Exception as e:
+            return {"error": str(e), "file": file_path}
+    
+    def read_file(self, file_path: str) -> str:
+        """Lit un fichier, via le snapshot si disponible"""
+        if self.snapshot is not None and self.snapshot.get(file_path) is not None:
+            return self.snapshot.read_text(file_path)
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def analyze_content(self, file_path: str, content: str) -> Dict[str, Any]:
+        """Analyse le contenu d'un fichier déjà lu"""
+        if self.skip_content(content):
+            return {"issues": []}
+        
+        if self.similarity is not None:
+            match = self.similarity.query(self.similarity.signature(content), exclude=file_path)
+            result = self._analyze_near_duplicate(file_path, content, match) if match else None
+            if result is None:
+                result = self._analyze_full(file_path, content)
+            if "error" not in result:
+                self._remember(file_path, content, result)
+            return result
+        
+        return self._analyze_full(file_path, content)
+    
+    def _analyze_full(self, file_path: str, content: str) -> Dict[str, Any]:
+        findings = self._findings_for(file_path)
+        prompt, compacted = self._content_prompt(file_path, content)
+        rules = self._rules_prompt(file_path, content)
+        if rules:
+            prompt += "\n\n" + rules
+        if findings:
+            prompt += "\n\n" + self._findings_prompt(findings)
+        json_data = self._invoke(prompt)
+        if findings and "error" not in json_data:
+            json_data["triage"] = self._apply_triage(json_data, findings)
+        
+        self.restore_lines(json_data, compacted)
+        return self.process_response(file_path, json_data)
+    
+    @property
+    def response_schema(self):
+        """Schéma de la réponse (mode tool-use)"""
+        return COMPACT_ISSUES_SCHEMA if self.compact_responses else ISSUES_SCHEMA
+    
+    def _invoke(self, prompt: str) -> Dict[str, Any]:
+        """Appel du modèle; les réponses compactes sont développées"""
+        json_data = self.client.invoke_json(prompt, schema=self.response_schema, system=self.system_prompt)
+        self.expand_issues(json_data)
+        return json_data
+    
+    def expand_issues(self, json_data: Dict[str, Any]):
+        """Issues compactes (codes de catégorie) -> issues complètes, d'après le catalogue"""
+        if not self.compact_responses or "error" in json_data:
+            return
+        json_data["issues"] = [expand_issue(entry, self.catalog) for entry in json_data.get("issues", [])]
+    
+    def _content_prompt(self, file_path: str, content: str, first_line: int = 1,
+                        label: Optional[str] = None) -> tuple:
+        """Prompt d'un fichier ou d'un extrait (commençant à first_line), compacté si activé.
+
+        Retourne (prompt, CompactedContent ou None).
+        """
+        label = label or file_path
+        if not self.compact_prompts:
+            return self._build_prompt(label, content), None
+        compacted = compact(content, self._syntax(file_path), first_line)
+        with self._compaction_lock:
+            self.compaction["excerpts"] += 1
+            self.compaction["original_chars"] += compacted.original_chars
+            self.compaction["compact_chars"] += len(compacted.text)
+            self.compaction["original_tokens"] += compacted.original_tokens
+            self.compaction["compact_tokens"] += compacted.compact_tokens
+        return self._build_prompt(label, compacted.text), compacted
+    
+    def restore_lines(self, json_data: Dict[str, Any], compacted: Optional[CompactedContent]):
+        """Lignes des issues rendues par le modèle -> lignes du fichier d'origine"""
+        if compacted is None or "error" in json_data:
+            return
+        for issue in json_data.get("issues", []):
+            if isinstance(issue, dict):
+                issue["line"] = compacted.original_line(issue.get("line"))
+    
+    def _syntax(self, file_path: str) -> Optional[str]:
+        return self.syntax
+    
+    def _analyze_near_duplicate(self, file_path: str, content: str, match: tuple) -> Optional[Dict[str, Any]]:
+        """Réutilise l'analyse d'un fichier quasi identique; None si trop différent"""
+        reference_path, score, (reference, reference_issues) = match
+        mapping = self.similarity.line_mapping(reference, content)
+        hunks = mapping.hunks()
+        if mapping.changed_ratio() > self.similarity.max_changed_ratio:
+            return None
+        
+        # Issues hors des hunks: même code, lignes décalées
+        issues = []
+        for issue in reference_issues:
+            line = issue.get("line") or 0
+            new_line = mapping.map_line(line) if line > 0 else 0
+            if new_line is None or any(start <= new_line <= end for start, end in hunks):
+                continue
+            remapped = dict(issue, line=new_line)
+            issues.append(remapped)
+        self.similarity.record_reuse(len(issues))
+        
+        # Findings hors des hunks: pas de triage, ils restent tels quels
+        verdicts = []
+        if hunks:
+            findings = self._findings_for(file_path, hunks)
+            prompt, compacted = self._build_hunk_prompt(file_path, mapping, hunks)
+            rules = self._rules_prompt(file_path, content, hunks)
+            if rules:
+                prompt += "\n\n" + rules
+            if findings:
+                prompt += "\n\n" + self._findings_prompt(findings)
+            json_data = self._invoke(prompt)
+            if "error" in json_data:
+                json_data["file"] = file_path
+                return json_data
+            if findings:
+                verdicts = self._apply_triage(json_data, findings)
+            for issue in json_data.get("issues", []):
+                issue["line"] = self._hunk_line(issue.get("line"), hunks, compacted)
+                issues.append(issue)
+        
+        self._annotate(issues, file_path)
+        result = {"file": file_path, "issues": issues, "reused_from": reference_path, "similarity": round(score, 2)}
+        if verdicts:
+            result["triage"] = verdicts
+        return result
+    
+    def _build_hunk_prompt(self, file_path: str, mapping: Any, hunks: List[tuple]) -> tuple:
+        """Prompt limité aux extraits modifiés d'un fichier.
+
+        Retourne (prompt, CompactedContent ou None de chaque extrait).
+        """
+        parts = [
+            "Seuls les extraits ci-dessous ont changé par rapport à une version déjà analysée. "
+            "Analyse uniquement ces extraits et donne les numéros de ligne du fichier complet."
+        ]
+        compacted = []
+        for start, end in hunks:
+            label = f"{file_path} (lignes {start}-{end})"
+            prompt, excerpt = self._content_prompt(file_path, mapping.excerpt(start, end), start, label)
+            parts.append(prompt)
+            compacted.append(excerpt)
+        return "\n\n".join(parts), compacted
+    
+    def _hunk_line(self, line: Any, hunks: List[tuple],
+                   compacted: Optional[List[Optional[CompactedContent]]] = None) -> int:
+        """Ligne rendue par le modèle -> ligne du fichier (le modèle compte parfois depuis l'extrait, compacté ou non)"""
+        if not isinstance(line, int) or line <= 0:
+            return 0
+        if any(start <= line <= end for start, end in hunks):
+            return line
+        if len(hunks) == 1:
+            excerpt = compacted[0] if compacted else None
+            if excerpt is not None and line <= len(excerpt.lines):
+                return excerpt.lines[line - 1]
+            if line <= hunks[0][1] - hunks[0][0] + 1:
+                return hunks[0][0] + line - 1
+        return line
+    
+    def _remember(self, file_path: str, content: str, result: Dict[str, Any]):
+        """Indexe un fichier analysé pour ses futures copies"""
+        issues = self._to_cache(result)["issues"]
+        self.similarity.add(file_path, self.similarity.signature(content), (content, issues))
+    
+    def set_findings(self, results: List[Dict[str, Any]]):
+        """Active le triage des findings de scanners (résultats au format standard)"""
+        findings: Dict[str, List[Dict[str, Any]]] = {}
+        for result in results:
+            for issue in result.get("issues", []):
+                if issue.get("type") in self.untriaged_types or not issue.get("file"):
+                    continue
+                # Chemins relatifs au scanner (Dockerfile, main.tf) ou absolus (Checkov)
+                path = os.path.normpath(str(issue["file"])).lstrip("/")
+                findings.setdefault(path, []).append({"scanner": result.get("scanner", "scanner"), "issue": issue})
+        self._findings = findings
+        self.triage = True
+        self._system_prompt = None
+    
+    def _findings_for(self, file_path: str, ranges: Optional[List[tuple]] = None) -> List[Dict[str, Any]]:
+        """Findings d'un fichier (limités à des plages de lignes), dans un ordre stable"""
+        if not self._findings:
+            return []
+        findings = []
+        for path, entries in self._findings.items():
+            if path == file_path or file_path.endswith("/" + path) or path.endswith("/" + file_path):
+                findings.extend(entries)
+        if ranges is not None:
+            findings = [f for f in findings if any(start <= (f["issue"].get("line") or 0) <= end for start, end in ranges)]
+        return sorted(findings, key=lambda f: (f["issue"].get("line") or 0, self._fingerprint(f)))
+    
+    @staticmethod
+    def _fingerprint(finding: Dict[str, Any], line_base: int = 0) -> str:
+        """Identité d'un finding: scanner, règle et ligne (relative à line_base)"""
+        issue = finding["issue"]
+        line = issue.get("line") or 0
+        rule = issue.get("check_id") or issue.get("rule_id") or issue.get("title", "")
+        return f"{finding['scanner']}:{rule}:{line - line_base if line else 0}"
+    
+    def _findings_prompt(self, findings: List[Dict[str, Any]]) -> str:
+        """Une ligne par finding: F<n> L<ligne> [scanner règle] severity: titre"""
+        lines = ["Findings des scanners (à confirmer ou écarter dans \"triage\"):"]
+        for index, finding in enumerate(findings, 1):
+            issue = finding["issue"]
+            rule = issue.get("check_id") or issue.get("rule_id") or ""
+            label = f"{finding['scanner']} {rule}".strip()
+            lines.append(f"F{index} L{issue.get('line') or 0} [{label}] {issue.get('severity', 'medium')}: {issue.get('title', '')}")
+        return "\n".join(lines)
+    
+    def _rules_prompt(self, file_path: str, content: str, ranges: Optional[List[tuple]] = None) -> str:
+        """Findings des règles locales (limités à des plages de lignes) dont la catégorie reste demandée au modèle"""
+        if self.rule_engine is None or self.language is None:
+            return ""
+        issues = self.rule_engine.context_issues(file_path, content, self.language)
+        if ranges is not None:
+            issues = [i for i in issues if any(start <= (i.get("line") or 0) <= end for start, end in ranges)]
+        if not issues:
+            return ""
+        lines = ["Déjà signalé par les règles locales (ne pas répéter; chercher les autres problèmes de ces catégories):"]
+        lines.extend(f"- L{i['line']} [{i['rule_id']}] {i['title']}: {i['description']}" for i in issues)
+        return "\n".join(lines)
+    
+    def _apply_triage(self, json_data: Dict[str, Any], findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Annote les findings avec les verdicts du modèle; retourne les verdicts à mettre en cache"""
+        for entry in json_data.pop("triage", None) or []:
+            if isinstance(entry, dict):
+                entry = [entry.get("id"), entry.get("verdict"), entry.get("confidence")]
+            if not isinstance(entry, list) or len(entry) < 2:
+                continue
+            try:
+                index = int(str(entry[0]).lstrip("Ff")) - 1
+                confidence = float(entry[2]) if len(entry) > 2 and entry[2] is not None else 1.0
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= index < len(findings):
+                continue
+            verdict = "dismissed" if str(entry[1]).lower().startswith("dismiss") else "confirmed"
+            findings[index]["issue"]["triage"] = {"verdict": verdict, "confidence": confidence, "by": self.scanner_type}
+        return self._verdicts(findings)
+    
+    def _verdicts(self, findings: List[Dict[str, Any]], line_base: int = 0) -> List[Dict[str, Any]]:
+        verdicts = []
+        for finding in findings:
+            triage = finding["issue"].get("triage")
+            if triage:
+                verdicts.append({"finding": self._fingerprint(finding, line_base),
+                                 "verdict": triage["verdict"], "confidence": triage["confidence"]})
+        return verdicts
+    
+    def _restore_verdicts(self, findings: List[Dict[str, Any]], verdicts: List[Dict[str, Any]], line_base: int = 0):
+        """Réapplique des verdicts mis en cache aux findings correspondants"""
+        by_fingerprint = {v["finding"]: v for v in verdicts}
+        for finding in findings:
+            verdict = by_fingerprint.get(self._fingerprint(finding, line_base))
+            if verdict is not None:
+                finding["issue"]["triage"] = {"verdict": verdict["verdict"], "confidence": verdict["confidence"], "by": self.scanner_type}
+    
+    def skip_content(self, content: str) -> bool:
+        """Indique si le fichier doit être ignoré (trop gros ou couvert par les règles locales)"""
+        if self.max_file_size is not None and len(content) > self.max_file_size:
+            return True
+        if self.rule_engine is not None and self.language is not None:
+            if not self.residual_categories():
+                return True
+            return self.rule_engine.is_fully_covered(content, self.language)
+        return False
+    
+    def residual_categories(self) -> List[str]:
+        """Catégories que le modèle doit vérifier (sans règle locale full_coverage)"""
+        covered = set()
+        if self.rule_engine is not None and self.language is not None:
+            covered = self.rule_engine.covered_categories(self.language)
+        return [c for i, c in enumerate(self.categories, 1) if i not in covered]
+    
+    def _checklist(self) -> str:
+        """Liste numérotée des catégories à vérifier par le modèle (avec leur code en mode compact)"""
+        categories = self.residual_categories()
+        if self.compact_responses:
+            codes = {name: entry.code for name, entry in zip(self.categories, CATALOGS.get(self.scanner_type, []))}
+            categories = [f"[{codes[c]}] {c}" if c in codes else c for c in categories]
+        return "\n".join(f"{i}. {c}" for i, c in enumerate(categories, 1))
+    
+    def _response_format(self) -> str:
+        return COMPACT_FORMAT if self.compact_responses else self.response_format
+    
+    def collect_files(self, source: str) -> List[str]:
+        """Liste les fichiers à analyser pour une source (répertoire ou fichier)"""
+        if self.snapshot is not None:
+            return [source] if self.snapshot.get(source) is not None else []
+        return [source] if os.path.isfile(source) else []
+    
+    def source_exists(self, source: str) -> bool:
+        """Indique si une source (répertoire ou fichier) existe"""
+        if self.snapshot is not None:
+            return self.snapshot.exists(source)
+        return os.path.exists(source)
+    
+    def process_response(self, file_path: str, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Post-traitement d'une réponse du modèle pour un fichier"""
+        if "error" in json_data:
+            json_data["file"] = file_path
+            return json_data
+        
+        # Ajouter metadata
+        self._annotate(json_data.get("issues", []), file_path)
+        return json_data
+    
+    def _cache_key(self, content_hash: str, file_path: Optional[str] = None) -> str:
+        """Clé de cache: contenu + analyzer + modèle + prompt statique (+ règles de contexte, findings triés)"""
+        parts = [
+            "ai", self.scanner_type, self.client.cache_id, content_hash,
+            hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()
+        ]
+        if self.rule_engine is not None and self.language is not None and file_path:
+            parts.append(self.rule_engine.context_key(file_path, self.language))
+        findings = self._findings_for(file_path) if file_path else []
+        if findings:
+            parts.append("|".join(self._fingerprint(f) for f in findings))
+        return self.cache.make_key(*parts)
+    
+    def _to_cache(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Issues sans les champs propres au chemin du fichier"""
+        issues = []
+        for issue in result.get("issues", []):
+            issues.append({k: v for k, v in issue.items() if k not in ("file", "type")})
+        if result.get("triage"):
+            return {"issues": issues, "triage": result["triage"]}
+        return {"issues": issues}
+    
+    def _from_cache(self, file_path: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Reconstruit un résultat depuis le cache pour ce fichier"""
+        result = {"file": file_path, "issues": copy.deepcopy(cached.get("issues", [])), "cached": True}
+        self._annotate(result["issues"], file_path)
+        if cached.get("triage"):
+            self._restore_verdicts(self._findings_for(file_path), cached["triage"])
+            result["triage"] = cached["triage"]
+        return result
+    
+    def _annotate(self, issues: List[Dict[str, Any]], file_path: str):
+        """Ajoute le fichier et le type à chaque issue"""
+        for issue in issues:
+            issue["file"] = file_path
+            issue["type"] = self.scanner_type
+    
+    def _summarize(self, issues: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Compte les issues par severity"""
+        return {
+            "total": len(issues),
+            "critical": len([i for i in issues if i.get("severity") == "critical"]),
+            "high": len([i for i in issues if i.get("severity") == "high"]),
+            "medium": len([i for i in issues if i.get("severity") == "medium"])
+        }
+    
+    def _build_system_prompt(self) -> str:
+        """Construit la partie statique du prompt"""
+        raise NotImplementedError
+    
+    def _build_prompt(self, file_path: str, content: str) -> str:
+        """Construit la partie variable du prompt"""
+        raise NotImplementedError
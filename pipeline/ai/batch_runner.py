@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Batch Runner - Analyse IA via Bedrock Batch Inference (scans nocturnes)
+"""
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from .bedrock_client import BedrockClient, ISSUES_SCHEMA
+from .base_analyzer import BaseAnalyzer
+
+
+TERMINAL_STATUSES = {"Completed", "PartiallyCompleted", "Failed", "Stopped", "Expired"}
+
+
+class BatchBackend:
+    """Stockage et exécution d'un job batch.
+
+    Séparé du BatchRunner pour pouvoir remplacer S3 + Bedrock par un
+    répertoire local (tests, exécution hors AWS).
+    """
+    
+    def upload(self, local_path: str, job_name: str) -> str:
+        """Dépose le fichier JSONL d'entrée et retourne son URI"""
+        raise NotImplementedError
+    
+    def submit(self, job_name: str, input_uri: str, model_id: str) -> str:
+        """Soumet le job et retourne son identifiant"""
+        raise NotImplementedError
+    
+    def poll(self, job_id: str) -> str:
+        """Retourne le statut courant du job"""
+        raise NotImplementedError
+    
+    def download_outputs(self, job_id: str) -> List[Dict[str, Any]]:
+        """Retourne les enregistrements de sortie du job"""
+        raise NotImplementedError
+
+
+class S3BedrockBackend(BatchBackend):
+    """Backend réel: entrée/sortie sur S3, job Bedrock model invocation"""
+    
+    def __init__(self, bucket: str, role_arn: str, prefix: str = "smart-pipeline/batch",
+                 region: str = "us-east-1"):
+        import boto3
+        
+        self.bucket = bucket
+        self.role_arn = role_arn
+        self.prefix = prefix.strip("/")
+        self.s3 = boto3.client("s3", region_name=region)
+        self.bedrock = boto3.client("bedrock", region_name=region)
+    
+    def upload(self, local_path: str, job_name: str) -> str:
+        key = f"{self.prefix}/{job_name}/input/{os.path.basename(local_path)}"
+        self.s3.upload_file(local_path, self.bucket, key)
+        return f"s3://{self.bucket}/{key}"
+    
+    def submit(self, job_name: str, input_uri: str, model_id: str) -> str:
+        response = self.bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": input_uri}},
+            outputDataConfig={"s3OutputDataConfig": {
+                "s3Uri": f"s3://{self.bucket}/{self.prefix}/{job_name}/output/"
+            }}
+        )
+        return response["jobArn"]
+    
+    def poll(self, job_id: str) -> str:
+        return self.bedrock.get_model_invocation_job(jobIdentifier=job_id)["status"]
+    
+    def download_outputs(self, job_id: str) -> List[Dict[str, Any]]:
+        job = self.bedrock.get_model_invocation_job(jobIdentifier=job_id)
+        output_uri = job["outputDataConfig"]["s3OutputDataConfig"]["s3Uri"]
+        input_name = os.path.basename(job["inputDataConfig"]["s3InputDataConfig"]["s3Uri"])
+        
+        # Bedrock écrit <output>/<job id>/<fichier d'entrée>.out
+        prefix = output_uri.replace(f"s3://{self.bucket}/", "", 1).rstrip("/")
+        key = f"{prefix}/{job_id.split('/')[-1]}/{input_name}.out"
+        body = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read().decode("utf-8")
+        return _parse_jsonl(body)
+
+
+class LocalDirectoryBackend(BatchBackend):
+    """Backend local: les fichiers restent dans un répertoire.
+
+    Si processor est fourni (modelInput -> modelOutput), les sorties sont
+    produites au premier poll; sinon on attend qu'un autre process dépose
+    <job_id>.jsonl.out dans le répertoire.
+    """
+    
+    def __init__(self, directory: str,
+                 processor: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.directory = directory
+        self.processor = processor
+        os.makedirs(directory, exist_ok=True)
+    
+    def upload(self, local_path: str, job_name: str) -> str:
+        target = os.path.join(self.directory, f"{job_name}.jsonl")
+        shutil.copyfile(local_path, target)
+        return target
+    
+    def submit(self, job_name: str, input_uri: str, model_id: str) -> str:
+        return job_name
+    
+    def poll(self, job_id: str) -> str:
+        output_path = self._output_path(job_id)
+        
+        if not os.path.exists(output_path) and self.processor is not None:
+            with open(os.path.join(self.directory, f"{job_id}.jsonl"), 'r', encoding='utf-8') as f:
+                records = _parse_jsonl(f.read())
+            with open(output_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    record["modelOutput"] = self.processor(record["modelInput"])
+                    f.write(json.dumps(record) + "\n")
+        
+        return "Completed" if os.path.exists(output_path) else "InProgress"
+    
+    def download_outputs(self, job_id: str) -> List[Dict[str, Any]]:
+        with open(self._output_path(job_id), 'r', encoding='utf-8') as f:
+            return _parse_jsonl(f.read())
+    
+    def _output_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.jsonl.out")
+
+
+class DeferredClient:
+    """Client prêté à un analyzer pendant un job batch.
+
+    Au premier passage (collecte), chaque appel devient une requête du job et
+    reçoit une erreur: rien n'est mis en cache. Au second passage, l'appel
+    reçoit la réponse du job à la même requête (ou l'erreur de son
+    enregistrement); une requête absente du job est envoyée au client.
+    """
+    
+    def __init__(self, client: Any):
+        self.client = client
+        self.requests: Dict[str, Dict[str, Any]] = {}
+        self.responses: Optional[Dict[str, Dict[str, Any]]] = None
+        self.direct_calls = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def primary(self) -> Any:
+        # Pool ou cascade: le job tourne sur le modèle principal
+        return getattr(self.client, "primary", self.client)
+    
+    @property
+    def model_id(self) -> str:
+        return self.client.model_id
+    
+    @property
+    def cache_id(self) -> str:
+        return self.client.cache_id
+    
+    def invoke_json(self, prompt: str, schema: Optional[Dict[str, Any]] = ISSUES_SCHEMA,
+                    system: Optional[str] = None) -> Dict[str, Any]:
+        body = self.primary.build_request_body(prompt, system=system, schema=schema)
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+        with self._lock:
+            if self.responses is None:
+                self.requests.setdefault(digest, body)
+                return {"error": "Deferred to batch job"}
+            response = self.responses.get(digest)
+            if response is None:
+                self.direct_calls += 1
+        if response is None:
+            return self.client.invoke_json(prompt, schema=schema, system=system)
+        # Plusieurs fichiers identiques partagent la réponse: chacun la modifie
+        return copy.deepcopy(response)
+    
+    def get_usage(self) -> Dict[str, int]:
+        return self.client.get_usage()
+
+
+class BatchRunner:
+    """Regroupe les prompts de tous les analyzers dans un seul job batch.
+
+    Les analyzers tournent deux fois avec un DeferredClient, par leur point
+    d'entrée analyze_units: la première fois pour collecter les requêtes, la
+    seconde pour traiter les réponses du job. Cache des résultats, blocs
+    Terraform et stages Docker se comportent donc comme en analyse directe:
+    seuls les fichiers, blocs ou stages absents du cache sont dans le job.
+    """
+    
+    def __init__(self, bedrock_client: BedrockClient, backend: BatchBackend,
+                 poll_interval: float = 60, timeout: float = 86400, min_records: int = 100):
+        self.client = bedrock_client
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        # Bedrock refuse les jobs sous un nombre minimal d'enregistrements
+        self.min_records = min_records
+        self.sources: List[Tuple[BaseAnalyzer, List[str]]] = []
+        self.records = []
+        self.targets = {}
+    
+    def add_source(self, analyzer: BaseAnalyzer, source: str) -> int:
+        """Ajoute tous les fichiers d'une source (répertoire ou fichier)"""
+        added = 0
+        for file_path in analyzer.collect_files(source):
+            if self.add_file(analyzer, file_path):
+                added += 1
+        return added
+    
+    def add_file(self, analyzer: BaseAnalyzer, file_path: str) -> bool:
+        """Ajoute un fichier au job; False s'il est ignoré ou illisible"""
+        try:
+            content = analyzer.read_file(file_path)
+        except (OSError, UnicodeDecodeError):
+            return False
+        
+        if analyzer.skip_content(content):
+            return False
+        
+        for registered, paths in self.sources:
+            if registered is analyzer:
+                paths.append(file_path)
+                return True
+        self.sources.append((analyzer, [file_path]))
+        return True
+    
+    def run(self, job_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Soumet le job, attend la fin et retourne un résultat par analyzer.
+
+        Un fichier dont l'enregistrement a échoué est rapporté à part:
+        {"error": ..., "file": ..., "scanner": ...}.
+        """
+        if not self.sources:
+            return []
+        
+        job_name = job_name or f"smart-pipeline-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        deferred = [DeferredClient(analyzer.client) for analyzer, _ in self.sources]
+        self._analyze(deferred, collect=True)
+        
+        self.records = []
+        self.targets = {}
+        for client in deferred:
+            for digest, body in client.requests.items():
+                record_id = f"{len(self.records):08d}"
+                self.records.append({"recordId": record_id, "modelInput": body})
+                self.targets[record_id] = (client, digest)
+        
+        label = job_name
+        if not self.records or len(self.records) < self.min_records:
+            # Tout vient du cache, ou trop peu de requêtes pour un job batch: appels directs
+            label = "interactive"
+            for client in deferred:
+                client.responses = {}
+        else:
+            job_id = self._submit(job_name)
+            status = self._wait(job_id)
+            if status not in ("Completed", "PartiallyCompleted"):
+                return [{"error": f"Batch job {job_name} ended with status {status}"}]
+            self._dispatch(self.backend.download_outputs(job_id))
+        
+        return self._group_results(self._analyze(deferred, collect=False), label)
+    
+    def _analyze(self, deferred: List[DeferredClient], collect: bool) -> List[List[Dict[str, Any]]]:
+        """Passe de tous les analyzers avec leur DeferredClient"""
+        results = []
+        for (analyzer, paths), client in zip(self.sources, deferred):
+            client_before, similarity = analyzer.client, analyzer.similarity
+            timings, compaction = len(analyzer.timings), dict(analyzer.compaction)
+            # Les copies quasi identiques sont dans le job comme les autres fichiers
+            analyzer.client, analyzer.similarity = client, None
+            try:
+                results.append(analyzer.analyze_units(paths))
+            finally:
+                analyzer.client, analyzer.similarity = client_before, similarity
+                if collect:
+                    # La collecte ne compte pas dans les statistiques de l'analyzer
+                    del analyzer.timings[timings:]
+                    analyzer.compaction.update(compaction)
+        return results
+    
+    def _dispatch(self, outputs: List[Dict[str, Any]]):
+        """Réponses du job -> DeferredClient de chaque requête; un enregistrement absent est une erreur"""
+        responses = {}
+        for record in outputs:
+            target = self.targets.get(record.get("recordId"))
+            if target is None:
+                continue
+            client, digest = target
+            if "modelOutput" in record:
+                try:
+                    responses[record["recordId"]] = client.primary.parse_response_json(record["modelOutput"])
+                except Exception as e:
+                    responses[record["recordId"]] = {"error": f"Invalid model output: {e}"}
+            else:
+                responses[record["recordId"]] = {"error": (record.get("error") or {}).get("errorMessage", "No model output")}
+        
+        for client, _ in self.targets.values():
+            client.responses = {}
+        for record_id, (client, digest) in self.targets.items():
+            client.responses[digest] = responses.get(record_id, {"error": "No model output"})
+    
+    def _submit(self, job_name: str) -> str:
+        """Écrit le JSONL d'entrée, le dépose et soumet le job"""
+        tmp_dir = tempfile.mkdtemp(prefix="smart-pipeline-batch-")
+        local_path = os.path.join(tmp_dir, f"{job_name}.jsonl")
+        with open(local_path, 'w', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+        
+        try:
+            input_uri = self.backend.upload(local_path, job_name)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        # Pool ou cascade: le job tourne sur le modèle principal
+        return self.backend.submit(job_name, input_uri, getattr(self.client, "primary", self.client).model_id)
+    
+    def _wait(self, job_id: str) -> str:
+        """Poll le job jusqu'à un statut terminal ou le timeout"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            status = self.backend.poll(job_id)
+            if status in TERMINAL_STATUSES:
+                return status
+            if time.monotonic() >= deadline:
+                return "Timeout"
+            time.sleep(self.poll_interval)
+    
+    def _group_results(self, results: List[List[Dict[str, Any]]], source: str) -> List[Dict[str, Any]]:
+        """Un résultat par analyzer au format des scanners, puis une erreur par fichier en échec"""
+        grouped = []
+        errors = []
+        for (analyzer, paths), file_results in zip(self.sources, results):
+            issues = []
+            for path, result in zip(paths, file_results):
+                if "error" in result:
+                    errors.append({"error": result["error"], "file": result.get("file", path), "scanner": analyzer.scanner_type})
+                else:
+                    issues.extend(result.get("issues", []))
+            grouped.append({
+                "scanner": analyzer.scanner_type,
+                "source": f"batch:{source}",
+                "files_analyzed": len(paths),
+                "issues": issues,
+                "summary": analyzer._summarize(issues)
+            })
+        return grouped + errors
+
+
+def _parse_jsonl(text: str) -> List[Dict[str, Any]]:
+    """Parse un contenu JSONL en ignorant les lignes vides"""
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
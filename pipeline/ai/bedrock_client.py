@@ -4,117 +4,446 @@ Bedrock Client - Interface pour Amazon Bedrock
 """
 
 import json
+import threading
 import boto3
-from typing import Dict, Any
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from typing import Dict, List, Any, Optional
+
+from .json_extractor import extract_json
+from .hedging import Hedger
+
+
+# Schéma des issues pour le mode tool-use / JSON schema
+ISSUES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "file": {"type": "string"},
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "line": {"type": "integer"},
+                    "severity": {"type": "string", "enum": ["critical", "high", "medium", "low"]},
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "recommendation": {"type": "string"},
+                    "confidence": {"type": "number"},
+                    "resource": {"type": "string"}
+                },
+                "required": ["line", "severity", "title", "description", "confidence"]
+            }
+        }
+    },
+    "required": ["issues"]
+}
+
+# Format compact (compact_responses): code de catégorie, détail seulement si grave
+COMPACT_ISSUES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "r": {"type": "string"},
+                    "l": {"type": "integer"},
+                    "s": {"type": "string", "enum": ["critical", "high", "medium", "low"]},
+                    "c": {"type": "number"},
+                    "d": {"type": "string"},
+                    "t": {"type": "string"},
+                    "o": {"type": "string"}
+                },
+                "required": ["r", "l", "s", "c"]
+            }
+        }
+    },
+    "required": ["issues"]
+}
+
+TOOL_NAME = "report_issues"
+TOOL_DESCRIPTION = "Rapporte les problèmes détectés dans le fichier analysé"
+
+
+TRUNCATED_STOP_REASONS = {"max_tokens", "length"}
+
+# Erreurs transitoires sur lesquelles un autre endpoint peut prendre le relais
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ServiceUnavailableException"
+}
+
+
+# Formats de body (requête et réponse), reconnus dans le model ID
+MODEL_FAMILIES = ("anthropic", "amazon.nova", "amazon.titan")
+
+
+def model_family(model_id: str) -> str:
+    """Format de body d'un modèle: anthropic, amazon.nova, amazon.titan ou generic"""
+    return next((family for family in MODEL_FAMILIES if family in model_id), "generic")
 
 
 class BedrockClient:
-    def __init__(self, model_id: str, region: str = "us-east-1"):
+    def __init__(self, model_id: str, region: str = "us-east-1", structured_output: bool = False,
+                 max_tokens: int = 4096, temperature: float = 0.1, max_continuations: int = 3,
+                 prompt_caching: bool = False, max_attempts: Optional[int] = None,
+                 hedging: Optional[Dict[str, Any]] = None):
         self.model_id = model_id
         self.region = region
+        self.structured_output = structured_output
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.max_continuations = max_continuations
+        self.prompt_caching = prompt_caching
+        self.usage = {
+            "calls": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_tokens": 0,
+            "cache_write_tokens": 0
+        }
+        self._usage_lock = threading.Lock()
+        # max_attempts limite les retries boto3 (failover rapide dans un pool)
         self.client = boto3.client(
             service_name='bedrock-runtime',
-            region_name=region
+            region_name=region,
+            config=Config(retries={"max_attempts": max_attempts, "mode": "standard"}) if max_attempts else None
         )
+        
+        # Hedging: doublon des requêtes lentes, éventuellement vers une autre
+        # région ou un inference profile
+        hedging = hedging or {}
+        self.hedger = None
+        if hedging.get("enabled", False):
+            self.hedger = Hedger(
+                percentile=hedging.get("percentile", 0.95),
+                max_extra_requests=hedging.get("max_extra_requests", 0.1),
+                min_samples=hedging.get("min_samples", 20)
+            )
+            self.hedge_model_id = hedging.get("model_id") or model_id
+            # Le doublon envoie le body du modèle principal et sa réponse est lue au même format
+            if model_family(self.hedge_model_id) != model_family(model_id):
+                raise ValueError(f"Hedge model {self.hedge_model_id} does not use the request format of {model_id}")
+            hedge_region = hedging.get("region") or region
+            self.hedge_client = None if hedge_region == region else boto3.client(
+                service_name='bedrock-runtime',
+                region_name=hedge_region
+            )
+    
+    @property
+    def cache_id(self) -> str:
+        """Identité du modèle dans les clés de cache"""
+        return self.model_id
+    
+    def supports_tools(self) -> bool:
+        """Indique si le modèle supporte le mode tool-use (sortie structurée)"""
+        return "anthropic" in self.model_id or "amazon.nova" in self.model_id
+    
+    def supports_prompt_caching(self) -> bool:
+        """Indique si le modèle supporte le prompt caching Bedrock"""
+        return "anthropic" in self.model_id or "amazon.nova" in self.model_id
     
-    def invoke(self, prompt: str, max_tokens: int = 4096, temperature: float = 0.1) -> Dict[str, Any]:
-        """Invoke Bedrock model avec un prompt"""
+    def invoke(self, prompt: str, max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+               schema: Optional[Dict[str, Any]] = None, system: Optional[str] = None) -> Dict[str, Any]:
+        """Invoke Bedrock model avec un prompt.
+
+        system est la partie statique du prompt (instructions), mise en cache
+        côté Bedrock quand le modèle le permet. Si la réponse est coupée par
+        max_tokens, des requêtes de continuation sont envoyées (au plus
+        max_continuations) et les morceaux recollés.
+        """
+        max_tokens = max_tokens or self.max_tokens
+        temperature = self.temperature if temperature is None else temperature
+        
         try:
-            # Déterminer le format selon le modèle
-            if "anthropic" in self.model_id:
-                # Format Claude
-                body = json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                })
-            elif "amazon.titan" in self.model_id:
-                # Format Amazon Titan
-                body = json.dumps({
-                    "inputText": prompt,
-                    "textGenerationConfig": {
-                        "maxTokenCount": max_tokens,
-                        "temperature": temperature,
-                        "topP": 0.9
-                    }
-                })
-            elif "amazon.nova" in self.model_id:
-                # Format Amazon Nova (utilise Converse API)
-                body = json.dumps({
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [{"text": prompt}]
-                        }
-                    ],
-                    "inferenceConfig": {
-                        "max_new_tokens": max_tokens,
-                        "temperature": temperature
-                    }
-                })
-            else:
-                # Format générique
-                body = json.dumps({
-                    "prompt": prompt,
-                    "max_tokens": max_tokens,
-                    "temperature": temperature
-                })
+            response_body = self._call(self._build_body(prompt, max_tokens, temperature, schema, system=system))
+            content = self._parse_content(response_body)
+            stop_reason = self._parse_stop_reason(response_body)
             
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=body
-            )
+            result = {
+                "success": True,
+                "content": content,
+                "model": self.model_id,
+                "stop_reason": stop_reason,
+                "continuations": 0,
+                "usage": self._parse_usage(response_body)
+            }
+            
+            if schema is not None:
+                data = self._parse_tool_input(response_body)
+                if data is not None and not self._is_truncated(stop_reason):
+                    result["data"] = data
+                    result["content"] = json.dumps(data)
+                return result
             
-            response_body = json.loads(response['body'].read())
+            # Continuation: le texte partiel est renvoyé comme début de réponse
+            while self._is_truncated(stop_reason) and result["continuations"] < self.max_continuations:
+                content = content.rstrip()
+                response_body = self._call(
+                    self._build_body(prompt, max_tokens, temperature, system=system, prefill=content)
+                )
+                content += self._parse_content(response_body)
+                stop_reason = self._parse_stop_reason(response_body)
+                result["continuations"] += 1
+                for key, value in self._parse_usage(response_body).items():
+                    result["usage"][key] += value
             
-            # Extraire le contenu selon le modèle
-            if "anthropic" in self.model_id:
-                content = response_body['content'][0]['text']
-            elif "amazon.titan" in self.model_id:
-                content = response_body['results'][0]['outputText']
-            elif "amazon.nova" in self.model_id:
-                content = response_body['output']['message']['content'][0]['text']
-            else:
-                content = str(response_body)
+            result["content"] = content
+            result["stop_reason"] = stop_reason
+            return result
             
+        except ClientError as e:
             return {
-                "success": True,
-                "content": content,
-                "model": self.model_id
+                "success": False,
+                "error": str(e),
+                "throttled": e.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
             }
-            
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    def extract_json(self, content: str) -> Dict[str, Any]:
-        """Extrait le JSON de la réponse de l'IA"""
-        try:
-            # Chercher le JSON dans la réponse
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                return json.loads(json_str)
-            else:
-                return {
-                    "error": "No JSON found in response",
-                    "raw_content": content
+    def invoke_json(self, prompt: str, schema: Optional[Dict[str, Any]] = ISSUES_SCHEMA,
+                    system: Optional[str] = None) -> Dict[str, Any]:
+        """Invoke le modèle et retourne directement le JSON de la réponse"""
+        use_tools = self.structured_output and schema is not None and self.supports_tools()
+        response = self.invoke(prompt, schema=schema if use_tools else None, system=system)
+        
+        # Un tool-use tronqué ne peut pas être continué: repli sur le mode texte
+        if use_tools and response["success"] and "data" not in response:
+            response = self.invoke(prompt, system=system)
+        
+        if not response["success"]:
+            return {"error": response["error"], "throttled": response.get("throttled", False)}
+        
+        # Mode tool-use: pas de parsing de texte libre
+        if "data" in response:
+            return response["data"]
+        
+        return self.extract_json(response["content"])
+    
+    def build_request_body(self, prompt: str, system: Optional[str] = None,
+                           schema: Optional[Dict[str, Any]] = ISSUES_SCHEMA) -> Dict[str, Any]:
+        """Body d'une requête, réutilisable hors invoke_model (batch inference)"""
+        use_tools = self.structured_output and schema is not None and self.supports_tools()
+        return self._build_body(prompt, self.max_tokens, self.temperature,
+                                schema if use_tools else None, system=system)
+    
+    def parse_response_json(self, response_body: Dict[str, Any]) -> Dict[str, Any]:
+        """Extrait le JSON d'un body de réponse déjà décodé (batch inference)"""
+        data = self._parse_tool_input(response_body)
+        if data is not None:
+            return data
+        return self.extract_json(self._parse_content(response_body))
+    
+    def _call(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Envoie la requête à Bedrock et décode la réponse"""
+        payload = json.dumps(body)
+        if self.hedger is None:
+            return self._invoke_model(self.client, self.model_id, payload)
+        return self.hedger.call(
+            lambda: self._invoke_model(self.client, self.model_id, payload),
+            lambda: self._invoke_model(self.hedge_client or self.client, self.hedge_model_id, payload)
+        )
+    
+    def _invoke_model(self, runtime: Any, model_id: str, payload: str) -> Dict[str, Any]:
+        response = runtime.invoke_model(
+            modelId=model_id,
+            body=payload
+        )
+        response_body = json.loads(response['body'].read())
+        # Compté même si la réponse perd la course du hedging: c'est le surcoût
+        self._record_usage(self._parse_usage(response_body))
+        return response_body
+    
+    def get_hedge_stats(self) -> List[Dict[str, Any]]:
+        """Taux de hedging et latences p50/p99, avec et sans doublons"""
+        if self.hedger is None:
+            return []
+        return [dict(self.hedger.stats(), client=f"{self.region}/{self.model_id}")]
+    
+    def get_usage(self) -> Dict[str, int]:
+        """Retourne les compteurs de tokens cumulés (dont cache hits)"""
+        with self._usage_lock:
+            return dict(self.usage)
+    
+    def _record_usage(self, usage: Dict[str, int]):
+        """Cumule la consommation d'un appel"""
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            for key, value in usage.items():
+                self.usage[key] += value
+    
+    def _build_body(self, prompt: str, max_tokens: int, temperature: float,
+                    schema: Optional[Dict[str, Any]] = None, system: Optional[str] = None,
+                    prefill: str = "") -> Dict[str, Any]:
+        """Construit le body de la requête selon le modèle.
+
+        prefill est le début de réponse déjà généré (requête de continuation).
+        """
+        cache = self.prompt_caching and self.supports_prompt_caching()
+        
+        if "anthropic" in self.model_id:
+            # Format Claude
+            body = {
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            }
+            if system:
+                system_block = {"type": "text", "text": system}
+                if cache:
+                    system_block["cache_control"] = {"type": "ephemeral"}
+                body["system"] = [system_block]
+            if prefill:
+                body["messages"].append({"role": "assistant", "content": prefill})
+            if schema is not None:
+                body["tools"] = [{
+                    "name": TOOL_NAME,
+                    "description": TOOL_DESCRIPTION,
+                    "input_schema": schema
+                }]
+                body["tool_choice"] = {"type": "tool", "name": TOOL_NAME}
+            return body
+        
+        # Sans champ system dédié, les instructions préfixent le prompt
+        if system and "amazon.nova" not in self.model_id:
+            prompt = f"{system}\n\n{prompt}"
+        
+        if "amazon.titan" in self.model_id:
+            # Format Amazon Titan
+            return {
+                "inputText": prompt + prefill,
+                "textGenerationConfig": {
+                    "maxTokenCount": max_tokens,
+                    "temperature": temperature,
+                    "topP": 0.9
+                }
+            }
+        
+        if "amazon.nova" in self.model_id:
+            # Format Amazon Nova (utilise Converse API)
+            body = {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [{"text": prompt}]
+                    }
+                ],
+                "inferenceConfig": {
+                    "max_new_tokens": max_tokens,
+                    "temperature": temperature
                 }
-        except json.JSONDecodeError as e:
+            }
+            if system:
+                body["system"] = [{"text": system}]
+                if cache:
+                    body["system"].append({"cachePoint": {"type": "default"}})
+            if prefill:
+                body["messages"].append({"role": "assistant", "content": [{"text": prefill}]})
+            if schema is not None:
+                body["toolConfig"] = {
+                    "tools": [{
+                        "toolSpec": {
+                            "name": TOOL_NAME,
+                            "description": TOOL_DESCRIPTION,
+                            "inputSchema": {"json": schema}
+                        }
+                    }],
+                    "toolChoice": {"tool": {"name": TOOL_NAME}}
+                }
+            return body
+        
+        # Format générique
+        return {
+            "prompt": prompt + prefill,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+    
+    def _parse_content(self, response_body: Dict[str, Any]) -> str:
+        """Extrait le texte de la réponse selon le modèle"""
+        if "anthropic" in self.model_id:
+            return "".join(
+                block.get("text", "") for block in response_body.get("content", [])
+                if block.get("type") == "text"
+            )
+        if "amazon.titan" in self.model_id:
+            return response_body['results'][0]['outputText']
+        if "amazon.nova" in self.model_id:
+            return "".join(
+                block.get("text", "") for block in response_body['output']['message']['content']
+            )
+        return str(response_body)
+    
+    def _parse_stop_reason(self, response_body: Dict[str, Any]) -> str:
+        """Extrait la raison d'arrêt de la génération selon le modèle"""
+        if "anthropic" in self.model_id:
+            return response_body.get("stop_reason") or ""
+        if "amazon.titan" in self.model_id:
+            return response_body['results'][0].get("completionReason") or ""
+        if "amazon.nova" in self.model_id:
+            return response_body.get("stopReason") or ""
+        return response_body.get("stop_reason") or response_body.get("finish_reason") or ""
+    
+    def _parse_usage(self, response_body: Dict[str, Any]) -> Dict[str, int]:
+        """Extrait la consommation de tokens (dont lecture/écriture du cache)"""
+        if "anthropic" in self.model_id:
+            usage = response_body.get("usage", {})
+            return {
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+                "cache_read_tokens": usage.get("cache_read_input_tokens", 0),
+                "cache_write_tokens": usage.get("cache_creation_input_tokens", 0)
+            }
+        if "amazon.nova" in self.model_id:
+            usage = response_body.get("usage", {})
+            return {
+                "input_tokens": usage.get("inputTokens", 0),
+                "output_tokens": usage.get("outputTokens", 0),
+                "cache_read_tokens": usage.get("cacheReadInputTokenCount", 0),
+                "cache_write_tokens": usage.get("cacheWriteInputTokenCount", 0)
+            }
+        if "amazon.titan" in self.model_id:
             return {
-                "error": f"JSON decode error: {str(e)}",
-                "raw_content": content
+                "input_tokens": response_body.get("inputTextTokenCount", 0),
+                "output_tokens": sum(r.get("tokenCount", 0) for r in response_body.get("results", [])),
+                "cache_read_tokens": 0,
+                "cache_write_tokens": 0
             }
+        return {"input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+    
+    def _is_truncated(self, stop_reason: str) -> bool:
+        """Indique si la réponse a été coupée par la limite de tokens"""
+        return stop_reason.lower() in TRUNCATED_STOP_REASONS
+    
+    def _parse_tool_input(self, response_body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extrait l'input du tool-use (sortie structurée) s'il est présent"""
+        if "anthropic" in self.model_id:
+            for block in response_body.get("content", []):
+                if block.get("type") == "tool_use" and block.get("name") == TOOL_NAME:
+                    return block.get("input")
+        elif "amazon.nova" in self.model_id:
+            for block in response_body.get("output", {}).get("message", {}).get("content", []):
+                tool_use = block.get("toolUse")
+                if tool_use and tool_use.get("name") == TOOL_NAME:
+                    return tool_use.get("input")
+        return None
+    
+    def extract_json(self, content: str) -> Dict[str, Any]:
+        """Extrait le JSON de la réponse de l'IA"""
+        return extract_json(content)
 
 
 def main():
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Bedrock Pool - Répartition des requêtes sur plusieurs régions / modèles
+"""
+
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable, Union
+from .bedrock_client import BedrockClient, ISSUES_SCHEMA
+from .model_cascade import ModelCascade, Tier
+
+
+class Endpoint:
+    """Un client Bedrock du pool et ses statistiques de santé"""
+    
+    def __init__(self, client: BedrockClient):
+        self.client = client
+        self.name = f"{client.region}/{client.model_id}"
+        self.outstanding = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttles = 0
+        self.total_latency = 0.0
+        self.cooldown_until = 0.0
+        self.consecutive_throttles = 0
+    
+    def is_available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.name,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "throttles": self.throttles,
+            "avg_latency": round(self.total_latency / self.requests, 3) if self.requests else 0.0
+        }
+
+
+class BedrockClientPool:
+    """Pool de clients Bedrock avec routage least-outstanding-requests.
+
+    Expose la même interface que BedrockClient (invoke, invoke_json,
+    get_usage...) pour être utilisable tel quel par les analyzers. En cas de
+    throttling, l'endpoint est mis en pause (backoff exponentiel) et la
+    requête repart sur un autre endpoint.
+    """
+    
+    def __init__(self, clients: List[BedrockClient], cooldown: float = 5.0, max_cooldown: float = 60.0):
+        if not clients:
+            raise ValueError("BedrockClientPool requires at least one client")
+        self.endpoints = [Endpoint(client) for client in clients]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+    
+    @property
+    def primary(self) -> BedrockClient:
+        """Client de référence (batch inference, format des requêtes)"""
+        return self.endpoints[0].client
+    
+    @property
+    def model_id(self) -> str:
+        return self.primary.model_id
+    
+    @property
+    def cache_id(self) -> str:
+        return self.primary.cache_id
+    
+    @property
+    def region(self) -> str:
+        return self.primary.region
+    
+    def invoke(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Invoke sur l'endpoint le moins chargé, avec failover"""
+        return self._route(lambda client: client.invoke(prompt, **kwargs), lambda r: not r["success"])
+    
+    def invoke_json(self, prompt: str, schema: Optional[Dict[str, Any]] = ISSUES_SCHEMA,
+                    system: Optional[str] = None) -> Dict[str, Any]:
+        """invoke_json sur l'endpoint le moins chargé, avec failover"""
+        return self._route(
+            lambda client: client.invoke_json(prompt, schema=schema, system=system),
+            lambda r: "error" in r
+        )
+    
+    def build_request_body(self, *args, **kwargs) -> Dict[str, Any]:
+        return self.primary.build_request_body(*args, **kwargs)
+    
+    def parse_response_json(self, response_body: Dict[str, Any]) -> Dict[str, Any]:
+        return self.primary.parse_response_json(response_body)
+    
+    def extract_json(self, content: str) -> Dict[str, Any]:
+        return self.primary.extract_json(content)
+    
+    def get_usage(self) -> Dict[str, int]:
+        """Consommation cumulée de tous les endpoints"""
+        total = {}
+        for endpoint in self.endpoints:
+            for key, value in endpoint.client.get_usage().items():
+                total[key] = total.get(key, 0) + value
+        return total
+    
+    def get_hedge_stats(self) -> List[Dict[str, Any]]:
+        return [stats for endpoint in self.endpoints for stats in endpoint.client.get_hedge_stats()]
+    
+    def get_endpoint_stats(self) -> List[Dict[str, Any]]:
+        """Statistiques de santé par endpoint"""
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
+    
+    def _route(self, call: Callable[[BedrockClient], Dict[str, Any]],
+               failed: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+        """Exécute l'appel sur un endpoint, en basculant si throttling"""
+        tried = set()
+        result = None
+        
+        while len(tried) < len(self.endpoints):
+            endpoint = self._acquire(tried)
+            tried.add(endpoint)
+            
+            start = time.monotonic()
+            try:
+                result = call(endpoint.client)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            throttled = failed(result) and result.get("throttled", False)
+            self._release(endpoint, time.monotonic() - start, failed(result), throttled)
+            
+            if not throttled:
+                return result
+        
+        return result
+    
+    def _acquire(self, excluded: set) -> Endpoint:
+        """Choisit l'endpoint disponible avec le moins de requêtes en cours"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e not in excluded]
+            available = [e for e in candidates if e.is_available(now)] or candidates
+            endpoint = min(available, key=lambda e: (e.outstanding, e.cooldown_until, e.requests))
+            endpoint.outstanding += 1
+            return endpoint
+    
+    def _release(self, endpoint: Endpoint, latency: float, failed: bool, throttled: bool):
+        """Met à jour les statistiques et le backoff de l'endpoint"""
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+            endpoint.total_latency += latency
+            
+            if throttled:
+                endpoint.throttles += 1
+                endpoint.consecutive_throttles += 1
+                backoff = min(self.cooldown * 2 ** (endpoint.consecutive_throttles - 1), self.max_cooldown)
+                endpoint.cooldown_until = time.monotonic() + backoff
+            else:
+                endpoint.consecutive_throttles = 0
+            
+            if failed:
+                endpoint.failures += 1
+            else:
+                endpoint.successes += 1
+
+
+def create_bedrock_client(bedrock_config: Dict[str, Any]) -> Union[BedrockClient, BedrockClientPool, ModelCascade]:
+    """Crée un client simple, un pool si plusieurs endpoints sont configurés,
+    et une cascade si un modèle rapide doit faire le premier passage"""
+    options = {
+        "structured_output": bedrock_config.get("structured_output", False),
+        "max_tokens": bedrock_config.get("max_tokens", 4096),
+        "temperature": bedrock_config.get("temperature", 0.1),
+        "max_continuations": bedrock_config.get("max_continuations", 3),
+        "prompt_caching": bedrock_config.get("prompt_caching", False),
+        "hedging": bedrock_config.get("hedging")
+    }
+    
+    client = _create_model_client(bedrock_config, options)
+    cascade = bedrock_config.get("cascade", {})
+    if not cascade.get("enabled", False):
+        return client
+    
+    small = BedrockClient(
+        model_id=cascade["model_id"],
+        region=cascade.get("region", bedrock_config["region"]),
+        **options
+    )
+    prices = cascade.get("prices_per_1k", {})
+    tiers = [Tier(model, *prices.get(model.model_id, (0.0, 0.0))) for model in (small, client)]
+    return ModelCascade(
+        tiers,
+        escalate_severities=cascade.get("escalate_severities", ["critical", "high"]),
+        min_confidence=cascade.get("min_confidence", 0.7)
+    )
+
+
+def _create_model_client(bedrock_config: Dict[str, Any], options: Dict[str, Any]) -> Union[BedrockClient, BedrockClientPool]:
+    """Client du modèle principal: simple ou pool d'endpoints"""
+    endpoints = bedrock_config.get("endpoints", [])
+    if not endpoints:
+        return BedrockClient(
+            model_id=bedrock_config["model_id"],
+            region=bedrock_config["region"],
+            **options
+        )
+    
+    # Peu de retries boto3: le pool bascule plutôt sur un autre endpoint
+    clients = [
+        BedrockClient(
+            model_id=endpoint.get("model_id", bedrock_config["model_id"]),
+            region=endpoint.get("region", bedrock_config["region"]),
+            max_attempts=2,
+            **options
+        )
+        for endpoint in endpoints
+    ]
+    return BedrockClientPool(clients, cooldown=bedrock_config.get("throttle_cooldown", 5.0))
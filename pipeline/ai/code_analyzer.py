@@ -5,24 +5,59 @@ Code Analyzer - Analyse le code applicatif avec IA
 
 import os
 import glob
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pathlib import Path
 from .bedrock_client import BedrockClient
+from .base_analyzer import BaseAnalyzer
+from .prompt_compactor import syntax_for
 
 
-class CodeAnalyzer:
-    def __init__(self, bedrock_client: BedrockClient):
-        self.client = bedrock_client
+class CodeAnalyzer(BaseAnalyzer):
+    scanner_type = "ai_code"
+    categories = [
+        "Secrets hardcodés (API keys, passwords, tokens, credentials)",
+        "Appels API non sécurisés (HTTP au lieu de HTTPS)",
+        "Absence de validation des données utilisateur",
+        "console.log ou print en production",
+        "Gestion d'erreurs insuffisante (try/catch vides)",
+        "Données sensibles exposées",
+        "Injections potentielles (SQL, XSS, Command)",
+        "Dépendances obsolètes ou vulnérables",
+        "Authentification/autorisation manquante",
+        "CORS mal configuré"
+    ]
+    # Format de réponse détaillé (sans compact_responses)
+    response_format = """Réponds UNIQUEMENT en JSON avec cette structure exacte:
+{
+  "file": "<chemin du fichier>",
+  "issues": [
+    {
+      "line": <numéro de ligne>,
+      "severity": "critical|high|medium|low",
+      "title": "Titre court",
+      "description": "Description détaillée",
+      "recommendation": "Comment corriger avec exemple de code",
+      "confidence": 0.0-1.0
+    }
+  ]
+}"""
+    # Skip si fichier trop gros (>10KB)
+    max_file_size = 10000
+    
+    def __init__(self, bedrock_client: BedrockClient, max_workers: int = 1,
+                 snapshot: Optional[Any] = None, cache: Optional[Any] = None,
+                 rule_engine: Optional[Any] = None, similarity: Optional[Any] = None,
+                 compact_prompts: bool = False, compact_responses: bool = False):
+        super().__init__(bedrock_client, max_workers, snapshot, cache, rule_engine, similarity,
+                         compact_prompts, compact_responses)
         self.supported_extensions = ['.ts', '.tsx', '.js', '.jsx', '.py', '.go']
     
     def analyze_directory(self, code_dir: str = "app") -> Dict[str, Any]:
         """Analyse les fichiers de code d'un répertoire"""
-        if not os.path.exists(code_dir):
+        if not self.source_exists(code_dir):
             return {"error": f"Directory not found: {code_dir}"}
         
-        code_files = []
-        for ext in self.supported_extensions:
-            code_files.extend(glob.glob(f"{code_dir}/**/*{ext}", recursive=True))
+        code_files = self.collect_files(code_dir)
         
         if not code_files:
             return {"error": "No code files found"}
@@ -30,8 +65,7 @@ class CodeAnalyzer:
         all_issues = []
         
         # Limiter à 5 fichiers pour éviter trop d'appels Bedrock
-        for code_file in code_files[:5]:
-            result = self.analyze_file(code_file)
+        for result in self.analyze_files(code_files[:5]):
             if "issues" in result:
                 all_issues.extend(result["issues"])
         
@@ -40,88 +74,43 @@ class CodeAnalyzer:
             "source": code_dir,
             "files_analyzed": min(len(code_files), 5),
             "issues": all_issues,
-            "summary": {
-                "total": len(all_issues),
-                "critical": len([i for i in all_issues if i["severity"] == "critical"]),
-                "high": len([i for i in all_issues if i["severity"] == "high"]),
-                "medium": len([i for i in all_issues if i["severity"] == "medium"])
-            }
+            "summary": self._summarize(all_issues)
         }
     
-    def analyze_file(self, file_path: str) -> Dict[str, Any]:
-        """Analyse un fichier de code avec l'IA"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Skip si fichier trop gros (>10KB)
-            if len(content) > 10000:
-                return {"issues": []}
-            
-            prompt = self._build_prompt(file_path, content)
-            response = self.client.invoke(prompt)
-            
-            if not response["success"]:
-                return {"error": response["error"], "file": file_path}
-            
-            json_data = self.client.extract_json(response["content"])
-            
-            if "error" in json_data:
-                return json_data
-            
-            # Ajouter metadata
-            if "issues" in json_data:
-                for issue in json_data["issues"]:
-                    issue["file"] = file_path
-                    issue["type"] = "ai_code"
-            
-            return json_data
-            
-        except Exception as e:
-            return {"error": str(e), "file": file_path}
-    
-    def _build_prompt(self, file_path: str, content: str) -> str:
-        """Construit le prompt pour l'analyse de code"""
-        file_ext = Path(file_path).suffix
+    def collect_files(self, code_dir: str) -> List[str]:
+        """Liste les fichiers de code supportés d'un répertoire"""
+        if self.snapshot is not None:
+            return [e.path for e in self.snapshot.glob(f"{code_dir}/**/*") if Path(e.path).suffix in self.supported_extensions]
         
-        return f"""Tu es un expert en sécurité applicative. Analyse ce code et détecte TOUS les problèmes de sécurité et mauvaises pratiques.
-
-Fichier: {file_path}
-
-```{file_ext[1:]}
-{content}
-```
+        # Un seul parcours du répertoire, filtré par extension
+        return [
+            path for path in glob.glob(f"{code_dir}/**/*", recursive=True)
+            if Path(path).suffix in self.supported_extensions and os.path.isfile(path)
+        ]
+    
+    def _build_system_prompt(self) -> str:
+        """Construit la partie statique du prompt pour l'analyse de code"""
+        return f"""Tu es un expert en sécurité applicative. Analyse le code fourni et détecte TOUS les problèmes de sécurité et mauvaises pratiques.
 
 Identifie:
-1. Secrets hardcodés (API keys, passwords, tokens, credentials)
-2. Appels API non sécurisés (HTTP au lieu de HTTPS)
-3. Absence de validation des données utilisateur
-4. console.log ou print en production
-5. Gestion d'erreurs insuffisante (try/catch vides)
-6. Données sensibles exposées
-7. Injections potentielles (SQL, XSS, Command)
-8. Dépendances obsolètes ou vulnérables
-9. Authentification/autorisation manquante
-10. CORS mal configuré
+{self._checklist()}
 
-Réponds UNIQUEMENT en JSON avec cette structure exacte:
-{{
-  "file": "{file_path}",
-  "issues": [
-    {{
-      "line": <numéro de ligne>,
-      "severity": "critical|high|medium|low",
-      "title": "Titre court",
-      "description": "Description détaillée",
-      "recommendation": "Comment corriger avec exemple de code",
-      "confidence": 0.0-1.0
-    }}
-  ]
-}}
+{self._response_format()}
 
 Sois strict et détecte TOUS les problèmes de sécurité."""
+    
+    def _syntax(self, file_path: str) -> Optional[str]:
+        return syntax_for(file_path)
+    
+    def _build_prompt(self, file_path: str, content: str) -> str:
+        """Construit la partie variable du prompt pour l'analyse de code"""
+        file_ext = Path(file_path).suffix
         
-        return prompt
+        return f"""Fichier: {file_path}
+
+```{file_ext[1:]}
+{content}
+```"""
 
 
 def main():
@@ -3,97 +3,281 @@
 Docker Analyzer - Analyse Dockerfile avec IA
 """
 
+import copy
+import hashlib
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, List, Any, Optional
 from .bedrock_client import BedrockClient
+from .base_analyzer import BaseAnalyzer
+from .prompt_compactor import CompactedContent
+from rules.dockerfile_parser import Stage, parse_dockerfile, split_stages
 
 
-class DockerAnalyzer:
-    def __init__(self, bedrock_client: BedrockClient):
-        self.client = bedrock_client
+# Rôle d'un stage dans son Dockerfile, rappelé au modèle
+STAGE_POSITIONS = {
+    "only": "stage unique (image livrée)",
+    "final": "stage final (image livrée)",
+    "build": "stage intermédiaire: USER, HEALTHCHECK et taille d'image ne concernent que le stage final"
+}
+
+
+class DockerAnalyzer(BaseAnalyzer):
+    """Analyse les Dockerfiles par fichier, ou par build stage avec stage_granular.
+
+    En mode stage, les stages de tous les Dockerfiles sont regroupés par
+    contenu (instructions normalisées et rôle dans le fichier): un stage
+    commun à plusieurs fichiers (Dockerfile, Dockerfile.prod,
+    services/*/Dockerfile) n'est envoyé qu'une fois à Bedrock, et ses issues
+    sont rattachées à chaque fichier qui le contient, à la ligne de
+    l'instruction concernée. Les issues sont mises en cache par stage.
+    """
+    
+    scanner_type = "ai_docker"
+    language = "dockerfile"
+    syntax = "dockerfile"
+    categories = [
+        "Images sans version spécifique (latest, non-pinned)",
+        "Absence de multi-stage build",
+        "Exécution en tant que root (pas de USER)",
+        "Secrets dans l'image (ENV avec passwords, keys, tokens)",
+        "Packages inutiles ou vulnérables",
+        "Absence de HEALTHCHECK",
+        "Trop de layers (optimisation)",
+        "Variables d'environnement sensibles en clair",
+        "COPY . . sans .dockerignore",
+        "npm install au lieu de npm ci",
+        "Pas de version pinning pour les dépendances"
+    ]
+    # Format de réponse détaillé (sans compact_responses)
+    response_format = """Réponds UNIQUEMENT en JSON avec cette structure exacte:
+{
+  "file": "<chemin du fichier>",
+  "issues": [
+    {
+      "line": <numéro de ligne>,
+      "severity": "critical|high|medium|low",
+      "title": "Titre court",
+      "description": "Description détaillée",
+      "recommendation": "Comment corriger avec exemple",
+      "confidence": 0.0-1.0
+    }
+  ]
+}"""
+
+    def __init__(self, bedrock_client: BedrockClient, max_workers: int = 1,
+                 snapshot: Optional[Any] = None, cache: Optional[Any] = None,
+                 rule_engine: Optional[Any] = None, similarity: Optional[Any] = None,
+                 compact_prompts: bool = False, compact_responses: bool = False,
+                 stage_granular: bool = False):
+        super().__init__(bedrock_client, max_workers, snapshot, cache, rule_engine, similarity,
+                         compact_prompts, compact_responses)
+        self.stage_granular = stage_granular
+    
+    def analyze_dockerfiles(self, dockerfile_paths: List[str]) -> Dict[str, Any]:
+        """Analyse plusieurs Dockerfiles en parallèle (stages communs une seule fois en mode stage)"""
+        paths = [path for path in dockerfile_paths if self.source_exists(path)]
+        if not paths:
+            return {"error": f"Dockerfile not found: {', '.join(dockerfile_paths) or 'Dockerfile'}"}
+        
+        stats = {}
+        results = self.analyze_units(paths, stats)
+        
+        errors = [r for r in results if "error" in r]
+        if len(errors) == len(results):
+            return {"error": "; ".join(f"{r.get('file', '?')}: {r['error']}" for r in errors)}
+        
+        issues = [issue for r in results for issue in r.get("issues", [])]
+        result = {
+            "scanner": "ai_docker",
+            "source": ", ".join(paths),
+            "files_analyzed": len(paths),
+            "issues": issues,
+            "summary": self._summarize(issues)
+        }
+        result.update(stats)
+        return result
+    
+    def analyze_units(self, file_paths: List[str], stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Analyse des Dockerfiles; en mode stage, les stages communs une seule fois"""
+        if self.stage_granular:
+            return self._analyze_stages(file_paths, stats if stats is not None else {})
+        return self.analyze_files(file_paths)
     
     def analyze_dockerfile(self, dockerfile_path: str = "Dockerfile") -> Dict[str, Any]:
         """Analyse un Dockerfile avec l'IA"""
-        if not os.path.exists(dockerfile_path):
+        if not self.source_exists(dockerfile_path):
             return {"error": f"Dockerfile not found: {dockerfile_path}"}
         
+        json_data = self.analyze_file(dockerfile_path)
+        
+        if "error" in json_data:
+            return json_data
+        
+        issues = json_data.get("issues", [])
+        
+        return {
+            "scanner": "ai_docker",
+            "source": dockerfile_path,
+            "issues": issues,
+            "summary": self._summarize(issues)
+        }
+    
+    def _analyze_stages(self, paths: List[str], stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Regroupe les stages identiques de tous les fichiers, analyse chaque groupe une fois"""
+        contents = {}
+        whole = []
+        groups: Dict[str, List[tuple]] = {}
+        for path in paths:
+            try:
+                content = self.read_file(path)
+            except (OSError, UnicodeDecodeError):
+                whole.append(path)
+                continue
+            contents[path] = content
+            instructions = parse_dockerfile(content)
+            stages = split_stages(instructions)
+            # Fichier entier: findings à trier, ARG globaux avant le premier FROM, rien à découper
+            if self.skip_content(content) or self._findings_for(path) or not stages \
+                    or sum(len(stage.instructions) for stage in stages) != len(instructions):
+                whole.append(path)
+                continue
+            for stage in stages:
+                position = "only" if len(stages) == 1 else "final" if stage is stages[-1] else "build"
+                groups.setdefault(self._stage_digest(stage, position), []).append((path, stage, position))
+        
+        units = list(groups.items())
+        analyses = self._map(lambda unit: self._analyze_stage(unit[0], unit[1], contents), units)
+        
+        per_file = {path: {"file": path, "issues": []} for path in contents if path not in whole}
+        for (digest, members), analysis in zip(units, analyses):
+            for path, stage, _ in members:
+                if "error" in analysis:
+                    per_file[path] = {"error": analysis["error"], "file": path}
+                elif "error" not in per_file[path]:
+                    per_file[path]["issues"].extend(self._stage_issues(analysis["issues"], stage))
+        for result in per_file.values():
+            if "error" not in result:
+                self._annotate(result["issues"], result["file"])
+                result["issues"].sort(key=lambda i: i.get("line") or 0)
+        
+        whole_results = dict(zip(whole, self.analyze_files(whole))) if whole else {}
+        stats.update({
+            "stages": sum(len(members) for _, members in units),
+            "unique_stages": len(units),
+            "stages_analyzed": sum(1 for analysis in analyses if not analysis.get("cached") and "error" not in analysis)
+        })
+        return [per_file[path] if path in per_file else whole_results[path] for path in paths]
+    
+    @staticmethod
+    def _stage_digest(stage: Stage, position: str) -> str:
+        """Identité d'un stage: rôle dans le fichier et instructions aux blancs près"""
+        text = "\n".join(f"{i.keyword} {' '.join(i.value.split())}" for i in stage.instructions)
+        return hashlib.sha256(f"{position}\n{text}".encode("utf-8")).hexdigest()
+    
+    def _analyze_stage(self, digest: str, members: List[tuple], contents: Dict[str, str]) -> Dict[str, Any]:
+        """Issues d'un stage, avec l'index de leur instruction; analysé sur le premier fichier qui le contient"""
+        path, stage, position = members[0]
+        rules = self._rules_prompt(path, contents[path], [(stage.line, stage.end_line)])
+        cache_key = None
+        if self.cache is not None:
+            parts = [
+                "ai_stage", self.scanner_type, self.client.cache_id, digest,
+                hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()
+            ]
+            if rules:
+                parts.append(hashlib.sha256(rules.encode("utf-8")).hexdigest())
+            cache_key = self.cache.make_key(*parts)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return dict(cached, cached=True)
+        
+        started = time.monotonic()
         try:
-            with open(dockerfile_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            prompt = self._build_prompt(dockerfile_path, content)
-            response = self.client.invoke(prompt)
-            
-            if not response["success"]:
-                return {"error": response["error"]}
-            
-            json_data = self.client.extract_json(response["content"])
-            
+            excerpt = "\n".join(contents[path].split("\n")[stage.line - 1:stage.end_line])
+            shared = sorted({p for p, _, _ in members} - {path})
+            prompt, compacted = self._build_stage_prompt(path, stage, position, excerpt, shared)
+            if rules:
+                prompt += "\n\n" + rules
+            json_data = self._invoke(prompt)
             if "error" in json_data:
                 return json_data
             
-            # Ajouter metadata
-            if "issues" in json_data:
-                for issue in json_data["issues"]:
-                    issue["file"] = dockerfile_path
-                    issue["type"] = "ai_docker"
-            
-            return {
-                "scanner": "ai_docker",
-                "source": dockerfile_path,
-                "issues": json_data.get("issues", []),
-                "summary": {
-                    "total": len(json_data.get("issues", [])),
-                    "critical": len([i for i in json_data.get("issues", []) if i["severity"] == "critical"]),
-                    "high": len([i for i in json_data.get("issues", []) if i["severity"] == "high"]),
-                    "medium": len([i for i in json_data.get("issues", []) if i["severity"] == "medium"])
-                }
-            }
-            
+            issues = []
+            for issue in json_data.get("issues", []):
+                if not isinstance(issue, dict):
+                    continue
+                entry = {k: v for k, v in issue.items() if k not in ("file", "type", "line")}
+                entry["instruction"] = self._instruction_index(stage, issue.get("line"), compacted)
+                issues.append(entry)
+            analysis = {"issues": issues}
+            if cache_key is not None:
+                self.cache.set(cache_key, analysis)
+            return analysis
         except Exception as e:
             return {"error": str(e)}
+        finally:
+            with self._timings_lock:
+                self.timings.append((f"{path} (stage {stage.index})", time.monotonic() - started))
     
-    def _build_prompt(self, file_path: str, content: str) -> str:
-        """Construit le prompt pour l'analyse Docker"""
-        return f"""Tu es un expert Docker et sécurité des containers. Analyse ce Dockerfile et détecte TOUTES les mauvaises pratiques.
-
-Fichier: {file_path}
-
-```dockerfile
-{content}
-```
+    def _build_stage_prompt(self, file_path: str, stage: Stage, position: str, excerpt: str,
+                            shared: List[str]) -> tuple:
+        """Prompt d'un stage; retourne (prompt, CompactedContent ou None)"""
+        label = f"{file_path} (lignes {stage.line}-{stage.end_line}, stage {stage.index}: {STAGE_POSITIONS[position]})"
+        parts = [
+            "Analyse uniquement ce build stage; les autres stages du fichier sont analysés séparément. "
+            f"Donne les numéros de ligne de {file_path}."
+        ]
+        if shared:
+            parts[0] += f" Le même stage est repris dans: {', '.join(shared)}."
+        prompt, compacted = self._content_prompt(file_path, excerpt, stage.line, label)
+        parts.append(prompt)
+        return "\n\n".join(parts), compacted
+    
+    @staticmethod
+    def _instruction_index(stage: Stage, line: Any, compacted: Optional[CompactedContent] = None) -> int:
+        """Ligne rendue par le modèle -> index de l'instruction dans le stage (FROM si inconnue)"""
+        if not isinstance(line, int) or line <= 0:
+            return 0
+        for index, instruction in enumerate(stage.instructions):
+            if instruction.line <= line <= instruction.end_line:
+                return index
+        # Numéro de ligne compté depuis le début de l'extrait (compacté ou non)
+        if compacted is not None and line <= len(compacted.lines):
+            line = compacted.lines[line - 1]
+        elif line <= stage.end_line - stage.line + 1:
+            line = stage.line + line - 1
+        preceding = [index for index, instruction in enumerate(stage.instructions) if instruction.line <= line]
+        return preceding[-1] if preceding else 0
+    
+    def _stage_issues(self, entries: List[Dict[str, Any]], stage: Stage) -> List[Dict[str, Any]]:
+        """Issues d'un stage analysé -> issues d'un fichier, à la ligne de son instruction"""
+        issues = []
+        for entry in entries:
+            issue = {k: copy.deepcopy(v) for k, v in entry.items() if k != "instruction"}
+            index = min(entry.get("instruction") or 0, len(stage.instructions) - 1)
+            issue["line"] = stage.instructions[index].line
+            issues.append(issue)
+        return issues
+    
+    def _build_system_prompt(self) -> str:
+        """Construit la partie statique du prompt pour l'analyse Docker"""
+        return f"""Tu es un expert Docker et sécurité des containers. Analyse le Dockerfile fourni et détecte TOUTES les mauvaises pratiques.
 
 Identifie:
-1. Images sans version spécifique (latest, non-pinned)
-2. Absence de multi-stage build
-3. Exécution en tant que root (pas de USER)
-4. Secrets dans l'image (ENV avec passwords, keys, tokens)
-5. Packages inutiles ou vulnérables
-6. Absence de HEALTHCHECK
-7. Trop de layers (optimisation)
-8. Variables d'environnement sensibles en clair
-9. COPY . . sans .dockerignore
-10. npm install au lieu de npm ci
-11. Pas de version pinning pour les dépendances
-
-Réponds UNIQUEMENT en JSON avec cette structure exacte:
-{{
-  "file": "{file_path}",
-  "issues": [
-    {{
-      "line": <numéro de ligne>,
-      "severity": "critical|high|medium|low",
-      "title": "Titre court",
-      "description": "Description détaillée",
-      "recommendation": "Comment corriger avec exemple",
-      "confidence": 0.0-1.0
-    }}
-  ]
-}}
+{self._checklist()}
+
+{self._response_format()}
 
 Sois strict et détecte TOUS les problèmes."""
-        
-        return prompt
+
+    def _build_prompt(self, file_path: str, content: str) -> str:
+        """Construit la partie variable du prompt pour l'analyse Docker"""
+        return f"""Fichier: {file_path}
+
+```dockerfile
+{content}
+```"""
 
 
 def main():
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Hedging - Requêtes dupliquées pour couper la latence de queue des appels Bedrock
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Callable, Optional
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentile par rang (valeurs triées)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Hedger:
+    """Envoie un doublon d'une requête lente, garde la première réponse.
+
+    Le délai avant doublon est le percentile `percentile` des dernières
+    latences observées (fenêtre glissante de `window` appels): seules les
+    requêtes déjà plus lentes que ~95% des autres sont doublées. Tant que
+    `min_samples` latences n'ont pas été observées, rien n'est doublé.
+    Le surcoût est plafonné: au plus `max_extra_requests` doublons par
+    requête servie (0.1 = 10% d'appels en plus).
+
+    Un appel boto3 en cours ne s'interrompt pas: le perdant est annulé s'il
+    n'a pas démarré, sinon sa réponse est ignorée (ses tokens restent
+    comptés dans l'usage du client).
+    """
+    
+    def __init__(self, percentile: float = 0.95, max_extra_requests: float = 0.1,
+                 min_samples: int = 20, window: int = 500, max_workers: int = 32):
+        self.percentile = percentile
+        self.max_extra_requests = max_extra_requests
+        self.min_samples = min_samples
+        # Latences des tentatives primaires (y compris celles doublées):
+        # ce qu'aurait été la latence sans hedging
+        self.primary_latencies: deque = deque(maxlen=window)
+        # Latences vues par l'appelant
+        self.served_latencies: deque = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bedrock-hedge")
+    
+    def delay(self) -> Optional[float]:
+        """Délai avant doublon, None si pas assez d'observations"""
+        with self._lock:
+            if len(self.primary_latencies) < self.min_samples:
+                return None
+            return percentile(sorted(self.primary_latencies), self.percentile)
+    
+    def call(self, primary: Callable[[], Any], backup: Callable[[], Any]) -> Any:
+        """Exécute primary; si trop lent, lance backup et retourne le premier succès.
+
+        Si les deux échouent, l'exception de primary est levée.
+        """
+        start = time.monotonic()
+        delay = self.delay()
+        first = self._executor.submit(self._timed, primary, True)
+        
+        done, _ = wait([first], timeout=delay)
+        if done or not self._allow_hedge():
+            return self._served(start, first.result())
+        
+        second = self._executor.submit(self._timed, backup, False)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is second:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return self._served(start, future.result())
+        return self._served(start, first.result())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Taux de doublons et latences avec / sans hedging"""
+        with self._lock:
+            primary = sorted(self.primary_latencies)
+            served = sorted(self.served_latencies)
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else 0.0,
+                "p50": round(percentile(served, 0.5), 3),
+                "p99": round(percentile(served, 0.99), 3),
+                "unhedged_p99": round(percentile(primary, 0.99), 3)
+            }
+    
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_extra_requests * (self.requests + 1):
+                return False
+            self.hedged += 1
+            return True
+    
+    def _timed(self, call: Callable[[], Any], primary: bool) -> Any:
+        start = time.monotonic()
+        result = call()
+        if primary:
+            with self._lock:
+                self.primary_latencies.append(time.monotonic() - start)
+        return result
+    
+    def _served(self, start: float, result: Any) -> Any:
+        with self._lock:
+            self.requests += 1
+            self.served_latencies.append(time.monotonic() - start)
+        return result
+
+
+def main():
+    """Test: latences simulées avec 3% de requêtes très lentes"""
+    import random
+    
+    random.seed(1)
+    
+    def slow_call():
+        time.sleep(2.0 if random.random() < 0.03 else random.uniform(0.05, 0.1))
+        return "ok"
+    
+    hedger = Hedger()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: hedger.call(slow_call, slow_call), range(1000)))
+    print(f"stats: {hedger.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+JSON Extractor - Extraction tolérante du JSON dans les réponses des modèles
+"""
+
+import json
+import re
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+
+FENCE_OPEN_PATTERN = re.compile(r"```[a-zA-Z0-9_-]*[ \t]*\n")
+TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+
+
+def extract_json(content: str) -> Dict[str, Any]:
+    """Extrait le JSON d'une réponse, même bruitée ou tronquée"""
+    if not content:
+        return {"error": "No JSON found in response", "raw_content": content}
+    
+    # Les blocs ```json``` sont prioritaires, puis le texte brut; un résultat
+    # qui ne tient que par la récupération d'un objet tronqué n'est gardé
+    # que si aucun candidat ne se parse entièrement
+    fallback = None
+    for candidate in _iter_candidates(content):
+        result = _extract_from_text(candidate)
+        if result is None:
+            continue
+        if not result.get("truncated"):
+            return result
+        fallback = fallback or result
+    
+    if fallback is not None:
+        return fallback
+    
+    return {
+        "error": "No JSON found in response",
+        "raw_content": content
+    }
+
+
+def _iter_candidates(content: str) -> Iterator[str]:
+    """Retourne les zones de texte à examiner, par ordre de priorité"""
+    fenced = list(_fenced_blocks(content))
+    if fenced:
+        yield "\n".join(fenced)
+    yield content
+
+
+def _fenced_blocks(content: str) -> Iterator[str]:
+    """Contenu des blocs ```...```; un ``` dans une chaîne JSON ne ferme pas le bloc"""
+    position = 0
+    while True:
+        match = FENCE_OPEN_PATTERN.search(content, position)
+        if match is None:
+            return
+        start = match.end()
+        end = _fence_end(content, start)
+        yield content[start:end]
+        position = end + 3
+        if position >= len(content):
+            return
+
+
+def _fence_end(content: str, start: int) -> int:
+    """Position du ``` fermant hors chaîne JSON, ou fin du texte (bloc tronqué)"""
+    in_string = False
+    escaped = False
+    for i in range(start, len(content)):
+        char = content[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif content.startswith("```", i):
+            return i
+    return len(content)
+
+
+def _extract_from_text(text: str) -> Optional[Dict[str, Any]]:
+    """Parse tous les objets JSON de premier niveau et les fusionne"""
+    objects = []
+    truncated_start = None
+    
+    for start, end in _scan_objects(text):
+        if end is None:
+            truncated_start = start
+            break
+        parsed = _loads(text[start:end])
+        if isinstance(parsed, dict):
+            objects.append(parsed)
+    
+    if truncated_start is not None:
+        recovered = _recover_truncated(text[truncated_start:])
+        if recovered is not None:
+            objects.append(recovered)
+    
+    if not objects:
+        return None
+    
+    return _merge_objects(objects)
+
+
+def _scan_objects(text: str) -> Iterator[Tuple[int, Optional[int]]]:
+    """Repère les objets {...} équilibrés en ignorant les accolades dans les chaînes.
+
+    Retourne (début, fin) pour chaque objet; fin vaut None si l'objet n'est
+    jamais refermé (réponse tronquée).
+    """
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+    
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"' and depth > 0:
+            in_string = True
+        elif char == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+    
+    if depth > 0:
+        yield start, None
+
+
+def _loads(text: str) -> Any:
+    """json.loads avec réparation des virgules finales"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_strip_trailing_commas(text))
+    except json.JSONDecodeError:
+        return None
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Supprime les virgules avant } ou ] hors des chaînes"""
+    parts = []
+    last = 0
+    for start, end in _string_spans(text):
+        parts.append(TRAILING_COMMA_PATTERN.sub(r"\1", text[last:start]))
+        parts.append(text[start:end])
+        last = end
+    parts.append(TRAILING_COMMA_PATTERN.sub(r"\1", text[last:]))
+    return "".join(parts)
+
+
+def _string_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """Positions des littéraux de chaîne JSON"""
+    i = 0
+    length = len(text)
+    while i < length:
+        if text[i] == '"':
+            start = i
+            i += 1
+            while i < length and text[i] != '"':
+                i += 2 if text[i] == "\\" else 1
+            i += 1
+            yield start, min(i, length)
+        else:
+            i += 1
+
+
+def _recover_truncated(text: str) -> Optional[Dict[str, Any]]:
+    """Récupère chaque issue complète d'un objet tronqué"""
+    match = re.search(r'"issues"\s*:\s*\[', text)
+    if not match:
+        return None
+    
+    issues = _complete_array_items(text[match.end():])
+    recovered = {"issues": issues, "truncated": True}
+    
+    file_match = re.search(r'"file"\s*:\s*"((?:[^"\\]|\\.)*)"', text[:match.start()])
+    if file_match:
+        recovered["file"] = json.loads(f'"{file_match.group(1)}"')
+    
+    return recovered
+
+
+def _complete_array_items(text: str) -> List[Dict[str, Any]]:
+    """Parse les objets complets d'un tableau JSON, s'arrête au premier incomplet"""
+    items = []
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+    
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            if depth == 0 and char == "{":
+                start = i
+            depth += 1
+        elif char in "}]":
+            if depth == 0:
+                # Fin du tableau "issues"
+                break
+            depth -= 1
+            if depth == 0 and char == "}":
+                parsed = _loads(text[start:i + 1])
+                if isinstance(parsed, dict):
+                    items.append(parsed)
+    
+    return items
+
+
+def _merge_objects(objects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fusionne plusieurs objets JSON; les issues sont concaténées"""
+    with_issues = [obj for obj in objects if isinstance(obj.get("issues"), list)]
+    if not with_issues:
+        return objects[0]
+    
+    merged = dict(with_issues[0])
+    merged["issues"] = []
+    for obj in with_issues:
+        merged["issues"].extend(i for i in obj["issues"] if isinstance(i, dict))
+        if obj.get("truncated"):
+            merged["truncated"] = True
+    return merged
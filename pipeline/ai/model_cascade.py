@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Model Cascade - Premier passage sur un modèle rapide, escalade des fichiers à risque
+"""
+
+import threading
+import time
+from typing import Dict, List, Any, Optional
+from .bedrock_client import ISSUES_SCHEMA
+
+
+class Tier:
+    """Un niveau de la cascade: client Bedrock (ou pool), prix et statistiques"""
+    
+    def __init__(self, client: Any, input_price: float = 0.0, output_price: float = 0.0):
+        self.client = client
+        self.name = client.model_id
+        # USD pour 1000 tokens
+        self.input_price = input_price
+        self.output_price = output_price
+        self.calls = 0
+        self.escalations = 0
+        self.total_latency = 0.0
+    
+    def stats(self) -> Dict[str, Any]:
+        usage = self.client.get_usage()
+        cost = (usage["input_tokens"] + usage.get("cache_write_tokens", 0)) / 1000 * self.input_price \
+            + usage["output_tokens"] / 1000 * self.output_price
+        return {
+            "tier": self.name,
+            "calls": self.calls,
+            "escalated": self.escalations,
+            "escalation_rate": round(self.escalations / self.calls, 3) if self.calls else 0.0,
+            "avg_latency": round(self.total_latency / self.calls, 3) if self.calls else 0.0,
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "cost": round(cost, 4)
+        }
+
+
+class ModelCascade:
+    """Analyse d'abord chaque fichier avec le modèle le moins cher.
+
+    La réponse passe au niveau suivant si elle est en erreur, si elle
+    contient une issue de sévérité escalate_severities, ou une issue (ou un
+    verdict de triage) de confiance inférieure à min_confidence. Sinon elle
+    est gardée: les fichiers sans problème notable ne coûtent qu'un appel au
+    petit modèle. Le niveau escaladé refait l'analyse complète et sa réponse
+    remplace la précédente.
+
+    Expose la même interface que BedrockClient pour les analyzers; le batch
+    inference (pas d'escalade possible) utilise le dernier niveau.
+    """
+    
+    def __init__(self, tiers: List[Tier], escalate_severities: Optional[List[str]] = None,
+                 min_confidence: float = 0.7):
+        if len(tiers) < 2:
+            raise ValueError("ModelCascade requires at least two tiers")
+        self.tiers = tiers
+        self.escalate_severities = set(escalate_severities or ["critical", "high"])
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+    
+    @property
+    def primary(self) -> Any:
+        """Modèle de référence: le plus capable"""
+        return self.tiers[-1].client
+    
+    @property
+    def model_id(self) -> str:
+        """Modèle réellement invocable (batch inference): celui du dernier niveau"""
+        return self.primary.model_id
+    
+    @property
+    def cache_id(self) -> str:
+        # Clé de cache distincte du mode à modèle unique
+        return " > ".join(tier.name for tier in self.tiers)
+    
+    @property
+    def region(self) -> str:
+        return self.primary.region
+    
+    def invoke(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        return self.primary.invoke(prompt, **kwargs)
+    
+    def invoke_json(self, prompt: str, schema: Optional[Dict[str, Any]] = ISSUES_SCHEMA,
+                    system: Optional[str] = None) -> Dict[str, Any]:
+        """Analyse niveau par niveau, tant que la réponse justifie une escalade"""
+        for position, tier in enumerate(self.tiers):
+            start = time.monotonic()
+            result = tier.client.invoke_json(prompt, schema=schema, system=system)
+            last = position == len(self.tiers) - 1
+            escalate = not last and self.should_escalate(result)
+            with self._lock:
+                tier.calls += 1
+                tier.total_latency += time.monotonic() - start
+                tier.escalations += int(escalate)
+            if not escalate:
+                return result
+        return result
+    
+    def should_escalate(self, result: Dict[str, Any]) -> bool:
+        """Réponse en erreur, risquée ou incertaine"""
+        if "error" in result:
+            return True
+        for issue in result.get("issues", []):
+            if not isinstance(issue, dict):
+                continue
+            # Format détaillé ou compact (compact_responses)
+            if issue.get("severity", issue.get("s")) in self.escalate_severities:
+                return True
+            confidence = issue.get("confidence", issue.get("c", 1.0))
+            if isinstance(confidence, (int, float)) and confidence < self.min_confidence:
+                return True
+        # Verdicts de triage: ["F1", "confirm", 0.9] ou {"id", "verdict", "confidence"}
+        for verdict in result.get("triage", []) or []:
+            confidence = verdict[2] if isinstance(verdict, list) and len(verdict) > 2 else \
+                verdict.get("confidence", 1.0) if isinstance(verdict, dict) else 1.0
+            if isinstance(confidence, (int, float)) and confidence < self.min_confidence:
+                return True
+        return False
+    
+    def build_request_body(self, *args, **kwargs) -> Dict[str, Any]:
+        return self.primary.build_request_body(*args, **kwargs)
+    
+    def parse_response_json(self, response_body: Dict[str, Any]) -> Dict[str, Any]:
+        return self.primary.parse_response_json(response_body)
+    
+    def extract_json(self, content: str) -> Dict[str, Any]:
+        return self.primary.extract_json(content)
+    
+    def get_usage(self) -> Dict[str, int]:
+        """Consommation cumulée de tous les niveaux"""
+        total = {}
+        for tier in self.tiers:
+            for key, value in tier.client.get_usage().items():
+                total[key] = total.get(key, 0) + value
+        return total
+    
+    def get_endpoint_stats(self) -> List[Dict[str, Any]]:
+        """Santé des endpoints du modèle principal, s'il s'agit d'un pool"""
+        if hasattr(self.primary, "get_endpoint_stats"):
+            return self.primary.get_endpoint_stats()
+        return []
+    
+    def get_hedge_stats(self) -> List[Dict[str, Any]]:
+        return [stats for tier in self.tiers for stats in tier.client.get_hedge_stats()]
+    
+    def get_tier_stats(self) -> List[Dict[str, Any]]:
+        """Appels, latence moyenne, taux d'escalade et coût par niveau"""
+        with self._lock:
+            return [tier.stats() for tier in self.tiers]
+
+
+def main():
+    """Test de la politique d'escalade"""
+    class StaticClient:
+        def __init__(self, model_id: str, response: Dict[str, Any]):
+            self.model_id = model_id
+            self.region = "us-east-1"
+            self.response = response
+        
+        def invoke_json(self, prompt: str, schema=None, system=None) -> Dict[str, Any]:
+            return self.response
+        
+        def get_usage(self) -> Dict[str, int]:
+            return {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+    
+    cascade = ModelCascade([
+        Tier(StaticClient("small", {"issues": [{"severity": "low", "confidence": 0.9}]})),
+        Tier(StaticClient("large", {"issues": []}))
+    ])
+    print(f"low, confident: escalate={cascade.should_escalate({'issues': [{'severity': 'low', 'confidence': 0.9}]})}")
+    print(f"high: escalate={cascade.should_escalate({'issues': [{'severity': 'high', 'confidence': 0.9}]})}")
+    print(f"uncertain: escalate={cascade.should_escalate({'issues': [{'severity': 'medium', 'confidence': 0.4}]})}")
+    print(f"result: {cascade.invoke_json('prompt')}")
+    print(f"stats: {cascade.get_tier_stats()}")
+
+
+if __name__ == "__main__":
+    main()
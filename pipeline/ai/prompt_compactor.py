@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Prompt Compactor - Contenu des fichiers sans commentaires ni blancs, lignes numérotées
+"""
+
+import bisect
+import io
+import re
+import tokenize
+from typing import Dict, List, Optional, Tuple
+
+
+# Commentaires gardés malgré la compaction: secrets, suppressions de checks, dette connue
+KEEP_COMMENT_PATTERN = re.compile(
+    r"(?i)(passw|secret|token|api[_-]?key|credential|private key|"
+    r"nosec|noqa|checkov:skip|tfsec:ignore|trivy:ignore|tflint-ignore|hadolint|todo|fixme|hack)"
+)
+HEREDOC_PATTERN = re.compile(r'<<[-~]?\s*["\']?([A-Za-z_]\w*)["\']?')
+QUOTED_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+DOCKER_DIRECTIVE_PATTERN = re.compile(r"^#\s*(syntax|escape|check)\s*=", re.I)
+
+# Syntaxe de commentaires par langage: (marqueurs de ligne, commentaires /* */)
+SYNTAXES = {
+    "hcl": (("#", "//"), True),
+    "c": (("//",), True),
+}
+EXTENSIONS = {
+    ".tf": "hcl", ".hcl": "hcl",
+    ".ts": "c", ".tsx": "c", ".js": "c", ".jsx": "c", ".go": "c",
+    ".py": "python",
+    ".yml": "yaml", ".yaml": "yaml"
+}
+# Début d'un bloc littéral YAML (clé: | ou clé: >-)
+YAML_BLOCK_PATTERN = re.compile(r":\s*[|>][-+0-9]*\s*\Z")
+# Découpage approché d'un tokenizer BPE: mots, nombres, blancs, ponctuation
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d+|\s+|[^\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Nombre de tokens estimé (BPE): une tranche de 4 lettres ou de 3 chiffres, un signe, un saut de ligne.
+
+    Un espace simple est fusionné avec le mot qui suit; les préfixes "N|" de
+    la compaction comptent donc pour leurs chiffres et leur barre.
+    """
+    count = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        if piece[0].isdigit():
+            count += (len(piece) + 2) // 3
+        elif piece[0].isspace():
+            newlines = piece.count("\n")
+            indent = len(piece.rsplit("\n", 1)[-1])
+            count += newlines + (indent + 3) // 4 if newlines else (0 if piece == " " else (len(piece) + 3) // 4)
+        elif piece[0].isalpha():
+            count += (len(piece) + 3) // 4
+        else:
+            count += 1
+    return count
+
+
+class CompactedContent:
+    """Texte compacté (une ligne "N|code" par ligne gardée) et correspondance des lignes"""
+    
+    def __init__(self, lines: List[Tuple[int, str]], original_chars: int, original_tokens: int = 0):
+        self.lines = [number for number, _ in lines]
+        self.text = "\n".join(f"{number}|{text}" for number, text in lines)
+        self.original_chars = original_chars
+        self.original_tokens = original_tokens
+        self._tagged = set(self.lines)
+    
+    @property
+    def compact_tokens(self) -> int:
+        """Tokens estimés du texte envoyé, préfixes "N|" compris"""
+        return estimate_tokens(self.text)
+    
+    def original_line(self, line: object) -> int:
+        """Ligne rendue par le modèle -> ligne du fichier d'origine (0 si inconnue).
+
+        Le modèle reprend normalement le numéro de la ligne ("N|"); s'il a
+        compté les lignes du texte compacté, la position est retraduite.
+        """
+        if not isinstance(line, int) or line <= 0 or not self.lines:
+            return 0
+        if line in self._tagged:
+            return line
+        if line <= len(self.lines):
+            return self.lines[line - 1]
+        # Au-delà: la ligne gardée qui précède
+        return self.lines[max(0, bisect.bisect_right(self.lines, line) - 1)]
+
+
+def compact(content: str, syntax: Optional[str], first_line: int = 1) -> CompactedContent:
+    """Compacte un fichier (ou un extrait commençant à first_line) selon sa syntaxe.
+
+    hcl, c (TS/JS/Go), dockerfile, python, yaml (indentation gardée);
+    toute autre valeur ne retire que les lignes vides et les blancs en fin
+    de ligne. Les heredocs et chaînes multi-lignes sont gardés tels quels.
+    """
+    raw = content.split("\n")
+    if syntax == "python":
+        lines = _compact_python(raw)
+    elif syntax == "dockerfile":
+        lines = _compact_dockerfile(raw)
+    elif syntax == "yaml":
+        lines = _compact_yaml(raw)
+    elif syntax in SYNTAXES:
+        line_markers, block_comments = SYNTAXES[syntax]
+        lines = _compact_c_like(raw, line_markers, block_comments, template_quote="`" if syntax == "c" else None)
+    else:
+        lines = [(n, line.rstrip()) for n, line in enumerate(raw, 1)]
+    
+    offset = first_line - 1
+    return CompactedContent([(n + offset, text) for n, text in lines if text.strip()], len(content), estimate_tokens(content))
+
+
+def syntax_for(file_path: str) -> Optional[str]:
+    """Syntaxe de compaction d'après l'extension"""
+    for extension, syntax in EXTENSIONS.items():
+        if file_path.endswith(extension):
+            return syntax
+    return None
+
+
+def _keep_comment(comment: str) -> bool:
+    return bool(KEEP_COMMENT_PATTERN.search(comment))
+
+
+def _trailing_comment(line: str, markers: Tuple[str, ...], regex_literals: bool) -> int:
+    """Position d'un commentaire en fin de ligne, -1 si absent ou ambigu.
+
+    Prudent: un marqueur dans une chaîne n'est pas un commentaire, et rien
+    n'est coupé après une interpolation, un template literal ou une regex.
+    """
+    positions = sorted(m.start() for marker in markers for m in re.finditer(" " + re.escape(marker), line))
+    for position in positions:
+        prefix = line[:position]
+        if "${" in prefix or "%{" in prefix or "`" in prefix:
+            return -1
+        # Hors chaînes complètes: plus de guillemet ouvert ni de regex
+        code = QUOTED_PATTERN.sub("", prefix)
+        if regex_literals and "/" in code:
+            return -1
+        if '"' not in code and "'" not in code:
+            return position
+    return -1
+
+
+def _compact_c_like(raw: List[str], markers: Tuple[str, ...], block_comments: bool,
+                    template_quote: Optional[str] = None) -> List[Tuple[int, str]]:
+    """HCL et langages à accolades: commentaires, indentation et lignes vides"""
+    lines = []
+    in_block = False
+    heredoc = None
+    in_template = False
+    
+    for number, line in enumerate(raw, 1):
+        stripped = line.strip()
+        
+        # Contenu littéral: heredoc HCL, template literal multi-ligne
+        if heredoc is not None:
+            lines.append((number, line.rstrip()))
+            if stripped == heredoc:
+                heredoc = None
+            continue
+        if in_template:
+            lines.append((number, line.rstrip()))
+            if line.count(template_quote) % 2:
+                in_template = False
+            continue
+        
+        if in_block:
+            end = stripped.find("*/")
+            if end < 0:
+                if _keep_comment(stripped):
+                    lines.append((number, stripped))
+                continue
+            in_block = False
+            stripped = stripped[end + 2:].strip()
+        
+        if block_comments and stripped.startswith("/*"):
+            end = stripped.find("*/", 2)
+            if end < 0:
+                in_block = True
+                if _keep_comment(stripped):
+                    lines.append((number, stripped))
+                continue
+            comment, stripped = stripped[:end + 2], stripped[end + 2:].strip()
+            if not stripped and _keep_comment(comment):
+                stripped = comment
+        
+        if stripped.startswith(markers):
+            if _keep_comment(stripped):
+                lines.append((number, stripped))
+            continue
+        
+        cut = _trailing_comment(stripped, markers, regex_literals=template_quote is not None)
+        if cut >= 0 and not _keep_comment(stripped[cut:]):
+            stripped = stripped[:cut].rstrip()
+        
+        lines.append((number, stripped))
+        
+        match = HEREDOC_PATTERN.search(stripped)
+        if match and template_quote is None:
+            heredoc = match.group(1)
+        elif template_quote and stripped.count(template_quote) % 2:
+            in_template = True
+    
+    return lines
+
+
+def _compact_dockerfile(raw: List[str]) -> List[Tuple[int, str]]:
+    """Dockerfile: commentaires de ligne (sauf directives du parser) et indentation"""
+    lines = []
+    heredoc = None
+    instructions_started = False
+    
+    for number, line in enumerate(raw, 1):
+        stripped = line.strip()
+        if heredoc is not None:
+            lines.append((number, line.rstrip()))
+            if stripped == heredoc:
+                heredoc = None
+            continue
+        
+        if stripped.startswith("#"):
+            if (not instructions_started and DOCKER_DIRECTIVE_PATTERN.match(stripped)) or _keep_comment(stripped):
+                lines.append((number, stripped))
+            continue
+        
+        if stripped:
+            instructions_started = True
+        lines.append((number, stripped))
+        match = HEREDOC_PATTERN.search(stripped)
+        if match:
+            heredoc = match.group(1)
+    
+    return lines
+
+
+def _compact_yaml(raw: List[str]) -> List[Tuple[int, str]]:
+    """YAML (compose): commentaires et lignes vides; l'indentation et les blocs littéraux sont gardés"""
+    lines = []
+    block_indent = None
+    
+    for number, line in enumerate(raw, 1):
+        indent = len(line) - len(line.lstrip())
+        if block_indent is not None:
+            if not line.strip() or indent > block_indent:
+                lines.append((number, line.rstrip()))
+                continue
+            block_indent = None
+        
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            if _keep_comment(stripped):
+                lines.append((number, line.rstrip()))
+            continue
+        
+        cut = _trailing_comment(stripped, ("#",), regex_literals=False)
+        if cut >= 0 and not _keep_comment(stripped[cut:]):
+            stripped = stripped[:cut].rstrip()
+        lines.append((number, " " * indent + stripped))
+        if YAML_BLOCK_PATTERN.search(stripped):
+            block_indent = indent
+    
+    return lines
+
+
+def _compact_python(raw: List[str]) -> List[Tuple[int, str]]:
+    """Python: commentaires (via tokenize), lignes vides; indentation réduite à un espace par niveau"""
+    comments: Dict[int, int] = {}
+    literal = set()
+    try:
+        for token in tokenize.generate_tokens(io.StringIO("\n".join(raw)).readline):
+            if token.type == tokenize.COMMENT and not _keep_comment(token.string):
+                comments[token.start[0]] = token.start[1]
+            elif token.type == tokenize.STRING and token.end[0] > token.start[0]:
+                # Lignes intérieures d'une chaîne multi-ligne: contenu littéral
+                literal.update(range(token.start[0] + 1, token.end[0] + 1))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return [(n, line.rstrip()) for n, line in enumerate(raw, 1)]
+    
+    code = []
+    for number, line in enumerate(raw, 1):
+        if number in literal:
+            code.append((number, line.rstrip(), None))
+            continue
+        if number in comments:
+            line = line[:comments[number]]
+        text = line.rstrip()
+        if text.strip():
+            code.append((number, text.strip(), len(text) - len(text.lstrip())))
+    
+    widths = [width for _, _, width in code if width]
+    unit = min(widths) if widths else 1
+    return [(number, text if width is None else " " * (width // unit) + text) for number, text, width in code]
+
+
+def main():
+    """Test: compaction des fichiers passés en argument"""
+    import sys
+    
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        syntax = "dockerfile" if path.endswith("Dockerfile") else syntax_for(path)
+        compacted = compact(content, syntax)
+        print(f"{path} ({syntax}): {compacted.original_chars} -> {len(compacted.text)} chars, "
+              f"{content.count(chr(10)) + 1} -> {len(compacted.lines)} lines")
+
+
+if __name__ == "__main__":
+    main()
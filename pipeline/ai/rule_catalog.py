@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Rule Catalog - Codes courts des catégories IA et leur texte, développé en local
+"""
+
+from typing import Dict, List, Any
+
+
+SEVERITIES = ("critical", "high", "medium", "low")
+OTHER_CODE = "OTHER"
+
+# Ajouté au prompt statique avec compact_responses, à la place du format détaillé
+COMPACT_FORMAT = """Réponds UNIQUEMENT en JSON compact, un objet par problème:
+{"issues": [{"r": "<code>", "l": <ligne ou 0>, "s": "critical|high|medium|low", "c": 0.0-1.0}]}
+- "r": code de la catégorie (entre crochets ci-dessus); "OTHER" pour un autre problème, avec un titre court dans "t".
+- "d": une phrase de détail, seulement pour critical, high et OTHER.
+- "o": ressource concernée, si applicable.
+Pas de description ni de recommandation pour le reste: elles sont ajoutées localement d'après le code."""
+
+
+class CatalogEntry:
+    """Texte d'une catégorie: titre, description et recommandation génériques"""
+    
+    def __init__(self, code: str, title: str, description: str, recommendation: str):
+        self.code = code
+        self.title = title
+        self.description = description
+        self.recommendation = recommendation
+
+
+# Une entrée par catégorie de l'analyzer, dans l'ordre de ses `categories`
+CATALOGS: Dict[str, List[CatalogEntry]] = {
+    "ai_terraform": [
+        CatalogEntry("IAM_WILDCARD", "Policy IAM trop permissive",
+                     "La policy accorde des actions ou des ressources en wildcard (*), bien au-delà du besoin.",
+                     'Lister les actions et les ARN nécessaires (ex: Action = ["s3:GetObject"], Resource = aws_s3_bucket.app.arn).'),
+        CatalogEntry("SG_OPEN", "Security Group ouvert",
+                     "Le Security Group autorise 0.0.0.0/0 ou une plage de ports trop large.",
+                     'Restreindre cidr_blocks et from_port/to_port au strict nécessaire (ex: cidr_blocks = ["10.0.0.0/16"]).'),
+        CatalogEntry("NO_ENCRYPTION", "Ressource sans chiffrement",
+                     "Les données de la ressource ne sont pas chiffrées au repos ou en transit.",
+                     "Activer le chiffrement (ex: storage_encrypted = true, kms_key_id = aws_kms_key.main.arn)."),
+        CatalogEntry("HARDCODED_SECRET", "Secret hardcodé",
+                     "Un mot de passe, une clé ou un token est écrit en clair dans le code Terraform.",
+                     "Lire le secret depuis Secrets Manager ou SSM (data \"aws_secretsmanager_secret_version\") ou une variable sensitive."),
+        CatalogEntry("PUBLIC_RESOURCE", "Ressource publique",
+                     "La ressource est exposée publiquement sans que ce soit nécessaire.",
+                     "Désactiver l'accès public (ex: publicly_accessible = false, block_public_acls = true)."),
+        CatalogEntry("NO_TAGS", "Absence de tags",
+                     "La ressource n'a pas de tags, ce qui complique le suivi des coûts et la gouvernance.",
+                     "Ajouter des tags (ex: tags = { Environment = var.environment }) ou default_tags sur le provider."),
+        CatalogEntry("NO_LOGGING", "Absence de logging / monitoring",
+                     "Les logs ou le monitoring de la ressource ne sont pas activés.",
+                     "Activer les logs (CloudWatch, access logs, CloudTrail) et leur rétention."),
+        CatalogEntry("INSECURE_CONFIG", "Configuration non sécurisée",
+                     "La configuration affaiblit la sécurité (HTTP au lieu de HTTPS, versioning désactivé...).",
+                     "Forcer HTTPS/TLS et activer le versioning ou la protection adaptée à la ressource."),
+        CatalogEntry("VAR_NOT_SENSITIVE", "Variable sensible sans sensitive = true",
+                     "La variable contient une valeur sensible qui peut apparaître dans les plans et les logs.",
+                     "Ajouter sensitive = true et ne pas donner de valeur par défaut."),
+        CatalogEntry("OUTPUT_NOT_SENSITIVE", "Output sensible sans sensitive = true",
+                     "L'output expose une valeur sensible dans les sorties de terraform apply.",
+                     "Ajouter sensitive = true à l'output, ou supprimer l'output.")
+    ],
+    "ai_docker": [
+        CatalogEntry("UNPINNED_IMAGE", "Image de base sans version spécifique",
+                     "L'image de base utilise latest ou un tag flottant: les builds ne sont pas reproductibles.",
+                     "Utiliser un tag précis, idéalement avec digest (ex: FROM node:20.11-alpine@sha256:...)."),
+        CatalogEntry("NO_MULTISTAGE", "Absence de multi-stage build",
+                     "Les outils de build restent dans l'image finale, plus lourde et plus exposée.",
+                     "Séparer build et runtime (FROM node:20 AS build ... FROM node:20-alpine + COPY --from=build)."),
+        CatalogEntry("ROOT_USER", "Container exécuté en root",
+                     "Aucun USER non-root n'est défini: le processus tourne en root dans le container.",
+                     "Créer et utiliser un utilisateur non-root (ex: USER node) dans le stage final."),
+        CatalogEntry("IMAGE_SECRET", "Secret dans l'image",
+                     "Un secret est copié ou défini dans l'image et reste lisible dans ses layers.",
+                     "Passer les secrets au runtime ou via RUN --mount=type=secret."),
+        CatalogEntry("UNNEEDED_PACKAGES", "Packages inutiles ou vulnérables",
+                     "Des packages non nécessaires au runtime augmentent la surface d'attaque.",
+                     "Installer uniquement le nécessaire (--no-install-recommends) et nettoyer les caches."),
+        CatalogEntry("NO_HEALTHCHECK", "Absence de HEALTHCHECK",
+                     "L'orchestrateur ne peut pas détecter un container bloqué.",
+                     "Ajouter un HEALTHCHECK (ex: HEALTHCHECK CMD wget -qO- http://localhost:3000/ || exit 1)."),
+        CatalogEntry("TOO_MANY_LAYERS", "Trop de layers",
+                     "Des instructions RUN successives créent des layers inutiles.",
+                     "Regrouper les commandes liées dans un seul RUN avec &&."),
+        CatalogEntry("SENSITIVE_ENV", "Variable d'environnement sensible en clair",
+                     "Une valeur sensible est définie en clair dans ENV ou ARG.",
+                     "Fournir la valeur au déploiement (secrets manager, variables du runtime)."),
+        CatalogEntry("COPY_ALL", "COPY . . sans .dockerignore",
+                     "Tout le contexte de build est copié, y compris .git, .env ou node_modules.",
+                     "Ajouter un .dockerignore ou copier uniquement les fichiers nécessaires."),
+        CatalogEntry("NPM_INSTALL", "npm install au lieu de npm ci",
+                     "npm install peut résoudre d'autres versions que celles du lockfile.",
+                     "Utiliser npm ci (ex: RUN npm ci --omit=dev)."),
+        CatalogEntry("UNPINNED_DEPS", "Dépendances sans version fixée",
+                     "Les packages installés n'ont pas de version fixée: les builds ne sont pas reproductibles.",
+                     "Fixer les versions (ex: apk add curl=8.5.0-r0) ou utiliser un lockfile.")
+    ],
+    "ai_compose": [
+        CatalogEntry("PRIVILEGED", "Container privilégié",
+                     "Le service tourne avec privileged: true ou des capabilities étendues (SYS_ADMIN, ALL).",
+                     "Retirer privileged et n'ajouter que les capabilities nécessaires (cap_drop: [ALL], cap_add: [NET_BIND_SERVICE])."),
+        CatalogEntry("HOST_MOUNT", "Répertoire sensible de l'hôte monté",
+                     "Le service monte le socket Docker ou un répertoire sensible de l'hôte (/, /etc, /var/run/docker.sock).",
+                     "Supprimer le montage ou le limiter à un volume nommé, en lecture seule (:ro) si nécessaire."),
+        CatalogEntry("HOST_NAMESPACE", "Namespace de l'hôte partagé",
+                     "network_mode, pid ou ipc: host retire l'isolation du container.",
+                     "Utiliser les réseaux et namespaces par défaut de compose."),
+        CatalogEntry("ENV_SECRET", "Secret en clair dans environment",
+                     "Un mot de passe, une clé ou un token est écrit en clair dans le fichier compose.",
+                     "Utiliser secrets: ou un env_file hors du dépôt (ex: POSTGRES_PASSWORD_FILE=/run/secrets/db_password)."),
+        CatalogEntry("EXPOSED_PORT", "Port publié sur toutes les interfaces",
+                     "Un port interne (base de données, administration) est publié sur 0.0.0.0.",
+                     'Ne pas publier le port, ou le limiter à la machine locale (ex: "127.0.0.1:5432:5432").'),
+        CatalogEntry("UNPINNED_IMAGE", "Image sans version spécifique",
+                     "L'image du service utilise latest ou aucun tag: les déploiements ne sont pas reproductibles.",
+                     "Utiliser un tag précis, idéalement avec digest (ex: image: postgres:16.2@sha256:...)."),
+        CatalogEntry("NO_LIMITS", "Absence de limites de ressources",
+                     "Le service n'a pas de limite mémoire ou CPU et peut épuiser l'hôte.",
+                     "Définir deploy.resources.limits (memory, cpus) ou mem_limit / cpus."),
+        CatalogEntry("NO_HARDENING", "Absence de durcissement",
+                     "Le service n'utilise ni read_only, ni no-new-privileges, ni cap_drop.",
+                     'Ajouter read_only: true, security_opt: ["no-new-privileges:true"] et cap_drop: [ALL].'),
+        CatalogEntry("NO_HEALTHCHECK", "Absence de healthcheck",
+                     "Compose ne peut pas détecter un service bloqué ni ordonner les démarrages (depends_on: service_healthy).",
+                     'Ajouter un healthcheck (ex: test: ["CMD", "wget", "-qO-", "http://localhost:3000/health"]).')
+    ],
+    "ai_code": [
+        CatalogEntry("HARDCODED_SECRET", "Secret hardcodé",
+                     "Une clé d'API, un mot de passe ou un token est écrit en clair dans le code.",
+                     "Lire le secret depuis l'environnement ou un secrets manager (ex: process.env.API_KEY)."),
+        CatalogEntry("INSECURE_HTTP", "Appel API non sécurisé",
+                     "Un appel réseau utilise HTTP en clair ou désactive la vérification TLS.",
+                     "Utiliser HTTPS et garder la vérification des certificats activée."),
+        CatalogEntry("NO_INPUT_VALIDATION", "Absence de validation des données",
+                     "Des données utilisateur sont utilisées sans validation.",
+                     "Valider les entrées avec un schéma (ex: zod, joi, pydantic) avant usage."),
+        CatalogEntry("DEBUG_LOGGING", "Logs de debug en production",
+                     "console.log ou print laissent fuiter des informations en production.",
+                     "Utiliser un logger configurable par niveau et retirer les logs de debug."),
+        CatalogEntry("WEAK_ERROR_HANDLING", "Gestion d'erreurs insuffisante",
+                     "Des erreurs sont ignorées (catch vide) ou remontées sans traitement.",
+                     "Traiter ou journaliser l'erreur, et renvoyer une réponse d'erreur maîtrisée."),
+        CatalogEntry("SENSITIVE_DATA_EXPOSED", "Données sensibles exposées",
+                     "Des données sensibles sont renvoyées, journalisées ou stockées sans protection.",
+                     "Filtrer les champs sensibles des réponses et des logs, chiffrer le stockage."),
+        CatalogEntry("INJECTION", "Injection potentielle",
+                     "Une entrée utilisateur arrive dans une requête SQL, du HTML ou une commande sans échappement.",
+                     "Utiliser des requêtes paramétrées, l'échappement du moteur de templates, et éviter le shell."),
+        CatalogEntry("OUTDATED_DEPENDENCY", "Dépendance obsolète ou vulnérable",
+                     "Une dépendance utilisée est obsolète ou connue pour être vulnérable.",
+                     "Mettre à jour la dépendance vers une version maintenue."),
+        CatalogEntry("MISSING_AUTH", "Authentification / autorisation manquante",
+                     "Un point d'entrée sensible est accessible sans contrôle d'accès.",
+                     "Ajouter un middleware d'authentification et vérifier les droits par ressource."),
+        CatalogEntry("CORS_MISCONFIG", "CORS mal configuré",
+                     "La politique CORS accepte toutes les origines ou les credentials de n'importe quelle origine.",
+                     "Limiter les origines autorisées à une liste explicite.")
+    ]
+}
+
+
+def expand_issue(entry: Any, catalog: Dict[str, CatalogEntry]) -> Any:
+    """Issue compacte {"r", "l", "s", "c", "d", "o", "t"} -> issue complète.
+
+    Une issue déjà au format détaillé (le modèle n'a pas suivi le format
+    compact) est gardée telle quelle.
+    """
+    if not isinstance(entry, dict) or "title" in entry:
+        return entry
+    
+    code = str(entry.get("r") or OTHER_CODE).upper()
+    known = catalog.get(code)
+    severity = entry.get("s", "medium")
+    issue = {
+        "line": entry.get("l", 0),
+        "severity": severity if severity in SEVERITIES else "medium",
+        "title": entry.get("t") or (known.title if known else code),
+        "description": entry.get("d") or (known.description if known else ""),
+        "confidence": entry.get("c", 1.0)
+    }
+    if known is not None:
+        issue["recommendation"] = known.recommendation
+    resource = entry.get("o") or entry.get("resource")
+    if resource:
+        issue["resource"] = resource
+    return issue
+
+
+def main():
+    """Test: développement d'une réponse compacte"""
+    import json
+    
+    catalog = {entry.code: entry for entry in CATALOGS["ai_terraform"]}
+    response = {"issues": [
+        {"r": "SG_OPEN", "l": 12, "s": "high", "c": 0.9, "d": "Port 22 ouvert à 0.0.0.0/0.", "o": "aws_security_group.web"},
+        {"r": "NO_TAGS", "l": 3, "s": "low", "c": 0.8},
+        {"r": "OTHER", "l": 40, "s": "medium", "c": 0.6, "t": "Nom de bucket prévisible", "d": "Le nom est déduit du projet."}
+    ]}
+    compact_size = len(json.dumps(response))
+    issues = [expand_issue(entry, catalog) for entry in response["issues"]]
+    print(f"compact: {compact_size} chars, expanded: {len(json.dumps({'issues': issues}))} chars")
+    print(json.dumps(issues, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
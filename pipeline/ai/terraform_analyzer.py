@@ -4,29 +4,85 @@ Terraform Analyzer - Analyse Terraform avec IA
 """
 
 import os
+import re
 import glob
-from typing import Dict, List, Any
+import hashlib
+from typing import Dict, List, Any, Optional
 from .bedrock_client import BedrockClient
+from .base_analyzer import BaseAnalyzer
+from .prompt_compactor import CompactedContent
+from rules.hcl_parser import HclBlock, parse_hcl, uncovered_lines
 
 
-class TerraformAnalyzer:
-    def __init__(self, bedrock_client: BedrockClient):
-        self.client = bedrock_client
+# Références Terraform vers d'autres blocs (var.x, aws_vpc.main, module.x...)
+REFERENCE_PATTERN = re.compile(r'\b(data\.[\w-]+\.[\w-]+|module\.[\w-]+|var\.[\w-]+|local\.[\w-]+|aws_[\w-]+\.[\w-]+)')
+
+
+class TerraformAnalyzer(BaseAnalyzer):
+    """Analyse Terraform par fichier, ou par bloc avec block_granular.
+
+    En mode bloc, chaque bloc de premier niveau (resource, data, module,
+    variable, output...) est hashé et ses issues sont mises en cache par
+    hash: seuls les blocs modifiés sont envoyés à Bedrock, accompagnés d'un
+    résumé des blocs qu'ils référencent.
+    """
+    
+    scanner_type = "ai_terraform"
+    language = "terraform"
+    syntax = "hcl"
+    categories = [
+        'Politiques IAM trop permissives (wildcards *, Action = "*", Resource = "*")',
+        "Security Groups ouverts (0.0.0.0/0, ports larges)",
+        "Ressources sans encryption (KMS, AES256)",
+        "Secrets hardcodés (passwords, keys, tokens)",
+        "Ressources publiques non nécessaires (publicly_accessible = true)",
+        "Absence de tags",
+        "Absence de logging/monitoring (CloudWatch, CloudTrail)",
+        "Configurations non sécurisées (HTTP au lieu de HTTPS, pas de versioning)",
+        "Variables sensibles sans sensitive = true",
+        "Outputs de données sensibles sans sensitive = true"
+    ]
+    # Format de réponse détaillé (sans compact_responses)
+    response_format = """Réponds UNIQUEMENT en JSON avec cette structure exacte:
+{
+  "file": "<chemin du fichier>",
+  "issues": [
+    {
+      "line": <numéro de ligne ou 0 si inconnu>,
+      "severity": "critical|high|medium|low",
+      "title": "Titre court et précis",
+      "description": "Description détaillée du problème",
+      "recommendation": "Comment corriger avec exemple de code",
+      "confidence": 0.0-1.0,
+      "resource": "nom de la ressource concernée"
+    }
+  ]
+}"""
+    # Nombre maximum de blocs référencés résumés dans le prompt
+    max_context_blocks = 15
+    
+    def __init__(self, bedrock_client: BedrockClient, max_workers: int = 1,
+                 snapshot: Optional[Any] = None, cache: Optional[Any] = None,
+                 rule_engine: Optional[Any] = None, similarity: Optional[Any] = None,
+                 block_granular: bool = False, compact_prompts: bool = False, compact_responses: bool = False):
+        super().__init__(bedrock_client, max_workers, snapshot, cache, rule_engine, similarity,
+                         compact_prompts, compact_responses)
+        self.block_granular = block_granular
+        self._block_summaries: Dict[str, str] = {}
     
     def analyze_directory(self, terraform_dir: str = "terraform") -> Dict[str, Any]:
         """Analyse tous les fichiers Terraform d'un répertoire"""
-        if not os.path.exists(terraform_dir):
+        if not self.source_exists(terraform_dir):
             return {"error": f"Directory not found: {terraform_dir}"}
         
-        tf_files = glob.glob(f"{terraform_dir}/**/*.tf", recursive=True)
+        tf_files = self.collect_files(terraform_dir)
         
         if not tf_files:
             return {"error": "No Terraform files found"}
         
         all_issues = []
         
-        for tf_file in tf_files:
-            result = self.analyze_file(tf_file)
+        for result in self.analyze_units(tf_files):
             if "issues" in result:
                 all_issues.extend(result["issues"])
         
@@ -35,83 +91,237 @@ class TerraformAnalyzer:
             "source": terraform_dir,
             "files_analyzed": len(tf_files),
             "issues": all_issues,
-            "summary": {
-                "total": len(all_issues),
-                "critical": len([i for i in all_issues if i["severity"] == "critical"]),
-                "high": len([i for i in all_issues if i["severity"] == "high"]),
-                "medium": len([i for i in all_issues if i["severity"] == "medium"])
-            }
+            "summary": self._summarize(all_issues)
         }
     
-    def analyze_file(self, file_path: str) -> Dict[str, Any]:
-        """Analyse un fichier Terraform avec l'IA"""
-        try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-            
-            prompt = self._build_prompt(file_path, content)
-            response = self.client.invoke(prompt)
-            
-            if not response["success"]:
-                return {"error": response["error"], "file": file_path}
-            
-            json_data = self.client.extract_json(response["content"])
-            
+    def analyze_units(self, file_paths: List[str], stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Analyse des fichiers; en mode bloc, avec le résumé de tous leurs blocs pour le contexte"""
+        if self.block_granular:
+            self._index_blocks(file_paths)
+        return self.analyze_files(file_paths)
+    
+    def collect_files(self, terraform_dir: str) -> List[str]:
+        """Liste les fichiers Terraform d'un répertoire"""
+        if self.snapshot is not None:
+            return [e.path for e in self.snapshot.glob(f"{terraform_dir}/**/*.tf")]
+        return glob.glob(f"{terraform_dir}/**/*.tf", recursive=True)
+    
+    def analyze_content(self, file_path: str, content: str) -> Dict[str, Any]:
+        """Analyse un fichier, bloc par bloc en mode block_granular"""
+        if not self.block_granular:
+            return super().analyze_content(file_path, content)
+        
+        if self.skip_content(content):
+            return {"issues": []}
+        
+        blocks = parse_hcl(content)
+        if uncovered_lines(content, blocks):
+            # Du code hors des blocs reconnus ne serait jamais envoyé: fichier entier
+            return super().analyze_content(file_path, content)
+        if self.rule_engine is not None:
+            blocks = [b for b in blocks if not self.rule_engine.is_fully_covered(b.text, self.language)]
+        
+        issues = []
+        changed = []
+        block_findings = {id(block): self._findings_for(file_path, [(block.start_line, block.end_line)]) for block in blocks}
+        for block in blocks:
+            cached = self._get_block_cache(file_path, block, block_findings[id(block)])
+            if cached is None:
+                changed.append(block)
+            else:
+                issues.extend(self._from_block_cache(block, cached))
+                self._restore_verdicts(block_findings[id(block)], cached.get("triage", []), block.start_line)
+        
+        if changed:
+            findings = [f for block in changed for f in block_findings[id(block)]]
+            prompt, compacted = self._build_blocks_prompt(file_path, changed, blocks)
+            rules = self._rules_prompt(file_path, content, [(block.start_line, block.end_line) for block in changed])
+            if rules:
+                prompt += "\n\n" + rules
+            if findings:
+                prompt += "\n\n" + self._findings_prompt(findings)
+            json_data = self._invoke(prompt)
             if "error" in json_data:
+                json_data["file"] = file_path
                 return json_data
+            if findings:
+                self._apply_triage(json_data, findings)
             
-            # Ajouter le fichier à chaque issue
-            if "issues" in json_data:
-                for issue in json_data["issues"]:
-                    issue["file"] = file_path
-                    issue["type"] = "ai_terraform"
-            
-            return json_data
+            per_block = {id(block): [] for block in changed}
+            for issue in json_data.get("issues", []):
+                per_block[id(self._owner_block(issue, changed, compacted))].append(issue)
             
-        except Exception as e:
-            return {"error": str(e), "file": file_path}
+            for block in changed:
+                block_issues = per_block[id(block)]
+                for issue in block_issues:
+                    if not issue.get("resource"):
+                        issue["resource"] = block.address
+                self._set_block_cache(file_path, block, block_issues, block_findings[id(block)])
+                issues.extend(block_issues)
+        
+        self._annotate(issues, file_path)
+        issues.sort(key=lambda i: i.get("line") or 0)
+        result = {"file": file_path, "issues": issues, "blocks": len(blocks), "blocks_analyzed": len(changed)}
+        # Verdicts de tous les blocs, pour le cache par fichier
+        verdicts = self._verdicts([f for block in blocks for f in block_findings[id(block)]])
+        if verdicts:
+            result["triage"] = verdicts
+        return result
     
-    def _build_prompt(self, file_path: str, content: str) -> str:
-        """Construit le prompt pour l'analyse Terraform"""
-        return f"""Tu es un expert DevOps et sécurité AWS. Analyse ce fichier Terraform et détecte TOUTES les mauvaises pratiques de sécurité et DevOps.
-
-Fichier: {file_path}
+    def _index_blocks(self, tf_files: List[str]):
+        """Résumés de tous les blocs du répertoire, pour le contexte des prompts"""
+        summaries = {}
+        for file_path in tf_files:
+            try:
+                content = self.read_file(file_path)
+            except (OSError, UnicodeDecodeError):
+                continue
+            summaries.update(self._summaries(parse_hcl(content)))
+        self._block_summaries = summaries
+    
+    def _summaries(self, blocks: List[HclBlock]) -> Dict[str, str]:
+        """address -> résumé compact (attributs sur une ligne, sous-blocs nommés)"""
+        summaries = {}
+        for block in blocks:
+            if block.block_type == "locals":
+                for name, attribute in block.attributes.items():
+                    summaries[f"local.{name}"] = self._compact(attribute.value)
+                continue
+            parts = [f"{name} = {self._compact(attribute.value)}" for name, attribute in block.attributes.items()]
+            parts.extend(f"{child.block_type} {{...}}" for child in block.blocks)
+            summaries[block.address] = ", ".join(parts)
+        return summaries
+    
+    @staticmethod
+    def _compact(value: str, limit: int = 60) -> str:
+        value = " ".join(value.split())
+        return value if len(value) <= limit else value[:limit] + "..."
+    
+    def _build_blocks_prompt(self, file_path: str, changed: List[HclBlock], blocks: List[HclBlock]) -> tuple:
+        """Prompt limité aux blocs modifiés, plus le résumé des blocs référencés.
 
-```hcl
-{content}
-```
+        Retourne (prompt, {id(bloc): CompactedContent} des blocs compactés).
+        """
+        parts = [
+            "Seuls les blocs ci-dessous ont changé; les autres blocs du fichier sont déjà analysés. "
+            f"Donne les numéros de ligne du fichier complet et le bloc concerné dans \"{'o' if self.compact_responses else 'resource'}\"."
+        ]
+        compacted = {}
+        for block in changed:
+            label = f"{file_path} (lignes {block.start_line}-{block.end_line}, {block.address})"
+            prompt, excerpt = self._content_prompt(file_path, block.text, block.start_line, label)
+            parts.append(prompt)
+            if excerpt is not None:
+                compacted[id(block)] = excerpt
+        
+        context = self._context_summaries(changed, blocks)
+        if context:
+            parts.append("Contexte - blocs référencés (résumé, ne pas analyser):\n" + "\n".join(
+                f"- {address}: {summary}" for address, summary in context.items()
+            ))
+        return "\n\n".join(parts), compacted
+    
+    def _context_summaries(self, changed: List[HclBlock], blocks: List[HclBlock]) -> Dict[str, str]:
+        summaries = dict(self._block_summaries)
+        summaries.update(self._summaries(blocks))
+        sent = {block.address for block in changed}
+        
+        context = {}
+        for block in changed:
+            for reference in REFERENCE_PATTERN.findall(block.text):
+                # aws_vpc.main.id -> aws_vpc.main
+                address = next((a for a in (reference, reference.rsplit(".", 1)[0]) if a in summaries), None)
+                if address and address not in sent and address not in context:
+                    context[address] = summaries[address]
+                if len(context) >= self.max_context_blocks:
+                    return context
+        return context
+    
+    def _owner_block(self, issue: Dict[str, Any], blocks: List[HclBlock],
+                     compacted: Optional[Dict[int, CompactedContent]] = None) -> HclBlock:
+        """Bloc auquel se rattache une issue; corrige les lignes relatives au bloc (compacté ou non)"""
+        line = issue.get("line") if isinstance(issue.get("line"), int) else 0
+        resource = str(issue.get("resource") or "")
+        
+        for block in blocks:
+            if resource and (resource == block.address or resource.endswith(block.address)):
+                excerpt = (compacted or {}).get(id(block))
+                if not block.start_line <= line <= block.end_line:
+                    # Numéro de ligne compté depuis le début de l'extrait
+                    length = block.end_line - block.start_line + 1
+                    if excerpt is not None and 0 < line <= len(excerpt.lines):
+                        issue["line"] = excerpt.lines[line - 1]
+                    else:
+                        issue["line"] = block.start_line + line - 1 if 0 < line <= length else block.start_line
+                return block
+        
+        for block in blocks:
+            if block.start_line <= line <= block.end_line:
+                return block
+        
+        block = min(blocks, key=lambda b: min(abs(line - b.start_line), abs(line - b.end_line)))
+        issue["line"] = block.start_line
+        return block
+    
+    def _block_cache_key(self, file_path: str, block: HclBlock, findings: List[Dict[str, Any]]) -> str:
+        """Clé de cache d'un bloc: contenu du bloc + analyzer + modèle + prompt statique (+ règles de contexte, findings)"""
+        parts = [
+            "ai_block", self.scanner_type, self.client.cache_id,
+            hashlib.sha256(block.text.encode("utf-8")).hexdigest(),
+            hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()
+        ]
+        if self.rule_engine is not None:
+            parts.append(self.rule_engine.context_key(file_path, self.language))
+        if findings:
+            parts.append("|".join(self._fingerprint(f, block.start_line) for f in findings))
+        return self.cache.make_key(*parts)
+    
+    def _get_block_cache(self, file_path: str, block: HclBlock, findings: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        return self.cache.get(self._block_cache_key(file_path, block, findings))
+    
+    def _set_block_cache(self, file_path: str, block: HclBlock, issues: List[Dict[str, Any]], findings: List[Dict[str, Any]]):
+        """Issues du bloc avec des lignes relatives au début du bloc, et verdicts du triage"""
+        if self.cache is None:
+            return
+        cached = []
+        for issue in issues:
+            entry = {k: v for k, v in issue.items() if k not in ("file", "type", "line")}
+            line = issue.get("line") or 0
+            entry["line_offset"] = line - block.start_line if line else None
+            cached.append(entry)
+        verdicts = self._verdicts(findings, block.start_line)
+        value = {"issues": cached, "triage": verdicts} if verdicts else {"issues": cached}
+        self.cache.set(self._block_cache_key(file_path, block, findings), value)
+    
+    def _from_block_cache(self, block: HclBlock, cached: Dict[str, Any]) -> List[Dict[str, Any]]:
+        issues = []
+        for entry in cached.get("issues", []):
+            issue = {k: v for k, v in entry.items() if k != "line_offset"}
+            offset = entry.get("line_offset")
+            issue["line"] = block.start_line + offset if offset is not None else 0
+            issues.append(issue)
+        return issues
+    
+    def _build_system_prompt(self) -> str:
+        """Construit la partie statique du prompt pour l'analyse Terraform"""
+        return f"""Tu es un expert DevOps et sécurité AWS. Analyse le fichier Terraform fourni et détecte TOUTES les mauvaises pratiques de sécurité et DevOps.
 
 Identifie:
-1. Politiques IAM trop permissives (wildcards *, Action = "*", Resource = "*")
-2. Security Groups ouverts (0.0.0.0/0, ports larges)
-3. Ressources sans encryption (KMS, AES256)
-4. Secrets hardcodés (passwords, keys, tokens)
-5. Ressources publiques non nécessaires (publicly_accessible = true)
-6. Absence de tags
-7. Absence de logging/monitoring (CloudWatch, CloudTrail)
-8. Configurations non sécurisées (HTTP au lieu de HTTPS, pas de versioning)
-9. Variables sensibles sans sensitive = true
-10. Outputs de données sensibles sans sensitive = true
+{self._checklist()}
 
-Réponds UNIQUEMENT en JSON avec cette structure exacte:
-{{
-  "file": "{file_path}",
-  "issues": [
-    {{
-      "line": <numéro de ligne ou 0 si inconnu>,
-      "severity": "critical|high|medium|low",
-      "title": "Titre court et précis",
-      "description": "Description détaillée du problème",
-      "recommendation": "Comment corriger avec exemple de code",
-      "confidence": 0.0-1.0,
-      "resource": "nom de la ressource concernée"
-    }}
-  ]
-}}
+{self._response_format()}
 
 Sois strict et détecte TOUS les problèmes, même mineurs."""
-        
-        return prompt
+    
+    def _build_prompt(self, file_path: str, content: str) -> str:
+        """Construit la partie variable du prompt pour l'analyse Terraform"""
+        return f"""Fichier: {file_path}
+
+```hcl
+{content}
+```"""
 
 
 def main():
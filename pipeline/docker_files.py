@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Docker Files - Découverte des Dockerfiles et fichiers compose d'un dépôt
+"""
+
+import os
+import re
+from typing import List, Tuple
+
+import yaml
+
+
+COMPOSE_PATTERN = re.compile(r"(?:docker-)?compose(?:\.[\w.-]+)?\.ya?ml\Z")
+
+
+def is_compose_file(path: str) -> bool:
+    """docker-compose.yml, compose.yaml, docker-compose.prod.yml..."""
+    return bool(COMPOSE_PATTERN.match(os.path.basename(path)))
+
+
+def compose_dockerfiles(content: str, compose_path: str) -> List[str]:
+    """Dockerfiles référencés par les services (build.context + build.dockerfile)"""
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError:
+        return []
+    services = data.get("services") if isinstance(data, dict) else None
+    if not isinstance(services, dict):
+        return []
+    
+    base = os.path.dirname(compose_path)
+    paths = []
+    for service in services.values():
+        build = service.get("build") if isinstance(service, dict) else None
+        if isinstance(build, str):
+            context, dockerfile = build, "Dockerfile"
+        elif isinstance(build, dict):
+            context, dockerfile = str(build.get("context", ".")), build.get("dockerfile", "Dockerfile")
+        else:
+            continue
+        # Contexte distant (git, URL): rien à analyser dans le dépôt
+        if not isinstance(dockerfile, str) or "://" in context or context.startswith("git@"):
+            continue
+        paths.append(os.path.normpath(os.path.join(base, context, dockerfile)).replace(os.sep, "/"))
+    return paths
+
+
+def discover(snapshot, directory: str = "") -> Tuple[List[str], List[str]]:
+    """(Dockerfiles, fichiers compose) du snapshot, éventuellement sous un répertoire.
+
+    Les Dockerfiles sont reconnus par leur nom (Dockerfile, Dockerfile.*,
+    *.dockerfile), complétés par ceux que référencent les fichiers compose
+    (Containerfile, docker/api.Dockerfile...).
+    """
+    prefix = directory.strip("/") + "/" if directory.strip("/.") else ""
+    dockerfiles = [entry.path for entry in snapshot.by_language("dockerfile", directory)]
+    compose_files = sorted(path for path in snapshot.files if path.startswith(prefix) and is_compose_file(path))
+    
+    known = set(dockerfiles)
+    for compose_path in compose_files:
+        try:
+            content = snapshot.read_text(compose_path)
+        except (OSError, UnicodeDecodeError):
+            continue
+        for path in compose_dockerfiles(content, compose_path):
+            if path not in known and snapshot.get(path) is not None:
+                known.add(path)
+                dockerfiles.append(path)
+    return sorted(dockerfiles), compose_files
+
+
+def main():
+    """Test: découverte dans un dépôt"""
+    import sys
+    from snapshot import RepoSnapshot
+    
+    snapshot = RepoSnapshot(sys.argv[1] if len(sys.argv) > 1 else ".").build()
+    dockerfiles, compose_files = discover(snapshot)
+    print(f"Dockerfiles: {dockerfiles}")
+    print(f"Compose: {compose_files}")
+
+
+if __name__ == "__main__":
+    main()
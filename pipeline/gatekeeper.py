@@ -6,6 +6,8 @@ Gatekeeper - Décision finale basée sur les résultats des scans
 import json
 from typing import Dict, List, Any
 
+from issue_index import IssueIndex
+
 
 class Gatekeeper:
     def __init__(self, config: Dict[str, Any]):
@@ -32,13 +34,16 @@ class Gatekeeper:
             if issue.get("confidence", 1.0) >= confidence_threshold
         ]
         
-        # Compter par severity
-        severity_counts = {
-            "critical": len([i for i in filtered_issues if i.get("severity") == "critical"]),
-            "high": len([i for i in filtered_issues if i.get("severity") == "high"]),
-            "medium": len([i for i in filtered_issues if i.get("severity") == "medium"]),
-            "low": len([i for i in filtered_issues if i.get("severity") == "low"])
-        }
+        # Findings de scanners écartés par le triage IA avec assez de confiance
+        dismissed = []
+        kept = []
+        for issue in filtered_issues:
+            (dismissed if self._is_dismissed(issue, confidence_threshold) else kept).append(issue)
+        filtered_issues = kept
+        
+        # Index par sévérité, fichier et règle: les rapports en dérivent sans reparcourir les issues
+        index = IssueIndex(filtered_issues)
+        severity_counts = index.counts()
         
         # Calculer le risk score (0-100)
         risk_score = self._calculate_risk_score(severity_counts)
@@ -46,25 +51,25 @@ class Gatekeeper:
         # Décision
         decision = self._make_decision(severity_counts)
         
-        # Grouper les issues par fichier
-        issues_by_file = {}
-        for issue in filtered_issues:
-            file_path = issue.get("file", "unknown")
-            if file_path not in issues_by_file:
-                issues_by_file[file_path] = []
-            issues_by_file[file_path].append(issue)
-        
         return {
             "decision": decision,
             "risk_score": risk_score,
             "severity_counts": severity_counts,
             "total_issues": len(filtered_issues),
-            "issues_by_file": issues_by_file,
+            "issues_by_file": index.by_file,
             "all_issues": filtered_issues,
+            "index": index,
+            "dismissed_issues": dismissed,
             "thresholds": self.thresholds,
             "message": self._get_decision_message(decision, severity_counts)
         }
     
+    @staticmethod
+    def _is_dismissed(issue: Dict[str, Any], confidence_threshold: float) -> bool:
+        """Finding écarté par le triage IA avec une confiance suffisante"""
+        triage = issue.get("triage") or {}
+        return triage.get("verdict") == "dismissed" and triage.get("confidence", 0.0) >= confidence_threshold
+    
     def _calculate_risk_score(self, severity_counts: Dict[str, int]) -> int:
         """Calcule un score de risque de 0 à 100"""
         score = 0
@@ -137,7 +142,7 @@ def main():
     result = gatekeeper.evaluate(mock_results)
     
     print("Gatekeeper Decision:\n")
-    print(json.dumps(result, indent=2))
+    print(json.dumps({k: v for k, v in result.items() if k != "index"}, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+History - Historique des runs en colonnes, pour les tendances entre runs et dépôts
+"""
+
+import json
+import os
+import time
+from array import array
+from collections import Counter, defaultdict
+from itertools import compress
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou entre process
+    fcntl = None
+
+
+# Table -> colonne -> type: "d" flottant, "i" entier, sinon nom du dictionnaire de chaînes
+SCHEMA = {
+    "runs": {
+        "timestamp": "d", "repo": "repo", "decision": "decision", "risk_score": "i",
+        "total_issues": "i", "critical": "i", "high": "i", "medium": "i", "low": "i", "duration": "d"
+    },
+    "issues": {
+        "run": "i", "timestamp": "d", "repo": "repo", "scanner": "scanner",
+        "rule": "rule", "severity": "severity", "file": "file"
+    },
+    "phases": {
+        "run": "i", "timestamp": "d", "repo": "repo", "stage": "stage", "duration": "d"
+    },
+    "files": {
+        "run": "i", "timestamp": "d", "repo": "repo", "file": "file", "duration": "d"
+    }
+}
+
+PERIODS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+DEFAULT_DIRECTORY = ".pipeline_cache/history"
+
+
+def history_directory(config: Dict[str, Any]) -> str:
+    """Répertoire de l'historique, relatif au répertoire courant et non au dépôt analysé.
+
+    Runs simples, multi-projets et daemon écrivent au même endroit, où
+    pipeline history le relit (un dépôt par nom dans la colonne repo).
+    """
+    directory = config.get("history", {}).get("directory", DEFAULT_DIRECTORY)
+    return os.path.abspath(os.path.expanduser(directory))
+
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """"30d", "12w", "6m" ou une date ISO -> timestamp"""
+    if not value:
+        return None
+    units = {"d": 86400, "w": 7 * 86400, "m": 30 * 86400, "y": 365 * 86400}
+    if value[-1] in units and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * units[value[-1]]
+    return time.mktime(time.strptime(value[:10], "%Y-%m-%d"))
+
+
+class HistoryStore:
+    """Historique append-only, une colonne par fichier.
+
+    Chaque colonne est un tableau binaire (array) de valeurs de taille fixe;
+    les chaînes (dépôt, règle, fichier...) sont encodées par dictionnaire.
+    Les runs sont rangés par mois: une requête ne lit que les colonnes et
+    les mois dont elle a besoin, et les agrégations (Counter, compress)
+    tournent en C sur les codes entiers, sans décoder les chaînes.
+
+    Le nombre de lignes valides de chaque table est dans meta.json, remplacé
+    atomiquement après l'écriture des colonnes: une écriture interrompue
+    n'est jamais lue et est tronquée par l'ajout suivant. Les ajouts de
+    plusieurs process sont sérialisés par un verrou (fcntl).
+    """
+    
+    def __init__(self, directory: str = ".pipeline_cache/history"):
+        self.directory = directory
+        self._dictionaries: Dict[str, List[str]] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+    
+    def append(self, run: Dict[str, Any], issues: List[Dict[str, Any]] = (),
+               phases: List[Dict[str, Any]] = (), files: List[Dict[str, Any]] = ()):
+        """Ajoute un run; issues, phases et files héritent de son timestamp et de son dépôt"""
+        timestamp = run["timestamp"]
+        segment = time.strftime("%Y-%m", time.localtime(timestamp))
+        os.makedirs(os.path.join(self.directory, segment), exist_ok=True)
+        
+        with self._locked():
+            self._load_all_dictionaries()
+            meta = self._meta(segment)
+            row = meta.get("runs", 0)
+            shared = {"run": row, "timestamp": timestamp, "repo": run["repo"]}
+            tables = {
+                "runs": [run],
+                "issues": [dict(shared, **issue) for issue in issues],
+                "phases": [dict(shared, **phase) for phase in phases],
+                "files": [dict(shared, **entry) for entry in files]
+            }
+            for table, rows in tables.items():
+                if rows:
+                    self._write_rows(segment, table, rows, meta.get(table, 0))
+                    meta[table] = meta.get(table, 0) + len(rows)
+            self._save_meta(segment, meta)
+    
+    def risk_trend(self, repo: Optional[str] = None, since: Optional[float] = None,
+                   period: str = "day") -> List[Dict[str, Any]]:
+        """Score de risque par période: runs, moyenne, maximum, runs bloqués"""
+        columns = self._select("runs", ["timestamp", "risk_score", "decision"], repo, since)
+        blocked = self._code("decision", "BLOCK")
+        buckets: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+        fmt = PERIODS[period]
+        for timestamp, score, decision in zip(columns["timestamp"], columns["risk_score"], columns["decision"]):
+            bucket = buckets[time.strftime(fmt, time.localtime(timestamp))]
+            bucket[0] += 1
+            bucket[1] += score
+            bucket[2] = max(bucket[2], score)
+            bucket[3] += decision == blocked
+        return [
+            {"period": key, "runs": runs, "avg_risk": round(total / runs, 1), "max_risk": peak, "blocked": blocked_runs}
+            for key, (runs, total, peak, blocked_runs) in sorted(buckets.items())
+        ]
+    
+    def top_rules(self, repo: Optional[str] = None, since: Optional[float] = None,
+                  limit: int = 10) -> List[Dict[str, Any]]:
+        """Règles les plus fréquentes: occurrences et nombre de dépôts touchés"""
+        columns = self._select("issues", ["rule", "repo", "scanner"], repo, since)
+        counts = Counter(columns["rule"])
+        top = counts.most_common(limit)
+        wanted = {code for code, _ in top}
+        repos: Dict[int, set] = defaultdict(set)
+        scanners: Dict[int, int] = {}
+        for rule, repo_code, scanner in zip(columns["rule"], columns["repo"], columns["scanner"]):
+            if rule in wanted:
+                repos[rule].add(repo_code)
+                scanners.setdefault(rule, scanner)
+        return [
+            {
+                "rule": self._decode("rule", code),
+                "scanner": self._decode("scanner", scanners[code]),
+                "count": count,
+                "repos": len(repos[code])
+            }
+            for code, count in top
+        ]
+    
+    def slowest_files(self, repo: Optional[str] = None, since: Optional[float] = None,
+                      limit: int = 10) -> List[Dict[str, Any]]:
+        """Fichiers les plus longs à analyser (durée moyenne par run)"""
+        columns = self._select("files", ["repo", "file", "duration"], repo, since)
+        totals: Dict[Tuple[int, int], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        for repo_code, file_code, duration in zip(columns["repo"], columns["file"], columns["duration"]):
+            stats = totals[(repo_code, file_code)]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+        ranked = sorted(totals.items(), key=lambda item: item[1][1] / item[1][0], reverse=True)[:limit]
+        return [
+            {
+                "repo": self._decode("repo", repo_code),
+                "file": self._decode("file", file_code),
+                "runs": runs,
+                "avg_duration": round(total / runs, 3),
+                "max_duration": round(peak, 3)
+            }
+            for (repo_code, file_code), (runs, total, peak) in ranked
+        ]
+    
+    def phase_durations(self, repo: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Durée de chaque étape du pipeline: moyenne, p95 et maximum"""
+        columns = self._select("phases", ["stage", "duration"], repo, since)
+        durations: Dict[int, List[float]] = defaultdict(list)
+        for stage, duration in zip(columns["stage"], columns["duration"]):
+            durations[stage].append(duration)
+        stats = []
+        for stage, values in durations.items():
+            values.sort()
+            stats.append({
+                "stage": self._decode("stage", stage),
+                "runs": len(values),
+                "avg_duration": round(sum(values) / len(values), 3),
+                "p95_duration": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+                "max_duration": round(values[-1], 3)
+            })
+        return sorted(stats, key=lambda s: s["avg_duration"], reverse=True)
+    
+    def _select(self, table: str, columns: List[str], repo: Optional[str], since: Optional[float]) -> Dict[str, Any]:
+        """Colonnes d'une table, filtrées par dépôt et date, sur tous les mois concernés"""
+        self._load_all_dictionaries()
+        selected: Dict[str, Any] = {name: [] for name in columns}
+        repo_code = self._code("repo", repo) if repo is not None else None
+        if repo is not None and repo_code is None:
+            return selected
+        first_segment = time.strftime("%Y-%m", time.localtime(since)) if since is not None else ""
+        
+        for segment in self._segments():
+            if segment < first_segment:
+                continue
+            rows = self._meta(segment).get(table, 0)
+            if not rows:
+                continue
+            needed = set(columns)
+            if repo_code is not None:
+                needed.add("repo")
+            if since is not None and segment == first_segment:
+                needed.add("timestamp")
+            data = {name: self._read_column(segment, table, name, rows) for name in needed}
+            
+            mask = None
+            if repo_code is not None:
+                mask = [code == repo_code for code in data["repo"]]
+            if since is not None and segment == first_segment:
+                recent = [timestamp >= since for timestamp in data["timestamp"]]
+                mask = recent if mask is None else [a and b for a, b in zip(mask, recent)]
+            for name in columns:
+                values = data[name] if mask is None else compress(data[name], mask)
+                selected[name].extend(values)
+        return selected
+    
+    def _write_rows(self, segment: str, table: str, rows: List[Dict[str, Any]], committed: int):
+        for name, kind in SCHEMA[table].items():
+            typecode = "d" if kind == "d" else "i"
+            if kind in ("d", "i"):
+                values = array(typecode, (row.get(name) or 0 for row in rows))
+            else:
+                values = array(typecode, (self._encode(kind, str(row.get(name) or "")) for row in rows))
+            path = self._column_path(segment, table, name)
+            with open(path, "ab") as f:
+                # Lignes d'une écriture interrompue: écrasées
+                f.truncate(committed * values.itemsize)
+                values.tofile(f)
+    
+    def _read_column(self, segment: str, table: str, name: str, rows: int) -> array:
+        typecode = "d" if SCHEMA[table][name] == "d" else "i"
+        values = array(typecode)
+        with open(self._column_path(segment, table, name), "rb") as f:
+            values.frombytes(f.read(rows * values.itemsize))
+        return values
+    
+    def _encode(self, dictionary: str, value: str) -> int:
+        """Code d'une chaîne; les nouvelles chaînes sont ajoutées au dictionnaire (sous verrou)"""
+        codes = self._codes.setdefault(dictionary, {})
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._dictionaries.setdefault(dictionary, []).append(value)
+            with open(self._dictionary_path(dictionary), "a", encoding="utf-8") as f:
+                f.write(json.dumps(value) + "\n")
+        return code
+    
+    def _code(self, dictionary: str, value: str) -> Optional[int]:
+        return self._codes.get(dictionary, {}).get(value)
+    
+    def _decode(self, dictionary: str, code: int) -> str:
+        return self._dictionaries[dictionary][code]
+    
+    def _load_all_dictionaries(self):
+        """Relit les dictionnaires (d'autres process ont pu les compléter)"""
+        for dictionary in {kind for table in SCHEMA.values() for kind in table.values() if kind not in ("d", "i")}:
+            values = []
+            try:
+                with open(self._dictionary_path(dictionary), "r", encoding="utf-8") as f:
+                    for line in f:
+                        # Dernière ligne incomplète d'une écriture interrompue: ignorée
+                        if line.endswith("\n"):
+                            values.append(json.loads(line))
+            except OSError:
+                pass
+            self._dictionaries[dictionary] = values
+            self._codes[dictionary] = {value: code for code, value in enumerate(values)}
+    
+    def _segments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if os.path.isfile(os.path.join(self.directory, name, "meta.json")))
+    
+    def _meta(self, segment: str) -> Dict[str, int]:
+        try:
+            with open(os.path.join(self.directory, segment, "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_meta(self, segment: str, meta: Dict[str, int]):
+        path = os.path.join(self.directory, segment, "meta.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp", path)
+    
+    def _column_path(self, segment: str, table: str, name: str) -> str:
+        return os.path.join(self.directory, segment, f"{table}.{name}.col")
+    
+    def _dictionary_path(self, dictionary: str) -> str:
+        return os.path.join(self.directory, f"{dictionary}.dict")
+    
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return _FileLock(os.path.join(self.directory, ".lock"))
+
+
+class _FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+    
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def main():
+    """Test: un an de runs synthétiques sur 200 dépôts, puis les requêtes de tendance"""
+    import random
+    import sys
+    import tempfile
+    
+    directory = sys.argv[1] if len(sys.argv) > 1 else tempfile.mkdtemp()
+    store = HistoryStore(directory)
+    if not store._segments():
+        random.seed(1)
+        start = time.time() - 365 * 86400
+        rules = [f"CKV_AWS_{n}" for n in range(200)]
+        for day in range(365):
+            for repo in random.sample(range(200), 10):
+                score = random.randint(0, 100)
+                store.append(
+                    {"timestamp": start + day * 86400, "repo": f"repo-{repo}", "decision": "BLOCK" if score > 80 else "PASS",
+                     "risk_score": score, "total_issues": 20, "duration": random.random() * 60},
+                    issues=[{"scanner": "checkov", "rule": random.choice(rules), "severity": "high", "file": "main.tf"} for _ in range(20)],
+                    phases=[{"stage": "checkov", "duration": random.random() * 20}],
+                    files=[{"file": f"terraform/{n}.tf", "duration": random.random() * 5} for n in range(5)]
+                )
+    
+    for name, query in (("risk_trend", lambda: store.risk_trend(period="month")),
+                        ("top_rules", lambda: store.top_rules(limit=5)),
+                        ("slowest_files", lambda: store.slowest_files(limit=5)),
+                        ("phase_durations", lambda: store.phase_durations())):
+        started = time.time()
+        rows = query()
+        print(f"{name} ({(time.time() - started) * 1000:.0f} ms): {rows[:3]}")
+
+
+if __name__ == "__main__":
+    main()
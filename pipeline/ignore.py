@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Ignore - Chemins ignorés (false_positives.ignored_files et .gitignore)
+"""
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+from snapshot import glob_to_pattern
+
+
+class PathMatcher:
+    """Motifs au format .gitignore compilés une seule fois.
+
+    Un motif sans "/" s'applique à n'importe quelle profondeur, un motif
+    terminé par "/" ne vise que les répertoires. Sans négation (!motif),
+    tous les motifs sont fusionnés en une seule regex; sinon ils sont
+    évalués dans l'ordre et le dernier qui correspond l'emporte, comme git.
+    """
+    
+    def __init__(self, patterns: List[str]):
+        self.patterns = [p for p in (line.rstrip() for line in patterns) if p.strip() and not p.startswith("#")]
+        # (source regex, glob normalisé, négation, répertoires seulement)
+        self._rules = [self._compile(p) for p in self.patterns]
+        self._ordered = any(negate for _, _, negate, _ in self._rules)
+        
+        self._files_regex = self._dirs_regex = None
+        self._compiled = []
+        if not self._ordered:
+            self._files_regex = self._combine([r for r in self._rules if not r[3]])
+            self._dirs_regex = self._combine(self._rules)
+        else:
+            self._compiled = [(re.compile(source + r"\Z"), negate, dir_only) for source, _, negate, dir_only in self._rules]
+    
+    @classmethod
+    def load(cls, root: str, patterns: Optional[List[str]] = None, use_gitignore: bool = True) -> "PathMatcher":
+        """Motifs du .gitignore de la racine, puis ceux de la configuration"""
+        lines = []
+        if use_gitignore:
+            try:
+                with open(os.path.join(root, ".gitignore"), 'r', encoding='utf-8') as f:
+                    lines.extend(f.read().splitlines())
+            except (OSError, UnicodeDecodeError):
+                pass
+        lines.extend(patterns or [])
+        return cls(lines)
+    
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+    
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """Le chemin lui-même est ignoré (sans regarder ses répertoires parents)"""
+        if not self._ordered:
+            regex = self._dirs_regex if is_dir else self._files_regex
+            return regex is not None and regex.match(path) is not None
+        
+        ignored = False
+        for regex, negate, dir_only in self._compiled:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                ignored = not negate
+        return ignored
+    
+    def ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Le chemin ou l'un de ses répertoires parents est ignoré"""
+        parts = path.strip("/").split("/")
+        for depth in range(1, len(parts)):
+            if self.match("/".join(parts[:depth]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir)
+    
+    def skip_globs(self) -> Tuple[List[str], List[str]]:
+        """(fichiers, répertoires) pour --skip-files/--skip-dirs de Trivy.
+
+        Les négations n'ont pas d'équivalent: un fichier ré-inclus sous un
+        motif ignoré reste ignoré par Trivy.
+        """
+        files, dirs = [], []
+        for _, glob, negate, dir_only in self._rules:
+            if negate:
+                continue
+            dirs.append(glob)
+            if not dir_only:
+                files.append(glob)
+        return files, dirs
+    
+    def skip_regexes(self) -> List[str]:
+        """Regex pour --skip-path de Checkov (mêmes limites que skip_globs)"""
+        return [source for source, _, negate, _ in self._rules if not negate]
+    
+    @staticmethod
+    def _compile(pattern: str) -> Tuple[str, str, bool, bool]:
+        negate = pattern.startswith("!")
+        if negate or pattern.startswith("\\"):
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Sans "/" au milieu: le motif s'applique à toutes les profondeurs
+        if "/" in pattern:
+            pattern = pattern.lstrip("/")
+        else:
+            pattern = "**/" + pattern
+        return glob_to_pattern(pattern), pattern, negate, dir_only
+    
+    @staticmethod
+    def _combine(rules: List[Tuple[str, str, bool, bool]]) -> Optional["re.Pattern"]:
+        if not rules:
+            return None
+        return re.compile("(?:" + "|".join(f"(?:{source})" for source, _, _, _ in rules) + r")\Z")
+
+
+def main():
+    """Test du matcher sur quelques chemins"""
+    import sys
+    
+    matcher = PathMatcher.load(".", ["*.test.ts", "README.md", "build/", "!keep.test.ts"])
+    paths = sys.argv[1:] or ["app/a.test.ts", "app/keep.test.ts", "README.md", "build/out.js", "terraform/main.tf"]
+    for path in paths:
+        print(f"{'IGNORED' if matcher.ignored(path) else 'kept   '} {path}")
+    print(f"Trivy skip globs: {matcher.skip_globs()}")
+
+
+if __name__ == "__main__":
+    main()
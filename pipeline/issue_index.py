@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Issue Index - Issues du gatekeeper indexées par sévérité, fichier et règle
+"""
+
+import heapq
+from typing import Dict, List, Any, Iterable, Tuple
+
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+
+def rule_of(issue: Dict[str, Any]) -> str:
+    """Identifiant de règle d'une issue (check Checkov, règle locale, sinon titre)"""
+    return issue.get("check_id") or issue.get("rule_id") or issue.get("title", "")
+
+
+class IssueIndex:
+    """Index construit en un seul passage sur les issues retenues.
+
+    Les vues par sévérité, par fichier et par règle gardent l'ordre
+    d'arrivée des issues. Les top-k passent par un tas borné (heapq) sur
+    les seules sévérités demandées: prendre les 5 pires issues ne filtre
+    ni ne trie toute la liste.
+    """
+    
+    def __init__(self, issues: List[Dict[str, Any]]):
+        self.issues = issues
+        self.by_severity: Dict[str, List[Dict[str, Any]]] = {severity: [] for severity in SEVERITIES}
+        self.by_file: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_rule: Dict[str, List[Dict[str, Any]]] = {}
+        for issue in issues:
+            self.by_severity.setdefault(issue.get("severity", "unknown"), []).append(issue)
+            self.by_file.setdefault(issue.get("file", "unknown"), []).append(issue)
+            self.by_rule.setdefault(rule_of(issue), []).append(issue)
+    
+    def __len__(self) -> int:
+        return len(self.issues)
+    
+    def counts(self) -> Dict[str, int]:
+        """Nombre d'issues par sévérité"""
+        return {severity: len(self.by_severity[severity]) for severity in SEVERITIES}
+    
+    def top(self, k: int, severities: Iterable[str] = SEVERITIES) -> List[Dict[str, Any]]:
+        """Les k issues les plus graves: sévérité, puis confiance, puis ordre d'arrivée"""
+        selected = []
+        for severity in severities:
+            remaining = k - len(selected)
+            if remaining <= 0:
+                break
+            bucket = self.by_severity.get(severity, [])
+            ranked = heapq.nsmallest(remaining, ((-issue.get("confidence", 1.0), n, issue) for n, issue in enumerate(bucket)))
+            selected.extend(issue for _, _, issue in ranked)
+        return selected
+    
+    def top_rules(self, k: int) -> List[Tuple[str, int]]:
+        """Les k règles les plus fréquentes: (règle, occurrences)"""
+        return [(rule, len(issues)) for rule, issues in heapq.nlargest(k, self.by_rule.items(), key=lambda item: len(item[1]))]
+    
+    def top_files(self, k: int) -> List[Tuple[str, int]]:
+        """Les k fichiers avec le plus d'issues: (fichier, occurrences)"""
+        return [(path, len(issues)) for path, issues in heapq.nlargest(k, self.by_file.items(), key=lambda item: len(item[1]))]
+
+
+def main():
+    """Test: top-k sur 100 000 issues synthétiques"""
+    import random
+    import time
+    
+    random.seed(1)
+    issues = [
+        {
+            "severity": random.choice(SEVERITIES),
+            "title": f"rule-{random.randint(0, 50)}",
+            "file": f"terraform/{random.randint(0, 200)}.tf",
+            "confidence": round(random.random(), 2)
+        }
+        for _ in range(100000)
+    ]
+    
+    started = time.time()
+    index = IssueIndex(issues)
+    built = time.time()
+    top = index.top(5, ("critical", "high"))
+    print(f"index: {(built - started) * 1000:.0f} ms, top 5: {(time.time() - built) * 1000:.1f} ms")
+    print(f"counts: {index.counts()}")
+    print(f"top: {[(i['severity'], i['confidence']) for i in top]}")
+    print(f"top rules: {index.top_rules(3)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,15 @@
 Smart DevOps Pipeline - Orchestrateur principal
 """
 
+import argparse
 import json
 import sys
 import os
+import threading
+import time
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional
 
 # Ajouter le répertoire parent au path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -14,146 +19,273 @@ sys.path.insert(0, str(Path(__file__).parent))
 from scanners.trivy_scanner import TrivyScanner
 from scanners.tflint_scanner import TFLintScanner
 from scanners.checkov_scanner import CheckovScanner
-from ai.bedrock_client import BedrockClient
+from scanners.supervisor import ProcessSupervisor
+from ai.bedrock_pool import create_bedrock_client
 from ai.terraform_analyzer import TerraformAnalyzer
 from ai.docker_analyzer import DockerAnalyzer
 from ai.code_analyzer import CodeAnalyzer
+from ai.compose_analyzer import ComposeAnalyzer
+from ai.batch_runner import BatchRunner, S3BedrockBackend, LocalDirectoryBackend
+from docker_files import discover
 from gatekeeper import Gatekeeper
+from history import HistoryStore, history_directory
+from issue_index import rule_of
+from raw_results import load_results, save_results
 from reporter import Reporter
+from snapshot import RepoSnapshot
+from ignore import PathMatcher
+from result_cache import ResultCache
+from rules import RuleEngine
+from similarity import SimilarityIndex
+from stages import Stage, StageGraph
+
+
+# Emplacements par défaut, surchargés par la section "sources" de la configuration
+DEFAULT_SOURCES = {"terraform": "terraform", "dockerfile": "Dockerfile", "code": "app"}
+
+
+class ReportStages:
+    """Décision du gatekeeper et rapports, communs au run complet et à la commande gate"""
+    
+    def __init__(self, config: Dict[str, Any], root: str = ".", log: Callable[..., None] = print):
+        self.config = config
+        self.root = root
+        self.log = log
+        self.gatekeeper = Gatekeeper(config)
+        self.reporter = Reporter()
+    
+    def add_to(self, graph: StageGraph):
+        """Étapes de rapport, en parallèle dès que la décision est publiée"""
+        graph.add(Stage("json_report", self._json_report_stage, inputs=["decision"]))
+        if self.config["reporting"]["generate_markdown"]:
+            graph.add(Stage("markdown_report", self._markdown_report_stage, inputs=["decision"]))
+        if self.config["reporting"].get("post_to_github", False):
+            graph.add(Stage("github_comment", self._github_comment_stage, inputs=["decision"]))
+        graph.add(Stage("blocked_marker", self._blocked_marker_stage, inputs=["decision"]))
+    
+    def evaluate(self, results: List[Dict[str, Any]], process_usage: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Décision du gatekeeper, loguée"""
+        gatekeeper_result = self.gatekeeper.evaluate(results)
+        if process_usage:
+            gatekeeper_result["process_usage"] = process_usage
+        
+        self.log("\n\n[GATEKEEPER] Decision")
+        self.log("-" * 60)
+        self.log(f"\nDecision: {gatekeeper_result['decision']}")
+        self.log(f"Risk Score: {gatekeeper_result['risk_score']}/100")
+        self.log(f"Total Issues: {gatekeeper_result['total_issues']}")
+        self.log(f"\nSeverity Breakdown:")
+        self.log(f"  Critical: {gatekeeper_result['severity_counts']['critical']}")
+        self.log(f"  High:     {gatekeeper_result['severity_counts']['high']}")
+        self.log(f"  Medium:   {gatekeeper_result['severity_counts']['medium']}")
+        self.log(f"  Low:      {gatekeeper_result['severity_counts']['low']}")
+        if gatekeeper_result["dismissed_issues"]:
+            self.log(f"\nDismissed by AI triage: {len(gatekeeper_result['dismissed_issues'])} scanner findings")
+        self.log(f"\nMessage: {gatekeeper_result['message']}")
+        self.log()
+        return gatekeeper_result
+    
+    def _path(self, path: str) -> str:
+        return os.path.normpath(os.path.join(self.root, path))
+    
+    def _json_report_stage(self, inputs: Dict[str, List[Any]]):
+        json_report = self.reporter.generate_json_report(inputs["decision"][0], self._path("pipeline_report.json"))
+        self.log(f"JSON Report: {json_report}")
+    
+    def _markdown_report_stage(self, inputs: Dict[str, List[Any]]):
+        md_report = self.reporter.generate_markdown_report(inputs["decision"][0], self._path("pipeline_report.md"))
+        self.log(f"Markdown Report: {md_report}")
+    
+    def _github_comment_stage(self, inputs: Dict[str, List[Any]]):
+        comment = self.reporter.generate_github_comment_file(inputs["decision"][0], self._path("pipeline_comment.md"))
+        self.log(f"GitHub Comment: {comment}")
+    
+    def _blocked_marker_stage(self, inputs: Dict[str, List[Any]]):
+        """Créer un fichier marker si BLOCK"""
+        gatekeeper_result = inputs["decision"][0]
+        if gatekeeper_result["decision"] == "BLOCK":
+            with open(self._path("pipeline_blocked.txt"), "w") as f:
+                f.write(gatekeeper_result["message"])
+            self.log("Pipeline BLOCKED - See pipeline_blocked.txt")
 
 
 class SmartPipeline:
-    def __init__(self, config_path: str = "pipeline/config.json"):
+    """Pipeline complet (scanners, IA, gatekeeper, rapports) sur un dépôt.
+
+    Le daemon (server.py) réutilise la configuration, le client Bedrock et
+    le cache de résultats d'un job à l'autre en les passant au constructeur;
+    seuls le snapshot et les scanners/analyzers qui en dépendent sont
+    recréés pour chaque job.
+    """
+    
+    def __init__(self, config_path: str = "pipeline/config.json", batch: bool = False,
+                 root: str = ".", config: Optional[Dict[str, Any]] = None,
+                 bedrock_client: Optional[Any] = None, cache: Optional[ResultCache] = None,
+                 trivy_server: Optional[str] = None, log: Callable[..., None] = print,
+                 executor: Optional[Any] = None):
         # Charger la configuration
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
+        if config is None:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        self.config = config
+        self.root = root
+        self.log = log
+        # Pool partagé (multi_project.FairSharePool) pour scanners et fichiers analysés
+        self.executor = executor
+        self.sources = dict(DEFAULT_SOURCES, **self.config.get("sources", {}))
+        
+        self.batch = batch or self.config.get("batch", {}).get("enabled", False)
+        
+        # Snapshot unique du dépôt, partagé par scanners et analyzers
+        cache_config = self.config.get("cache", {})
+        snapshot_config = self.config.get("snapshot", {})
+        cache_dir = self._path(cache_config.get("directory", ".pipeline_cache"))
+        # Fichiers ignorés écartés dès le parcours: ni lus, ni scannés, ni envoyés à Bedrock
+        self.ignore = PathMatcher.load(
+            root,
+            self.config.get("false_positives", {}).get("ignored_files", []),
+            use_gitignore=snapshot_config.get("use_gitignore", True)
+        )
+        self.snapshot = RepoSnapshot(
+            root,
+            cache_dir=cache_dir,
+            max_content_size=snapshot_config.get("max_content_size", 256 * 1024),
+            max_workers=snapshot_config.get("workers", 8),
+            ignore=self.ignore
+        ).build()
+        # Tous les Dockerfiles (Dockerfile.*, services/*/Dockerfile) et fichiers compose du dépôt,
+        # sinon le seul Dockerfile de "sources"
+        self.docker_config = self.config.get("docker", {})
+        self.dockerfiles, self.compose_files = [self.sources["dockerfile"]], []
+        if self.docker_config.get("discover", True):
+            dockerfiles, self.compose_files = discover(self.snapshot)
+            self.dockerfiles = dockerfiles or self.dockerfiles
+        
+        if cache is None and cache_config.get("enabled", True):
+            cache = ResultCache(os.path.join(cache_dir, "results"), cache_config.get("memory_entries"))
+        self.cache = cache
         
         # Initialiser les composants
-        self.trivy = TrivyScanner()
-        self.tflint = TFLintScanner()
-        self.checkov = CheckovScanner()
+        self.supervisor = ProcessSupervisor.from_config(self.config.get("processes", {}))
+        # Images (docker save): résultats par image dans le cache partagé, couches Trivy dans son cache
+        self.images = self.config.get("images", {})
+        self.trivy = TrivyScanner(
+            self.snapshot, server_url=trivy_server, supervisor=self.supervisor, cache=self.cache,
+            cache_dir=self._path(self.images["trivy_cache_dir"]) if self.images.get("trivy_cache_dir") else None
+        )
+        self.tflint = TFLintScanner(self.snapshot, supervisor=self.supervisor, cache=self.cache)
+        self.checkov = CheckovScanner(self.snapshot, supervisor=self.supervisor, cache=self.cache)
+        
+        # Règles locales: les catégories couvertes ne sont plus demandées à Bedrock
+        self.rule_engine = RuleEngine(snapshot=self.snapshot) if self.config["scanners"].get("rules", False) else None
         
         # Bedrock client
         bedrock_config = self.config["bedrock"]
-        self.bedrock_client = BedrockClient(
-            model_id=bedrock_config["model_id"],
-            region=bedrock_config["region"]
-        )
+        self.bedrock_client = bedrock_client if bedrock_client is not None else create_bedrock_client(bedrock_config)
         
         # AI Analyzers
-        self.terraform_analyzer = TerraformAnalyzer(self.bedrock_client)
-        self.docker_analyzer = DockerAnalyzer(self.bedrock_client)
-        self.code_analyzer = CodeAnalyzer(self.bedrock_client)
+        max_workers = bedrock_config.get("max_concurrency", 1)
+        compaction_config = self.config.get("prompt_compaction", {})
+        compact_prompts = compaction_config.get("enabled", False)
+        compact_responses = compaction_config.get("compact_responses", False)
+        self.terraform_analyzer = TerraformAnalyzer(
+            self.bedrock_client, max_workers, self.snapshot, self.cache,
+            self.rule_engine, self._create_similarity_index(),
+            block_granular=self.config.get("terraform_analysis", {}).get("block_granular", False),
+            compact_prompts=compact_prompts, compact_responses=compact_responses
+        )
+        self.docker_analyzer = DockerAnalyzer(
+            self.bedrock_client, max_workers, self.snapshot, self.cache,
+            self.rule_engine, self._create_similarity_index(),
+            compact_prompts, compact_responses,
+            stage_granular=self.docker_config.get("stage_granular", False)
+        )
+        self.code_analyzer = CodeAnalyzer(self.bedrock_client, max_workers, self.snapshot, self.cache,
+                                          None, self._create_similarity_index(), compact_prompts, compact_responses)
+        self.compose_analyzer = ComposeAnalyzer(self.bedrock_client, max_workers, self.snapshot, self.cache,
+                                                None, self._create_similarity_index(), compact_prompts, compact_responses)
+        self.analyzers = (self.terraform_analyzer, self.docker_analyzer, self.code_analyzer, self.compose_analyzer)
+        
+        for analyzer in self.analyzers:
+            analyzer.executor = executor
         
         # Gatekeeper et Reporter
-        self.gatekeeper = Gatekeeper(self.config)
-        self.reporter = Reporter()
+        self.reports = ReportStages(self.config, root, log)
+        self.gatekeeper = self.reports.gatekeeper
+        self.reporter = self.reports.reporter
         
         self.results = []
+        self.extra_stages: List[Stage] = []
+        # Les étapes se terminent en parallèle: une ligne de log à la fois
+        self._log_lock = threading.Lock()
     
-    def run(self):
-        """Exécute le pipeline complet"""
-        print("=" * 60)
-        print("SMART DEVOPS PIPELINE - AI-POWERED SECURITY ANALYSIS")
-        print("=" * 60)
-        print()
-        
-        # Phase 1: Scanners classiques
-        print("[PHASE 1] Running Classic Scanners...")
-        print("-" * 60)
-        
-        if self.config["scanners"]["trivy"]:
-            print("\n[1/3] Trivy Scanner...")
-            trivy_result = self.trivy.scan_dockerfile()
-            if "error" not in trivy_result:
-                self.results.append(trivy_result)
-                print(f"  Found {trivy_result['summary']['total']} issues")
-            else:
-                print(f"  Warning: {trivy_result.get('error', 'Unknown error')}")
-        
-        if self.config["scanners"]["tflint"]:
-            print("\n[2/3] TFLint Scanner...")
-            tflint_result = self.tflint.scan_terraform()
-            if "error" not in tflint_result:
-                self.results.append(tflint_result)
-                print(f"  Found {tflint_result['summary']['total']} issues")
-            else:
-                print(f"  Warning: {tflint_result.get('error', 'Unknown error')}")
-        
-        if self.config["scanners"]["checkov"]:
-            print("\n[3/3] Checkov Scanner...")
-            checkov_result = self.checkov.scan_iac()
-            if "error" not in checkov_result:
-                self.results.append(checkov_result)
-                print(f"  Found {checkov_result['summary']['total']} issues")
-            else:
-                print(f"  Warning: {checkov_result.get('error', 'Unknown error')}")
-        
-        # Phase 2: AI Review
-        if self.config["scanners"]["ai_review"]:
-            print("\n\n[PHASE 2] AI-Powered Analysis (Amazon Bedrock)...")
-            print("-" * 60)
-            
-            print("\n[1/3] Analyzing Terraform with AI...")
-            terraform_result = self.terraform_analyzer.analyze_directory("terraform")
-            if "error" not in terraform_result:
-                self.results.append(terraform_result)
-                print(f"  Found {terraform_result['summary']['total']} issues")
-            else:
-                print(f"  Error: {terraform_result.get('error', 'Unknown error')}")
-            
-            print("\n[2/3] Analyzing Dockerfile with AI...")
-            docker_result = self.docker_analyzer.analyze_dockerfile()
-            if "error" not in docker_result:
-                self.results.append(docker_result)
-                print(f"  Found {docker_result['summary']['total']} issues")
-            else:
-                print(f"  Error: {docker_result.get('error', 'Unknown error')}")
-            
-            print("\n[3/3] Analyzing Code with AI...")
-            code_result = self.code_analyzer.analyze_directory("app")
-            if "error" not in code_result:
-                self.results.append(code_result)
-                print(f"  Found {code_result['summary']['total']} issues")
-            else:
-                print(f"  Error: {code_result.get('error', 'Unknown error')}")
-        
-        # Phase 3: Gatekeeper Decision
-        print("\n\n[PHASE 3] Gatekeeper Decision...")
-        print("-" * 60)
-        
-        gatekeeper_result = self.gatekeeper.evaluate(self.results)
-        
-        print(f"\nDecision: {gatekeeper_result['decision']}")
-        print(f"Risk Score: {gatekeeper_result['risk_score']}/100")
-        print(f"Total Issues: {gatekeeper_result['total_issues']}")
-        print(f"\nSeverity Breakdown:")
-        print(f"  Critical: {gatekeeper_result['severity_counts']['critical']}")
-        print(f"  High:     {gatekeeper_result['severity_counts']['high']}")
-        print(f"  Medium:   {gatekeeper_result['severity_counts']['medium']}")
-        print(f"  Low:      {gatekeeper_result['severity_counts']['low']}")
-        print(f"\nMessage: {gatekeeper_result['message']}")
-        
-        # Phase 4: Reporting
-        print("\n\n[PHASE 4] Generating Reports...")
-        print("-" * 60)
+    def _submit(self, fn: Callable, *args) -> Future:
+        """Exécute fn sur le pool partagé, ou immédiatement sans pool"""
+        if self.executor is not None:
+            return self.executor.submit(fn, *args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+    
+    def _path(self, path: str) -> str:
+        """Chemin relatif à la racine du dépôt analysé"""
+        return os.path.normpath(os.path.join(self.root, path))
+    
+    def _create_similarity_index(self):
+        """Un index par analyzer: les issues ne se partagent qu'entre fichiers de même type"""
+        similarity_config = self.config.get("similarity", {})
+        if not similarity_config.get("enabled", False):
+            return None
+        return SimilarityIndex(
+            threshold=similarity_config.get("threshold", 0.8),
+            max_changed_ratio=similarity_config.get("max_changed_ratio", 0.5)
+        )
+    
+    def _create_batch_backend(self):
+        """Backend du mode batch: S3 + Bedrock ou répertoire local"""
+        batch_config = self.config.get("batch", {})
         
-        json_report = self.reporter.generate_json_report(gatekeeper_result)
-        print(f"\nJSON Report: {json_report}")
+        if batch_config.get("backend", "s3") == "local":
+            return LocalDirectoryBackend(self._path(batch_config.get("local_dir", ".pipeline_batch")))
         
-        if self.config["reporting"]["generate_markdown"]:
-            md_report = self.reporter.generate_markdown_report(gatekeeper_result)
-            print(f"Markdown Report: {md_report}")
+        return S3BedrockBackend(
+            bucket=batch_config["s3_bucket"],
+            role_arn=batch_config["role_arn"],
+            prefix=batch_config.get("s3_prefix", "smart-pipeline/batch"),
+            region=self.config["bedrock"]["region"]
+        )
+    
+    def _run_ai_batch(self) -> List[Dict[str, Any]]:
+        """Analyse IA en mode batch: un seul job pour tous les fichiers"""
+        batch_config = self.config.get("batch", {})
+        runner = BatchRunner(
+            self.bedrock_client,
+            self._create_batch_backend(),
+            poll_interval=batch_config.get("poll_interval", 60),
+            timeout=batch_config.get("timeout", 86400),
+            min_records=batch_config.get("min_records", 100)
+        )
         
-        # Créer un fichier marker si BLOCK
-        if gatekeeper_result["decision"] == "BLOCK":
-            with open("pipeline_blocked.txt", "w") as f:
-                f.write(gatekeeper_result["message"])
-            print("\nPipeline BLOCKED - See pipeline_blocked.txt")
+        count = runner.add_source(self.terraform_analyzer, self.sources["terraform"])
+        count += sum(runner.add_file(self.docker_analyzer, path) for path in self.dockerfiles)
+        count += runner.add_source(self.code_analyzer, self.sources["code"])
+        count += sum(runner.add_file(self.compose_analyzer, path) for path in self.compose_files)
+        self.log(f"\n  Submitting {count} files...")
         
-        print("\n" + "=" * 60)
-        print("PIPELINE EXECUTION COMPLETED")
-        print("=" * 60)
+        results = []
+        for result in runner.run():
+            if "error" not in result:
+                results.append(result)
+            elif result.get("file"):
+                # Enregistrement en échec: les autres fichiers du job restent analysés
+                self.log(f"  Error: {result['file']}: {result['error']}")
+            else:
+                self.log(f"  Error: {result['error']}")
+        return results
+    
+    def run(self):
+        """Exécute le pipeline complet et termine le process selon la décision"""
+        gatekeeper_result = self.execute()
         
         # Exit code basé sur la décision
         if gatekeeper_result["decision"] == "BLOCK":
@@ -162,13 +294,373 @@ class SmartPipeline:
             sys.exit(0)  # Warning mais on laisse passer
         else:
             sys.exit(0)
+    
+    def add_stage(self, stage: Stage):
+        """Ajoute une étape (ex: un nouveau scanner produisant "results")"""
+        self.extra_stages.append(stage)
+    
+    def build_graph(self) -> StageGraph:
+        """Graphe des étapes: scanners et analyzers en parallèle, puis gatekeeper, puis rapports"""
+        graph = StageGraph(max_workers=self.config.get("stages", {}).get("max_workers", 8))
+        scanners = self.config["scanners"]
+        
+        # Triage: les analyzers attendent les findings des scanners pour les confirmer ou les écarter
+        triage = scanners["ai_review"] and not self.batch and self.config.get("triage", {}).get("enabled", False)
+        findings = "findings" if triage else "results"
+        
+        if scanners["trivy"]:
+            graph.add(self._result_stage("trivy", self.trivy.scan_dockerfiles, self.dockerfiles, output=findings))
+            if self.images.get("archives"):
+                graph.add(self._result_stage("trivy_image", self.trivy.scan_images, self.images["archives"], output=findings))
+        if scanners.get("trivy_fs"):
+            graph.add(self._result_stage("trivy_fs", self.trivy.scan_filesystem, ".", output=findings))
+        if scanners["tflint"]:
+            graph.add(self._result_stage("tflint", self.tflint.scan_terraform, self.sources["terraform"], output=findings))
+        if scanners["checkov"]:
+            graph.add(self._result_stage("checkov", self.checkov.scan_iac, output=findings))
+        if self.rule_engine is not None:
+            graph.add(self._result_stage("rules_terraform", self.rule_engine.scan_terraform, self.sources["terraform"]))
+            graph.add(self._result_stage("rules_docker", self.rule_engine.scan_dockerfiles, self.dockerfiles))
+        
+        if scanners["ai_review"] and self.batch:
+            graph.add(Stage("ai_batch", lambda inputs: self._run_ai_batch(), output="results"))
+        elif scanners["ai_review"]:
+            graph.add(self._ai_stage("ai_terraform", self.terraform_analyzer, self.terraform_analyzer.analyze_directory, self.sources["terraform"], triage))
+            graph.add(self._ai_stage("ai_docker", self.docker_analyzer, self.docker_analyzer.analyze_dockerfiles, self.dockerfiles, triage))
+            graph.add(self._ai_stage("ai_code", self.code_analyzer, self.code_analyzer.analyze_directory, self.sources["code"], triage))
+            if self.compose_files:
+                graph.add(self._ai_stage("ai_compose", self.compose_analyzer, self.compose_analyzer.analyze_compose_files, self.compose_files, triage))
+        
+        for stage in self.extra_stages:
+            graph.add(stage)
+        
+        graph.add(Stage("gatekeeper", self._gatekeeper_stage, inputs=["results", "findings"], output="decision"))
+        # Résultats bruts: la commande gate rejoue la décision et les rapports sans rescanner
+        if self.config["reporting"].get("raw_results"):
+            graph.add(Stage("raw_results", self._raw_results_stage, inputs=["results", "findings"]))
+        self.reports.add_to(graph)
+        
+        graph.subscribe("results", self._on_result)
+        graph.subscribe("findings", self._on_result)
+        return graph
+    
+    def execute(self) -> Dict[str, Any]:
+        """Exécute le pipeline complet et retourne le résultat du gatekeeper"""
+        self.log("=" * 60)
+        self.log("SMART DEVOPS PIPELINE - AI-POWERED SECURITY ANALYSIS")
+        self.log("=" * 60)
+        self.log()
+        
+        stats = self.snapshot.stats
+        self.log(f"Snapshot: {stats['files']} files ({stats['hashed']} hashed, {stats['reused']} unchanged, {stats['ignored']} ignored)")
+        self.log()
+        started = time.time()
+        
+        # Un pool commun aux analyzers: max_concurrency reste global même s'ils tournent ensemble
+        ai_pool = None
+        if self.executor is None:
+            ai_pool = ThreadPoolExecutor(max_workers=max(self.config["bedrock"].get("max_concurrency", 1), 1))
+            for analyzer in self.analyzers:
+                analyzer.executor = ai_pool
+        
+        graph = self.build_graph()
+        self.log(f"[STAGES] Running {len(graph.stages)} stages...")
+        self.log("-" * 60)
+        try:
+            artifacts = graph.run()
+        finally:
+            if ai_pool is not None:
+                ai_pool.shutdown()
+        
+        if self.config["scanners"]["ai_review"] and not self.batch:
+            self._log_ai_stats()
+        
+        self.snapshot.save_index()
+        self._record_history(artifacts["decision"][0], graph, time.time() - started)
+        self._log_timeline(graph)
+        self._log_process_usage()
+        
+        self.log("\n" + "=" * 60)
+        self.log("PIPELINE EXECUTION COMPLETED")
+        self.log("=" * 60)
+        
+        return artifacts["decision"][0]
+    
+    def _result_stage(self, name: str, fn: Callable, *args, pooled: bool = True, output: str = "results") -> Stage:
+        """Étape produisant un résultat de scanner; les erreurs sont loguées, pas publiées"""
+        def run(inputs: Dict[str, List[Any]]) -> Optional[Dict[str, Any]]:
+            result = self._submit(fn, *args).result() if pooled else fn(*args)
+            if "error" in result:
+                with self._log_lock:
+                    self.log(f"  [{name}] Warning: {result.get('error', 'Unknown error')}")
+                return None
+            return result
+        return Stage(name, run, output=output)
+    
+    def _ai_stage(self, name: str, analyzer: Any, fn: Callable, source: Any, triage: bool) -> Stage:
+        """Étape d'analyse IA; en triage elle reçoit d'abord les findings des scanners"""
+        # Les analyzers appellent le pool eux-mêmes: pas de _submit ici
+        stage = self._result_stage(name, fn, source, pooled=False)
+        if triage:
+            analyze = stage.run
+            
+            def run(inputs: Dict[str, List[Any]]) -> Optional[Dict[str, Any]]:
+                analyzer.set_findings(inputs["findings"])
+                return analyze(inputs)
+            stage.run, stage.inputs = run, ["findings"]
+        return stage
+    
+    def _on_result(self, stage: str, value: Any):
+        """Progression: chaque résultat est logué dès que son étape se termine"""
+        for result in value if isinstance(value, list) else [value]:
+            cached = " (cached)" if result.get("cached") else ""
+            total = result.get("summary", {}).get("total", 0)
+            with self._log_lock:
+                self.log(f"  [{stage}] {result.get('scanner', stage)}: {total} issues{cached}")
+    
+    def _gatekeeper_stage(self, inputs: Dict[str, List[Any]]) -> Dict[str, Any]:
+        self.results = self._collect(inputs)
+        return self.reports.evaluate(self.results, self.supervisor.stats())
+    
+    def _raw_results_stage(self, inputs: Dict[str, List[Any]]):
+        path = self._path(self.config["reporting"]["raw_results"])
+        size = save_results(path, self._collect(inputs), {
+            "root": os.path.abspath(self.root),
+            "process_usage": self.supervisor.stats()
+        })
+        self.log(f"Raw Results: {path} ({size / 1024:.0f} KB)")
+    
+    @staticmethod
+    def _collect(inputs: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        results = []
+        for value in inputs["results"] + inputs["findings"]:
+            results.extend(value if isinstance(value, list) else [value])
+        return results
+    
+    def _log_ai_stats(self):
+        if self.cache is not None:
+            cache_stats = self.cache.stats()
+            self.log(f"\n  Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        
+        analyzers = self.analyzers
+        if any(a.similarity is not None for a in analyzers):
+            reused = sum(a.similarity.stats()["reused"] for a in analyzers if a.similarity is not None)
+            remapped = sum(a.similarity.stats()["remapped_issues"] for a in analyzers if a.similarity is not None)
+            self.log(f"  Near-duplicates: {reused} files reused ({remapped} issues remapped)")
+        
+        compacted = [a.compaction for a in analyzers if a.compaction["excerpts"]]
+        if compacted:
+            # Tokens estimés: les préfixes "N|" coûtent des tokens que le gain en caractères ne montre pas
+            original = sum(c["original_tokens"] for c in compacted)
+            compact = sum(c["compact_tokens"] for c in compacted)
+            chars = (sum(c["original_chars"] for c in compacted), sum(c["compact_chars"] for c in compacted))
+            self.log(f"  Prompt compaction: {sum(c['excerpts'] for c in compacted)} files or excerpts, "
+                     f"~{original} -> ~{compact} tokens ({1 - compact / max(original, 1):.0%} saved; "
+                     f"{chars[0]} -> {chars[1]} chars)")
+        
+        usage = self.bedrock_client.get_usage()
+        self.log(f"\n  Bedrock calls: {usage['calls']}")
+        self.log(f"  Input tokens: {usage['input_tokens']} (cache read: {usage['cache_read_tokens']}, cache write: {usage['cache_write_tokens']})")
+        self.log(f"  Output tokens: {usage['output_tokens']}")
+        
+        if hasattr(self.bedrock_client, "get_endpoint_stats"):
+            for stats in self.bedrock_client.get_endpoint_stats():
+                self.log(f"  {stats['endpoint']}: {stats['requests']} requests, "
+                         f"{stats['throttles']} throttled, avg {stats['avg_latency']}s")
+        
+        if hasattr(self.bedrock_client, "get_hedge_stats"):
+            for stats in self.bedrock_client.get_hedge_stats():
+                self.log(f"  Hedging {stats['client']}: {stats['hedged']}/{stats['requests']} hedged "
+                         f"({stats['hedge_wins']} won), p99 {stats['p99']}s vs {stats['unhedged_p99']}s unhedged")
+        
+        if hasattr(self.bedrock_client, "get_tier_stats"):
+            for stats in self.bedrock_client.get_tier_stats():
+                self.log(f"  {stats['tier']}: {stats['calls']} calls, {stats['escalated']} escalated "
+                         f"({stats['escalation_rate']:.0%}), avg {stats['avg_latency']}s, ${stats['cost']}")
+    
+    def _log_process_usage(self):
+        """Consommation des outils externes, pour dimensionner les runners"""
+        for stats in self.supervisor.stats():
+            timeouts = f", {stats['timeouts']} timed out" if stats["timeouts"] else ""
+            self.log(f"  {stats['tool']}: {stats['runs']} runs, {stats['wall_time']:.1f}s wall, "
+                     f"{stats['cpu_time']:.1f}s CPU, peak RSS {stats['max_rss_mb']:.0f} MB{timeouts}")
+    
+    def _record_history(self, gatekeeper_result: Dict[str, Any], graph: StageGraph, duration: float):
+        """Ajoute le run à l'historique en colonnes (requêtes: pipeline history)"""
+        history_config = self.config.get("history", {})
+        if not history_config.get("enabled", True):
+            return
+        
+        scanner_of = {id(issue): result.get("scanner", "") for result in self.results for issue in result.get("issues", [])}
+        run = dict(
+            gatekeeper_result["severity_counts"],
+            timestamp=time.time(),
+            repo=history_config.get("repo") or os.path.basename(os.path.abspath(self.root)),
+            decision=gatekeeper_result["decision"],
+            risk_score=gatekeeper_result["risk_score"],
+            total_issues=gatekeeper_result["total_issues"],
+            duration=duration
+        )
+        issues = [
+            {
+                "scanner": scanner_of.get(id(issue), ""),
+                "rule": rule_of(issue),
+                "severity": issue.get("severity", ""),
+                "file": issue.get("file", "")
+            }
+            for issue in gatekeeper_result["all_issues"]
+        ]
+        phases = [{"stage": entry["stage"], "duration": entry["duration"]} for entry in graph.timeline]
+        files = [
+            {"file": file_path, "duration": elapsed}
+            for analyzer in self.analyzers
+            for file_path, elapsed in analyzer.timings
+        ]
+        
+        try:
+            HistoryStore(history_directory(self.config)).append(run, issues, phases, files)
+        except OSError as e:
+            self.log(f"  [history] Warning: {e}")
+    
+    def _log_timeline(self, graph: StageGraph):
+        """Durée de chaque étape et chemin critique"""
+        timeline = sorted(graph.timeline, key=lambda e: e["start"])
+        if not timeline:
+            return
+        wall = max(e["end"] for e in timeline)
+        total = sum(e["duration"] for e in timeline)
+        self.log(f"\nTimeline ({wall:.1f}s wall, {total:.1f}s of stage time):")
+        for entry in timeline:
+            self.log(f"  {entry['stage']:<16} {entry['start']:>7.2f}s -> {entry['end']:>7.2f}s")
+        self.log(f"Critical path: {' -> '.join(graph.critical_path())}")
+
+
+def run_remote(address: str, root: str, batch: bool = False):
+    """Soumet le job au daemon (pipeline serve) et affiche ses logs en continu"""
+    from server import submit_job
+    
+    decision = None
+    for event in submit_job(address, root, batch):
+        if event["event"] == "log":
+            print(event["message"])
+        elif event["event"] == "result":
+            decision = event["decision"]
+        else:
+            print(f"\n\nERROR: {event.get('error', 'Unknown error')}")
+            sys.exit(1)
+    
+    sys.exit(1 if decision == "BLOCK" else 0)
+
+
+def run_projects(config_path: str, manifest_path: str, workers: int, max_projects: int):
+    """Analyse tous les projets du manifest et écrit le rapport agrégé"""
+    from multi_project import MultiProjectRunner
+    
+    runner = MultiProjectRunner(config_path, manifest_path, max_workers=workers, max_projects=max_projects)
+    summaries = runner.run()
+    report = runner.write_report(summaries)
+    
+    print("\n" + "=" * 60)
+    for summary in summaries:
+        counts = summary.get("severity_counts", {})
+        print(f"{summary['decision']:<6} {summary['name']:<40} "
+              f"critical={counts.get('critical', 0)} high={counts.get('high', 0)} ({summary['duration']}s)")
+    print(f"\nAggregate Report: {report}")
+    
+    failed = [s for s in summaries if s["decision"] in ("BLOCK", "ERROR")]
+    sys.exit(1 if failed else 0)
+
+
+def run_history(config_path: str, query: str, repo: Optional[str], since: Optional[str],
+                period: str, limit: int, as_json: bool):
+    """Tendances de l'historique des runs: score de risque, règles, fichiers lents, étapes"""
+    from history import parse_since
+    
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    store = HistoryStore(history_directory(config))
+    since_ts = parse_since(since)
+    
+    queries = {
+        "risk": lambda: store.risk_trend(repo, since_ts, period),
+        "rules": lambda: store.top_rules(repo, since_ts, limit),
+        "files": lambda: store.slowest_files(repo, since_ts, limit),
+        "phases": lambda: store.phase_durations(repo, since_ts)
+    }
+    rows = queries[query]()
+    
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("No history")
+        return
+    columns = list(rows[0])
+    widths = {c: max([len(c)] + [len(str(row[c])) for row in rows]) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def run_gate(config_path: str, results_path: str):
+    """Rejoue le gatekeeper et les rapports sur les résultats bruts d'un run, avec la configuration actuelle"""
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    
+    started = time.time()
+    saved = load_results(results_path)
+    reports = ReportStages(config)
+    
+    graph = StageGraph()
+    graph.add(Stage("gatekeeper", lambda inputs: reports.evaluate(saved["results"], saved.get("process_usage")), output="decision"))
+    reports.add_to(graph)
+    gatekeeper_result = graph.run()["decision"][0]
+    print(f"Re-gated {len(saved['results'])} results from {results_path} in {(time.time() - started) * 1000:.0f} ms")
+    
+    sys.exit(1 if gatekeeper_result["decision"] == "BLOCK" else 0)
 
 
 def main():
     """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Smart DevOps Pipeline")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "serve", "projects", "history", "gate"],
+                        help="run: analyse le dépôt courant, serve: démarre le daemon, projects: analyse les projets d'un manifest, "
+                             "history: tendances des runs précédents, gate: re-décide à partir des résultats bruts d'un run")
+    parser.add_argument("query", nargs="?", default="risk", choices=["risk", "rules", "files", "phases"],
+                        help="history: score de risque, règles récurrentes, fichiers lents ou durée des étapes")
+    parser.add_argument("--config", default="pipeline/config.json", help="Chemin du fichier de configuration")
+    parser.add_argument("--batch", action="store_true", help="Analyse IA via Bedrock Batch Inference (scans nocturnes)")
+    parser.add_argument("--daemon", help="Adresse d'un daemon (unix:///tmp/pipeline.sock ou http://127.0.0.1:8765)")
+    parser.add_argument("--socket", help="serve: socket Unix d'écoute")
+    parser.add_argument("--host", default="127.0.0.1", help="serve: adresse HTTP d'écoute")
+    parser.add_argument("--port", type=int, default=8765, help="serve: port HTTP d'écoute")
+    parser.add_argument("--max-jobs", type=int, default=4, help="serve: nombre de jobs simultanés")
+    parser.add_argument("--manifest", default="projects.json", help="projects: manifest des projets")
+    parser.add_argument("--workers", type=int, default=8, help="projects: taille du pool partagé")
+    parser.add_argument("--max-projects", type=int, default=8, help="projects: projets traités simultanément")
+    parser.add_argument("--results", default="pipeline_results.bin", help="gate: artefact des résultats bruts")
+    parser.add_argument("--repo", help="history: limite à un dépôt")
+    parser.add_argument("--since", help="history: période (30d, 12w, 6m) ou date (2026-01-01)")
+    parser.add_argument("--period", default="day", choices=["day", "week", "month"], help="history risk: regroupement")
+    parser.add_argument("--limit", type=int, default=10, help="history: nombre de lignes")
+    parser.add_argument("--json", action="store_true", help="history: sortie JSON")
+    args = parser.parse_args()
+    
     try:
-        pipeline = SmartPipeline()
-        pipeline.run()
+        if args.command == "serve":
+            from server import serve
+            serve(args.config, socket_path=args.socket, host=args.host, port=args.port, max_jobs=args.max_jobs)
+        elif args.command == "gate":
+            run_gate(args.config, args.results)
+        elif args.command == "history":
+            run_history(args.config, args.query, args.repo, args.since, args.period, args.limit, args.json)
+        elif args.command == "projects":
+            run_projects(args.config, args.manifest, args.workers, args.max_projects)
+        elif args.daemon:
+            run_remote(args.daemon, ".", batch=args.batch)
+        else:
+            pipeline = SmartPipeline(args.config, batch=args.batch)
+            pipeline.run()
     except KeyboardInterrupt:
         print("\n\nPipeline interrupted by user")
         sys.exit(130)
@@ -178,6 +670,5 @@ def main():
         traceback.print_exc()
         sys.exit(1)
 
-
 if __name__ == "__main__":
     main()
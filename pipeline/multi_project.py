@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Multi Project - Analyse de nombreux dépôts sur un pool de workers partagé
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional
+
+from ai.bedrock_pool import create_bedrock_client
+from main import SmartPipeline
+from result_cache import ResultCache
+
+
+class FairSharePool:
+    """Pool de threads avec une file par projet, servies à tour de rôle.
+
+    Un projet avec des centaines de fichiers n'affame pas les autres: chaque
+    worker prend la tâche suivante du prochain projet ayant du travail en
+    attente (round-robin), quel que soit l'ordre de soumission.
+    """
+    
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._queues: Dict[str, deque] = {}
+        self._ready: deque = deque()
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+    
+    def submit(self, project: str, fn: Callable, *args) -> Future:
+        """Ajoute une tâche dans la file du projet"""
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Pool is shut down")
+            queue = self._queues.setdefault(project, deque())
+            if not queue:
+                self._ready.append(project)
+            queue.append((future, fn, args))
+            self._condition.notify()
+        return future
+    
+    def executor(self, project: str) -> "ProjectExecutor":
+        """Vue du pool limitée à un projet (interface submit/map d'un executor)"""
+        return ProjectExecutor(self, project)
+    
+    def shutdown(self):
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+    
+    def _next_task(self) -> Optional[tuple]:
+        with self._condition:
+            while not self._ready and not self._shutdown:
+                self._condition.wait()
+            if not self._ready:
+                return None
+            project = self._ready.popleft()
+            queue = self._queues[project]
+            task = queue.popleft()
+            # Le projet repasse en fin de tour s'il lui reste du travail
+            if queue:
+                self._ready.append(project)
+            return task
+    
+    def _work(self):
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            future, fn, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class ProjectExecutor:
+    """Soumission au pool partagé au nom d'un projet"""
+    
+    def __init__(self, pool: FairSharePool, project: str):
+        self.pool = pool
+        self.project = project
+    
+    def submit(self, fn: Callable, *args) -> Future:
+        return self.pool.submit(self.project, fn, *args)
+    
+    def map(self, fn: Callable, items: Iterable[Any]) -> Iterator[Any]:
+        futures = [self.submit(fn, item) for item in items]
+        return (future.result() for future in futures)
+
+
+def merge_config(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Fusion récursive: les sections de overrides complètent celles de base"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class MultiProjectRunner:
+    """Exécute le pipeline sur tous les projets d'un manifest.
+
+    Le manifest liste les projets: {"projects": [{"name", "root", "config"}]}
+    où "config" surcharge la configuration de base (sources, scanners,
+    thresholds...). Le client Bedrock, le cache de résultats et le pool de
+    workers sont uniques; la section bedrock des surcharges est ignorée.
+    """
+    
+    def __init__(self, config_path: str, manifest_path: str, max_workers: int = 8,
+                 max_projects: int = 8, log: Callable[..., None] = print):
+        with open(config_path, 'r') as f:
+            self.config = json.load(f)
+        with open(manifest_path, 'r') as f:
+            self.manifest = json.load(f)
+        
+        # Racines relatives au manifest
+        self.base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self.max_workers = max_workers
+        self.max_projects = max_projects
+        self.log = log
+        
+        self.bedrock_client = create_bedrock_client(self.config["bedrock"])
+        cache_config = self.config.get("cache", {})
+        cache_dir = cache_config.get("directory", ".pipeline_cache")
+        self.cache = ResultCache(os.path.join(cache_dir, "results"), cache_config.get("memory_entries")) \
+            if cache_config.get("enabled", True) else None
+        
+        self._log_lock = threading.Lock()
+    
+    def projects(self) -> List[Dict[str, Any]]:
+        projects = []
+        for index, project in enumerate(self.manifest.get("projects", [])):
+            root = os.path.normpath(os.path.join(self.base_dir, project["root"]))
+            projects.append({
+                "name": project.get("name") or os.path.basename(root) or f"project-{index}",
+                "root": root,
+                "config": project.get("config", {})
+            })
+        return projects
+    
+    def run(self) -> List[Dict[str, Any]]:
+        """Exécute tous les projets et retourne leur résumé, dans l'ordre du manifest"""
+        projects = self.projects()
+        pool = FairSharePool(self.max_workers)
+        # Les threads de projet orchestrent; le travail tourne sur le pool
+        slots = threading.BoundedSemaphore(self.max_projects)
+        summaries: List[Optional[Dict[str, Any]]] = [None] * len(projects)
+        
+        def drive(index: int, project: Dict[str, Any]):
+            with slots:
+                summaries[index] = self._run_project(project, pool)
+        
+        threads = [threading.Thread(target=drive, args=item, daemon=True) for item in enumerate(projects)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            pool.shutdown()
+        
+        return summaries
+    
+    def _run_project(self, project: Dict[str, Any], pool: FairSharePool) -> Dict[str, Any]:
+        lines: List[str] = []
+        started = time.time()
+        summary = {"name": project["name"], "root": project["root"]}
+        
+        try:
+            if not os.path.isdir(project["root"]):
+                raise FileNotFoundError(f"Directory not found: {project['root']}")
+            
+            overrides = {k: v for k, v in project["config"].items() if k != "bedrock"}
+            # Historique commun à tous les projets, chacun sous son nom
+            overrides = merge_config({"history": {"repo": project["name"]}}, overrides)
+            pipeline = SmartPipeline(
+                root=project["root"],
+                config=merge_config(self.config, overrides),
+                bedrock_client=self.bedrock_client,
+                cache=self.cache,
+                log=lambda *args: lines.append(" ".join(str(a) for a in args)),
+                executor=pool.executor(project["name"])
+            )
+            result = pipeline.execute()
+            summary.update({
+                "decision": result["decision"],
+                "risk_score": result["risk_score"],
+                "severity_counts": result["severity_counts"],
+                "total_issues": result["total_issues"]
+            })
+        except Exception as e:
+            summary.update({"decision": "ERROR", "error": str(e)})
+        
+        summary["duration"] = round(time.time() - started, 1)
+        if lines and os.path.isdir(project["root"]):
+            with open(os.path.join(project["root"], "pipeline_run.log"), 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        
+        # Log du projet d'un seul bloc, pour ne pas entrelacer les projets
+        with self._log_lock:
+            self.log(f"\n### {project['name']}: {summary['decision']} ({summary['duration']}s)")
+            if summary["decision"] == "ERROR":
+                self.log(f"  Error: {summary['error']}")
+            else:
+                self.log(f"  Reports: {project['root']}")
+        return summary
+    
+    def write_report(self, summaries: List[Dict[str, Any]], output_file: str = "pipeline_projects_report.json") -> str:
+        """Rapport agrégé de tous les projets"""
+        decisions = {}
+        for summary in summaries:
+            decisions[summary["decision"]] = decisions.get(summary["decision"], 0) + 1
+        
+        totals = {"critical": 0, "high": 0, "medium": 0, "low": 0}
+        for summary in summaries:
+            for severity, count in summary.get("severity_counts", {}).items():
+                totals[severity] = totals.get(severity, 0) + count
+        
+        report = {
+            "projects": len(summaries),
+            "decisions": decisions,
+            "severity_counts": totals,
+            "bedrock_usage": self.bedrock_client.get_usage(),
+            "results": summaries
+        }
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        return output_file
+
+
+def main():
+    """Test du pool: répartition des tâches entre projets"""
+    pool = FairSharePool(max_workers=2)
+    order = []
+    lock = threading.Lock()
+    
+    def task(name):
+        time.sleep(0.01)
+        with lock:
+            order.append(name)
+    
+    futures = [pool.submit("big", task, f"big-{i}") for i in range(6)]
+    futures += [pool.submit("small", task, f"small-{i}") for i in range(2)]
+    for future in futures:
+        future.result()
+    pool.shutdown()
+    print("Execution order:", order)
+
+
+if __name__ == "__main__":
+    main()
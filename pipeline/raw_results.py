@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Raw Results - Artefact binaire des résultats normalisés, pour re-décider sans rescanner
+"""
+
+import json
+import os
+import time
+import zlib
+from typing import Dict, List, Any, Optional
+
+
+MAGIC = b"SPRR"
+FORMAT_VERSION = 1
+
+
+def save_results(path: str, results: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None) -> int:
+    """Écrit les résultats de tous les composants (scanners, règles, IA); retourne la taille.
+
+    Format: MAGIC, un octet de version, puis le JSON compact compressé par
+    zlib. Les issues répètent beaucoup de chaînes (sévérités, fichiers,
+    règles): la compression divise typiquement la taille par 10, et la
+    relecture reste de l'ordre de la milliseconde.
+    """
+    payload = dict(metadata or {}, created_at=time.time(), results=results)
+    data = MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(
+        json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Relit un artefact: {"created_at", "results", ...métadonnées}"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a raw results artifact: {path}")
+    version = data[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported raw results version {version}: {path}")
+    return json.loads(zlib.decompress(data[len(MAGIC) + 1:]).decode("utf-8"))
+
+
+def main():
+    """Test: écriture puis relecture de 50 000 issues"""
+    import random
+    import tempfile
+    
+    random.seed(1)
+    results = [{
+        "scanner": "checkov",
+        "issues": [
+            {"severity": random.choice(["critical", "high", "medium"]), "title": f"Check {random.randint(0, 100)}",
+             "file": f"terraform/{random.randint(0, 50)}.tf", "line": random.randint(1, 500), "confidence": 0.95}
+            for _ in range(50000)
+        ]
+    }]
+    path = os.path.join(tempfile.mkdtemp(), "pipeline_results.bin")
+    size = save_results(path, results, {"root": "."})
+    started = time.time()
+    loaded = load_results(path)
+    print(f"{size / 1024:.0f} KB, loaded {len(loaded['results'][0]['issues'])} issues in {(time.time() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import json
 from datetime import datetime
 from typing import Dict, Any
 
+from issue_index import IssueIndex
+
 
 class Reporter:
     def __init__(self):
@@ -14,17 +16,31 @@ class Reporter:
     
     def generate_json_report(self, gatekeeper_result: Dict[str, Any], output_file: str = "pipeline_report.json") -> str:
         """Génère un rapport JSON"""
+        index = self._index(gatekeeper_result)
         report = {
             "timestamp": self.timestamp,
             "decision": gatekeeper_result["decision"],
             "risk_score": gatekeeper_result["risk_score"],
             "severity_counts": gatekeeper_result["severity_counts"],
             "total_issues": gatekeeper_result["total_issues"],
-            "issues": gatekeeper_result["all_issues"]
+            "top_rules": [{"rule": rule, "count": count} for rule, count in index.top_rules(10)]
         }
+        if gatekeeper_result.get("process_usage"):
+            report["process_usage"] = gatekeeper_result["process_usage"]
+        lists = {"issues": index.issues}
+        if gatekeeper_result.get("dismissed_issues"):
+            lists["dismissed_issues"] = gatekeeper_result["dismissed_issues"]
         
+        # En-tête indenté; une issue par ligne, sérialisée par l'encodeur C de json
+        # (indent force l'encodeur Python, plusieurs fois plus lent sur de longues listes)
+        header = json.dumps(report, indent=2)[:-2]
         with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+            f.write(header)
+            for name, issues in lists.items():
+                f.write(f',\n  "{name}": [')
+                f.write(",".join("\n    " + json.dumps(issue) for issue in issues))
+                f.write("\n  ]" if issues else "]")
+            f.write("\n}\n")
         
         return output_file
     
@@ -33,7 +49,7 @@ class Reporter:
         decision = gatekeeper_result["decision"]
         risk_score = gatekeeper_result["risk_score"]
         severity_counts = gatekeeper_result["severity_counts"]
-        issues_by_file = gatekeeper_result["issues_by_file"]
+        index = self._index(gatekeeper_result)
         
         # Badge pour la décision
         decision_badge = {
@@ -66,26 +82,28 @@ class Reporter:
 
 """
         
-        for file_path, issues in issues_by_file.items():
-            md += f"\n### {file_path}\n\n"
+        # Morceaux joints une seule fois à la fin, plutôt que des concaténations successives
+        parts = [md]
+        for file_path, issues in index.by_file.items():
+            parts.append(f"\n### {file_path}\n\n")
             
             for issue in issues:
                 severity_badge = self._get_severity_badge(issue.get("severity", "unknown"))
-                md += f"**{severity_badge} {issue.get('title', 'Unknown')}**\n\n"
-                md += f"- **Line:** {issue.get('line', 'N/A')}\n"
-                md += f"- **Description:** {issue.get('description', 'No description')}\n"
+                parts.append(f"**{severity_badge} {issue.get('title', 'Unknown')}**\n\n")
+                parts.append(f"- **Line:** {issue.get('line', 'N/A')}\n")
+                parts.append(f"- **Description:** {issue.get('description', 'No description')}\n")
                 
                 if issue.get('recommendation'):
-                    md += f"- **Recommendation:** {issue.get('recommendation')}\n"
+                    parts.append(f"- **Recommendation:** {issue.get('recommendation')}\n")
                 
-                md += f"- **Confidence:** {issue.get('confidence', 1.0):.0%}\n"
-                md += f"- **Type:** {issue.get('type', 'unknown')}\n\n"
+                parts.append(f"- **Confidence:** {issue.get('confidence', 1.0):.0%}\n")
+                parts.append(f"- **Type:** {issue.get('type', 'unknown')}\n\n")
         
-        md += "\n---\n\n"
-        md += "Generated by Smart DevOps Pipeline with AI-powered analysis\n"
+        parts.append("\n---\n\n")
+        parts.append("Generated by Smart DevOps Pipeline with AI-powered analysis\n")
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(md)
+            f.write("".join(parts))
         
         return output_file
     
@@ -129,15 +147,26 @@ class Reporter:
             comment += "\n**Status:** All checks passed!\n"
         
         # Ajouter top 5 issues
-        all_issues = gatekeeper_result["all_issues"]
-        critical_and_high = [i for i in all_issues if i.get("severity") in ["critical", "high"]]
+        top_issues = self._index(gatekeeper_result).top(5, ("critical", "high"))
         
-        if critical_and_high:
+        if top_issues:
             comment += "\n### Top Issues\n\n"
-            for issue in critical_and_high[:5]:
+            for issue in top_issues:
                 comment += f"- **[{issue.get('severity', '').upper()}]** {issue.get('title', 'Unknown')} in `{issue.get('file', 'unknown')}`\n"
         
         return comment
+    
+    def generate_github_comment_file(self, gatekeeper_result: Dict[str, Any], output_file: str = "pipeline_comment.md") -> str:
+        """Écrit le commentaire de PR dans un fichier (posté par le workflow)"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(self.generate_github_comment(gatekeeper_result))
+        return output_file
+    
+    @staticmethod
+    def _index(gatekeeper_result: Dict[str, Any]) -> IssueIndex:
+        """Index du gatekeeper; reconstruit pour un résultat qui n'en a pas"""
+        index = gatekeeper_result.get("index")
+        return index if index is not None else IssueIndex(gatekeeper_result["all_issues"])
 
 
 def main():
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Result Cache - Cache disque des résultats, indexé par hash de contenu
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class ResultCache:
+    """Cache clé -> valeur JSON, un fichier par clé.
+
+    Les clés sont construites à partir des hashes de contenu du snapshot
+    (plus modèle, prompt, version d'outil...), donc un arbre inchangé
+    réutilise directement les résultats du run précédent.
+    
+    Les valeurs lues ou écrites restent aussi en mémoire; avec
+    max_memory_entries (process longs: daemon, multi-projets) seules les
+    plus récemment utilisées sont gardées, les autres sont relues du disque.
+    """
+    
+    def __init__(self, directory: str = ".pipeline_cache/results", max_memory_entries: Optional[int] = None):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Construit une clé stable à partir de plusieurs composants"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur en cache ou None"""
+        with self._lock:
+            if key in self._memory:
+                self.hits += 1
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self._remember(key, value)
+            self.hits += 1
+        return value
+    
+    def set(self, key: str, value: Any):
+        """Enregistre une valeur (écriture atomique)"""
+        with self._lock:
+            self._remember(key, value)
+        
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+    
+    def _remember(self, key: str, value: Any):
+        """Garde une valeur en mémoire, en évinçant la moins récemment utilisée (appelé sous _lock)"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if self.max_memory_entries is not None:
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
@@ -0,0 +1,5 @@
+from .engine import RuleEngine
+from .hcl_parser import parse_hcl
+from .dockerfile_parser import parse_dockerfile
+
+__all__ = ['RuleEngine', 'parse_hcl', 'parse_dockerfile']
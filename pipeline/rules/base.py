@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rules Base - Définition des règles locales et de leur contexte d'évaluation
+"""
+
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+
+
+class Rule:
+    """Une règle locale.
+
+    category est le numéro de catégorie du prompt de l'analyzer IA que la
+    règle vérifie. Avec full_coverage, la règle fait toutes les vérifications
+    de la catégorie et celle-ci n'est plus demandée au modèle; sinon la
+    catégorie reste dans le prompt et les findings de la règle sont joints
+    au fichier comme contexte.
+    """
+    
+    def __init__(self, rule_id: str, language: str, category: int, severity: str,
+                 title: str, recommendation: str, check: Callable, full_coverage: bool = False):
+        self.rule_id = rule_id
+        self.language = language
+        self.category = category
+        self.severity = severity
+        self.title = title
+        self.recommendation = recommendation
+        self.check = check
+        self.full_coverage = full_coverage
+
+
+class RuleContext:
+    """Informations partagées par les règles pendant l'évaluation d'un fichier"""
+    
+    def __init__(self, file_path: str, exists: Callable[[str], bool], flags: Optional[Dict[str, Any]] = None):
+        self.file_path = file_path
+        self.exists = exists
+        self.flags = flags or {}
+
+
+# Finding produit par une règle: (ligne, ressource, description[, severity])
+Finding = Tuple
+
+
+def rule(registry: List[Rule], rule_id: str, language: str, category: int, severity: str,
+         title: str, recommendation: str, full_coverage: bool = False) -> Callable:
+    """Décorateur d'enregistrement d'une règle dans un registre"""
+    def decorator(check: Callable[[Any, RuleContext], Iterable[Finding]]) -> Callable:
+        registry.append(Rule(rule_id, language, category, severity, title, recommendation, check, full_coverage))
+        return check
+    return decorator
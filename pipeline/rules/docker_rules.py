@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Docker Rules - Règles locales pour les Dockerfiles
+"""
+
+import os
+import re
+from typing import List, Iterator
+from .base import Rule, RuleContext, Finding, rule
+from .dockerfile_parser import Instruction, split_stages
+
+
+DOCKER_RULES: List[Rule] = []
+
+SECRET_NAME = re.compile(r"(password|passwd|secret|token|api_?key|private_?key|access_?key|credential)", re.IGNORECASE)
+SECRET_VALUE = re.compile(r"(AKIA[0-9A-Z]{16}|sk-[A-Za-z0-9]{10,}|ghp_[A-Za-z0-9]{20,}|://[^:/\s]+:[^@/\s]+@)")
+BUILD_COMMAND = re.compile(r"\b(npm run build|yarn build|go build|mvn |gradle |make\b|cargo build|pip wheel)")
+NPM_INSTALL = re.compile(r"\bnpm (install|i)\b(?!\s+[^-\s&|;])")
+
+
+def _env_pairs(instruction: Instruction) -> Iterator[tuple]:
+    """(nom, valeur) d'une instruction ENV ou ARG"""
+    value = instruction.value
+    if "=" not in value.split(" ")[0]:
+        # Forme historique: ENV KEY value
+        name, _, rest = value.partition(" ")
+        yield name, rest.strip()
+        return
+    for match in re.finditer(r'([\w.-]+)=("(?:[^"\\]|\\.)*"|\S*)', value):
+        yield match.group(1), match.group(2).strip('"')
+
+
+@rule(DOCKER_RULES, "DF-UNPINNED-IMAGE", "dockerfile", 1, "high",
+      "Image de base sans version spécifique",
+      "Utiliser un tag précis, idéalement avec digest (ex: FROM node:20.11-alpine@sha256:...).")
+def unpinned_image(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    stages = split_stages(instructions)
+    aliases = {s.alias.lower() for s in stages if s.alias}
+    for stage in stages:
+        image = stage.image
+        if image.lower() == "scratch" or image.lower() in aliases or "@sha256:" in image or "$" in image:
+            continue
+        name = image.rsplit("/", 1)[-1]
+        tag = name.split(":", 1)[1] if ":" in name else None
+        if tag is None or tag == "latest":
+            yield stage.line, image, f"FROM {image} n'est pas épinglé sur une version."
+
+
+@rule(DOCKER_RULES, "DF-NO-MULTISTAGE", "dockerfile", 2, "low",
+      "Absence de multi-stage build",
+      "Séparer build et runtime (FROM node:20 AS build ... FROM node:20-alpine + COPY --from=build).")
+def no_multistage(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    stages = split_stages(instructions)
+    if len(stages) != 1:
+        return
+    builds = [i for i in stages[0].instructions if i.keyword == "RUN" and BUILD_COMMAND.search(i.value)]
+    if builds:
+        yield builds[0].line, None, "L'image finale contient les outils et dépendances de build."
+
+
+@rule(DOCKER_RULES, "DF-ROOT-USER", "dockerfile", 3, "high",
+      "Container exécuté en root",
+      "Créer et utiliser un utilisateur non-root (ex: USER node) dans le stage final.",
+      full_coverage=True)
+def root_user(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    stages = split_stages(instructions)
+    if not stages:
+        return
+    final = stages[-1]
+    users = [i for i in final.instructions if i.keyword == "USER"]
+    if not users:
+        yield final.line, None, "Aucune instruction USER: le container tourne en root."
+    elif users[-1].value.split(":")[0] in ("root", "0"):
+        yield users[-1].line, None, f"USER {users[-1].value} exécute le container en root."
+
+
+@rule(DOCKER_RULES, "DF-NO-HEALTHCHECK", "dockerfile", 6, "low",
+      "Absence de HEALTHCHECK",
+      'Ajouter un HEALTHCHECK (ex: HEALTHCHECK CMD wget -qO- http://localhost:3000/ || exit 1).',
+      full_coverage=True)
+def no_healthcheck(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    stages = split_stages(instructions)
+    if stages and not any(i.keyword == "HEALTHCHECK" for i in stages[-1].instructions):
+        yield stages[-1].end_line, None, "Aucun HEALTHCHECK dans le stage final."
+
+
+@rule(DOCKER_RULES, "DF-ENV-SECRET", "dockerfile", 8, "critical",
+      "Secret en clair dans ENV/ARG",
+      "Passer les secrets au runtime (secrets manager, variables d'environnement du déploiement) ou via RUN --mount=type=secret.")
+def env_secret(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    for instruction in instructions:
+        if instruction.keyword not in ("ENV", "ARG"):
+            continue
+        for name, value in _env_pairs(instruction):
+            if value and (SECRET_NAME.search(name) or SECRET_VALUE.search(value)):
+                yield instruction.line, name, f"{instruction.keyword} {name} contient une valeur sensible en clair."
+
+
+@rule(DOCKER_RULES, "DF-COPY-ALL", "dockerfile", 9, "medium",
+      "COPY . . sans .dockerignore",
+      "Ajouter un .dockerignore (node_modules, .git, .env...) ou copier uniquement les fichiers nécessaires.",
+      full_coverage=True)
+def copy_all(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    dockerignore = os.path.join(os.path.dirname(context.file_path), ".dockerignore")
+    if context.exists(dockerignore):
+        return
+    for instruction in instructions:
+        args = [a for a in instruction.value.split() if not a.startswith("--")]
+        if instruction.keyword in ("COPY", "ADD") and args[:1] == ["."]:
+            yield instruction.line, None, f"{instruction.keyword} {instruction.value} copie tout le contexte sans .dockerignore."
+
+
+@rule(DOCKER_RULES, "DF-NPM-INSTALL", "dockerfile", 10, "medium",
+      "npm install au lieu de npm ci",
+      "Utiliser npm ci (ex: RUN npm ci --omit=dev) pour une installation reproductible basée sur package-lock.json.",
+      full_coverage=True)
+def npm_install(instructions: List[Instruction], context: RuleContext) -> Iterator[Finding]:
+    for instruction in instructions:
+        if instruction.keyword == "RUN" and NPM_INSTALL.search(instruction.value):
+            yield instruction.line, None, f"RUN {instruction.value} n'est pas reproductible."
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Dockerfile Parser - Découpage d'un Dockerfile en instructions et stages
+"""
+
+import re
+from typing import List, Optional
+
+
+FROM_PATTERN = re.compile(r'^(?:--platform=\S+\s+)?(\S+)(?:\s+AS\s+(\S+))?', re.IGNORECASE)
+
+
+class Instruction:
+    """Une instruction Dockerfile (continuations de ligne recollées)"""
+    
+    def __init__(self, keyword: str, value: str, line: int, end_line: int, stage: int):
+        self.keyword = keyword
+        self.value = value
+        self.line = line
+        self.end_line = end_line
+        self.stage = stage
+    
+    def __repr__(self):
+        return f"{self.keyword} {self.value}"
+
+
+class Stage:
+    """Un build stage: image de base, alias et instructions"""
+    
+    def __init__(self, index: int, image: str, alias: Optional[str], line: int):
+        self.index = index
+        self.image = image
+        self.alias = alias
+        self.line = line
+        self.instructions: List[Instruction] = []
+    
+    @property
+    def end_line(self) -> int:
+        return self.instructions[-1].end_line if self.instructions else self.line
+
+
+def parse_dockerfile(content: str) -> List[Instruction]:
+    """Parse un Dockerfile en liste d'instructions"""
+    instructions = []
+    stage = -1
+    lines = content.splitlines()
+    i = 0
+    
+    while i < len(lines):
+        stripped = lines[i].strip()
+        if not stripped or stripped.startswith("#"):
+            i += 1
+            continue
+        
+        start = i
+        parts = []
+        # Continuations: "\" en fin de ligne, commentaires et lignes vides tolérés
+        while True:
+            current = lines[i].rstrip()
+            if current.endswith("\\"):
+                parts.append(current[:-1].strip())
+                i += 1
+                while i < len(lines) and (not lines[i].strip() or lines[i].strip().startswith("#")):
+                    i += 1
+                if i >= len(lines):
+                    break
+            else:
+                parts.append(current.strip())
+                break
+        
+        text = " ".join(p for p in parts if p)
+        keyword, _, value = text.partition(" ")
+        keyword = keyword.upper()
+        if keyword == "FROM":
+            stage += 1
+        instructions.append(Instruction(keyword, value.strip(), start + 1, min(i, len(lines) - 1) + 1, max(stage, 0)))
+        i += 1
+    
+    return instructions
+
+
+def split_stages(instructions: List[Instruction]) -> List[Stage]:
+    """Regroupe les instructions par build stage"""
+    stages = []
+    for instruction in instructions:
+        if instruction.keyword == "FROM":
+            match = FROM_PATTERN.match(instruction.value)
+            image = match.group(1) if match else instruction.value
+            alias = match.group(2) if match else None
+            stages.append(Stage(len(stages), image, alias, instruction.line))
+        if stages:
+            stages[-1].instructions.append(instruction)
+    return stages
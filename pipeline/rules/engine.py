@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Rule Engine - Règles déterministes en local (pré-filtrage avant Bedrock)
+"""
+
+import os
+import json
+from typing import Dict, List, Any, Optional, Set
+from .base import Rule, RuleContext, Finding
+from .hcl_parser import parse_hcl
+from .dockerfile_parser import parse_dockerfile
+from .terraform_rules import TERRAFORM_RULES, is_fully_covered_block
+from .docker_rules import DOCKER_RULES
+
+
+class RuleEngine:
+    """Évalue les règles Terraform et Dockerfile en quelques millisecondes"""
+    
+    def __init__(self, rules: Optional[List[Rule]] = None, snapshot: Optional[Any] = None):
+        self.rules = rules if rules is not None else TERRAFORM_RULES + DOCKER_RULES
+        self.snapshot = snapshot
+        # Flags par répertoire, pour les règles évaluées fichier par fichier (contexte des prompts)
+        self._flags: Dict[str, Dict[str, Any]] = {}
+    
+    def covered_categories(self, language: str) -> Set[int]:
+        """Catégories de prompt dont une règle locale fait toutes les vérifications (full_coverage)"""
+        return {rule.category for rule in self.rules if rule.language == language and rule.full_coverage}
+    
+    def context_rules(self, language: str) -> List[Rule]:
+        """Règles des catégories encore demandées au modèle: leurs findings servent de contexte"""
+        covered = self.covered_categories(language)
+        return [rule for rule in self.rules if rule.language == language and rule.category not in covered]
+    
+    def context_issues(self, file_path: str, content: str, language: str) -> List[Dict[str, Any]]:
+        """Findings des règles de contexte sur un fichier"""
+        rules = self.context_rules(language)
+        if not rules:
+            return []
+        return self.evaluate(file_path, content, language, self.flags(file_path, language), rules)
+    
+    def context_key(self, file_path: str, language: str) -> str:
+        """Règles de contexte et flags du fichier, pour les clés de cache des analyzers"""
+        rule_ids = ",".join(rule.rule_id for rule in self.context_rules(language))
+        return f"{rule_ids}|{json.dumps(self.flags(file_path, language), sort_keys=True)}"
+    
+    def flags(self, file_path: str, language: str) -> Dict[str, Any]:
+        """Flags du répertoire d'un fichier (default_tags d'un provider Terraform)"""
+        if language != "terraform":
+            return {}
+        directory = os.path.dirname(file_path)
+        flags = self._flags.get(directory)
+        if flags is None:
+            if self.snapshot is not None:
+                files = [e.path for e in self.snapshot.by_language("terraform", directory)]
+            else:
+                files = self._list_files(directory or ".", "terraform") or []
+            flags = self._flags[directory] = self._terraform_flags([self._read(path) for path in files])
+        return flags
+    
+    def is_fully_covered(self, content: str, language: str) -> bool:
+        """Indique si tout le fichier relève de catégories couvertes localement"""
+        if language == "terraform":
+            blocks = parse_hcl(content)
+            return bool(blocks) and all(is_fully_covered_block(b) for b in blocks)
+        return False
+    
+    def evaluate(self, file_path: str, content: str, language: str,
+                 flags: Optional[Dict[str, Any]] = None, rules: Optional[List[Rule]] = None) -> List[Dict[str, Any]]:
+        """Évalue les règles d'un langage (ou une partie d'entre elles) sur un fichier"""
+        if language == "terraform":
+            parsed = parse_hcl(content)
+        elif language == "dockerfile":
+            parsed = parse_dockerfile(content)
+        else:
+            return []
+        
+        context = RuleContext(file_path, self._exists, flags)
+        issues = []
+        for rule in rules if rules is not None else self.rules:
+            if rule.language != language:
+                continue
+            for finding in rule.check(parsed, context):
+                issues.append(self._to_issue(rule, file_path, finding))
+        return issues
+    
+    def scan_terraform(self, terraform_dir: str = "terraform") -> Dict[str, Any]:
+        """Applique les règles Terraform à un répertoire"""
+        files = self._list_files(terraform_dir, "terraform")
+        if files is None:
+            return {"error": f"Directory not found: {terraform_dir}"}
+        
+        contents = {path: self._read(path) for path in files}
+        flags = self._terraform_flags(list(contents.values()))
+        
+        issues = []
+        for path, content in contents.items():
+            issues.extend(self.evaluate(path, content, "terraform", flags))
+        return self._result("rules_terraform", terraform_dir, len(files), issues)
+    
+    def scan_dockerfile(self, dockerfile_path: str = "Dockerfile") -> Dict[str, Any]:
+        """Applique les règles Dockerfile à un fichier"""
+        if not self._exists(dockerfile_path):
+            return {"error": f"Dockerfile not found: {dockerfile_path}"}
+        
+        issues = self.evaluate(dockerfile_path, self._read(dockerfile_path), "dockerfile")
+        return self._result("rules_docker", dockerfile_path, 1, issues)
+    
+    def scan_dockerfiles(self, dockerfile_paths: List[str]) -> Dict[str, Any]:
+        """Applique les règles Dockerfile à plusieurs fichiers"""
+        files = [path for path in dockerfile_paths if self._exists(path)]
+        if not files:
+            return {"error": f"Dockerfile not found: {', '.join(dockerfile_paths) or 'Dockerfile'}"}
+        
+        issues = []
+        for path in files:
+            issues.extend(self.evaluate(path, self._read(path), "dockerfile"))
+        return self._result("rules_docker", ", ".join(files), len(files), issues)
+    
+    @staticmethod
+    def _terraform_flags(contents: List[str]) -> Dict[str, Any]:
+        # default_tags sur le provider: les tags sont hérités partout
+        return {"default_tags": any("default_tags" in content for content in contents)}
+    
+    def _to_issue(self, rule: Rule, file_path: str, finding: Finding) -> Dict[str, Any]:
+        line, resource, description = finding[:3]
+        issue = {
+            "type": f"rule_{rule.language}",
+            "severity": finding[3] if len(finding) > 3 else rule.severity,
+            "title": rule.title,
+            "description": description,
+            "recommendation": rule.recommendation,
+            "file": file_path,
+            "line": line,
+            "rule_id": rule.rule_id,
+            "confidence": 1.0
+        }
+        if resource:
+            issue["resource"] = resource
+        return issue
+    
+    def _result(self, scanner: str, source: str, files: int, issues: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "scanner": scanner,
+            "source": source,
+            "files_analyzed": files,
+            "issues": issues,
+            "summary": {
+                "total": len(issues),
+                "critical": len([i for i in issues if i["severity"] == "critical"]),
+                "high": len([i for i in issues if i["severity"] == "high"]),
+                "medium": len([i for i in issues if i["severity"] == "medium"])
+            }
+        }
+    
+    def _list_files(self, directory: str, language: str) -> Optional[List[str]]:
+        if self.snapshot is not None:
+            if not self.snapshot.exists(directory):
+                return None
+            return [e.path for e in self.snapshot.by_language(language, directory)]
+        
+        if not os.path.isdir(directory):
+            return None
+        files = []
+        for current, _, names in os.walk(directory):
+            files.extend(os.path.join(current, n) for n in sorted(names) if n.endswith(".tf"))
+        return files
+    
+    def _exists(self, path: str) -> bool:
+        if self.snapshot is not None:
+            return self.snapshot.get(path) is not None
+        return os.path.exists(path)
+    
+    def _read(self, path: str) -> str:
+        if self.snapshot is not None and self.snapshot.get(path) is not None:
+            return self.snapshot.read_text(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+HCL Parser - Découpage léger des fichiers Terraform en blocs et attributs
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+BLOCK_HEADER = re.compile(r'^\s*([A-Za-z_][\w-]*)((?:\s+(?:"[^"]*"|[A-Za-z_][\w-]*))*)\s*\{\s*$')
+# Bloc sur une ligne: resource "x" "y" { acl = "private" }, variable "z" {}
+ONE_LINE_BLOCK = re.compile(r'^\s*([A-Za-z_][\w-]*)((?:\s+(?:"[^"]*"|[A-Za-z_][\w-]*))*)\s*\{(.*)\}\s*$')
+ATTRIBUTE = re.compile(r'^\s*("?[A-Za-z_][\w-]*"?)\s*=\s*(.*)$')
+LABEL = re.compile(r'"([^"]*)"|([A-Za-z_][\w-]*)')
+HEREDOC = re.compile(r'<<-?\s*([A-Za-z_]\w*)\s*$')
+
+
+class HclAttribute:
+    """Un attribut: nom, valeur brute (éventuellement multi-lignes), lignes"""
+    
+    def __init__(self, name: str, value: str, line: int, end_line: int):
+        self.name = name
+        self.value = value
+        self.line = line
+        self.end_line = end_line
+    
+    def literal(self) -> Optional[str]:
+        """Valeur si c'est une simple chaîne littérale sans interpolation"""
+        match = re.fullmatch(r'\s*"([^"$]*)"\s*', self.value)
+        return match.group(1) if match else None
+
+
+class HclBlock:
+    """Un bloc HCL (resource, data, module, ingress...) et son contenu"""
+    
+    def __init__(self, block_type: str, labels: List[str], start_line: int):
+        self.block_type = block_type
+        self.labels = labels
+        self.start_line = start_line
+        self.end_line = start_line
+        self.attributes: Dict[str, HclAttribute] = {}
+        self.blocks: List["HclBlock"] = []
+        self.text = ""
+    
+    @property
+    def address(self) -> str:
+        """Adresse Terraform du bloc (aws_s3_bucket.logs, var.region...)"""
+        if self.block_type == "resource" and len(self.labels) >= 2:
+            return f"{self.labels[0]}.{self.labels[1]}"
+        if self.block_type == "data" and len(self.labels) >= 2:
+            return f"data.{self.labels[0]}.{self.labels[1]}"
+        if self.block_type == "variable" and self.labels:
+            return f"var.{self.labels[0]}"
+        if self.block_type in ("module", "output") and self.labels:
+            return f"{self.block_type}.{self.labels[0]}"
+        return ".".join([self.block_type] + self.labels)
+    
+    @property
+    def resource_type(self) -> str:
+        return self.labels[0] if self.labels else ""
+    
+    def children(self, block_type: str) -> List["HclBlock"]:
+        return [b for b in self.blocks if b.block_type == block_type]
+    
+    def attribute_literal(self, name: str) -> Optional[str]:
+        attribute = self.attributes.get(name)
+        return attribute.literal() if attribute else None
+
+
+def parse_hcl(content: str) -> List[HclBlock]:
+    """Parse un fichier Terraform et retourne ses blocs de premier niveau"""
+    lines = content.splitlines()
+    top_level: List[HclBlock] = []
+    stack: List[HclBlock] = []
+    i = 0
+    
+    while i < len(lines):
+        line = _strip_comment(lines[i])
+        line_no = i + 1
+        stripped = line.strip()
+        
+        if not stripped:
+            i += 1
+            continue
+        
+        one_line = ONE_LINE_BLOCK.match(line)
+        if one_line and "=" not in line.split("{")[0] and _bracket_delta(one_line.group(3), 0)[0] == 0:
+            block = HclBlock(one_line.group(1), _parse_labels(one_line.group(2)), line_no)
+            attribute = ATTRIBUTE.match(one_line.group(3))
+            if attribute:
+                name = attribute.group(1).strip('"')
+                block.attributes[name] = HclAttribute(name, attribute.group(2).strip(), line_no, line_no)
+            if stack:
+                stack[-1].blocks.append(block)
+            else:
+                block.text = lines[i]
+                top_level.append(block)
+            i += 1
+            continue
+        
+        header = BLOCK_HEADER.match(line)
+        if header and "=" not in line.split("{")[0]:
+            block = HclBlock(header.group(1), _parse_labels(header.group(2)), line_no)
+            if stack:
+                stack[-1].blocks.append(block)
+            else:
+                top_level.append(block)
+            stack.append(block)
+            i += 1
+            continue
+        
+        if stripped.startswith("}"):
+            if stack:
+                block = stack.pop()
+                block.end_line = line_no
+                if not stack:
+                    block.text = "\n".join(lines[block.start_line - 1:block.end_line])
+            i += 1
+            continue
+        
+        attribute = ATTRIBUTE.match(line)
+        if attribute and stack:
+            name = attribute.group(1).strip('"')
+            end = _value_end(lines, i, attribute.group(2))
+            value = "\n".join([attribute.group(2)] + lines[i + 1:end + 1])
+            stack[-1].attributes[name] = HclAttribute(name, value, line_no, end + 1)
+            i = end + 1
+            continue
+        
+        i += 1
+    
+    # Bloc non refermé (fichier invalide): on garde ce qui a été lu
+    for block in stack:
+        block.end_line = len(lines)
+    if stack:
+        stack[0].text = "\n".join(lines[stack[0].start_line - 1:])
+    
+    return top_level
+
+
+def uncovered_lines(content: str, blocks: List[HclBlock]) -> List[int]:
+    """Lignes de code hors des blocs de premier niveau (ni vides, ni commentaires).
+
+    Ce que parse_hcl n'a pas reconnu: un analyzer qui ne travaille que sur
+    les blocs doit alors reprendre le fichier entier.
+    """
+    covered = set()
+    for block in blocks:
+        covered.update(range(block.start_line, block.end_line + 1))
+    
+    uncovered = []
+    in_comment = False
+    for number, line in enumerate(content.splitlines(), 1):
+        if number in covered:
+            continue
+        text = line.strip()
+        if in_comment:
+            end = text.find("*/")
+            if end < 0:
+                continue
+            in_comment = False
+            text = text[end + 2:].strip()
+        if text.startswith("/*"):
+            end = text.find("*/", 2)
+            if end < 0:
+                in_comment = True
+                continue
+            text = text[end + 2:].strip()
+        if _strip_comment(text).strip():
+            uncovered.append(number)
+    return uncovered
+
+
+def _parse_labels(text: str) -> List[str]:
+    return [m.group(1) if m.group(1) is not None else m.group(2) for m in LABEL.finditer(text or "")]
+
+
+def _strip_comment(line: str) -> str:
+    """Retire les commentaires # et // hors chaînes"""
+    in_string = False
+    escaped = False
+    for i, char in enumerate(line):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "#" or line.startswith("//", i):
+            return line[:i]
+    return line
+
+
+def _value_end(lines: List[str], start: int, first_value: str) -> int:
+    """Index de la dernière ligne d'une valeur d'attribut (listes, maps, heredocs)"""
+    heredoc = HEREDOC.search(first_value)
+    if heredoc:
+        marker = heredoc.group(1)
+        for j in range(start + 1, len(lines)):
+            if lines[j].strip() == marker:
+                return j
+        return len(lines) - 1
+    
+    depth, _ = _bracket_delta(_strip_comment(first_value), 0)
+    j = start
+    while depth > 0 and j + 1 < len(lines):
+        j += 1
+        depth, _ = _bracket_delta(_strip_comment(lines[j]), depth)
+    return j
+
+
+def _bracket_delta(text: str, depth: int) -> Tuple[int, bool]:
+    """Met à jour la profondeur ([{ / }]) en ignorant le contenu des chaînes"""
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "[{(":
+            depth += 1
+        elif char in "]})":
+            depth -= 1
+    return depth, in_string
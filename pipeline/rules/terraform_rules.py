@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Terraform Rules - Règles locales pour les fichiers Terraform
+"""
+
+import re
+from typing import List, Iterator
+from .base import Rule, RuleContext, Finding, rule
+from .hcl_parser import HclBlock
+
+
+TERRAFORM_RULES: List[Rule] = []
+
+# Blocs dont toutes les vérifications sont faites par les règles locales
+FULLY_COVERED_BLOCK_TYPES = {"variable", "output", "terraform"}
+# ...sauf si une valeur littérale (chaîne, heredoc) peut cacher un secret: le modèle la voit
+LITERAL_ATTRIBUTES = {"variable": "default", "output": "value"}
+LITERAL_VALUE = re.compile(r'"|<<')
+
+OPEN_CIDRS = ('"0.0.0.0/0"', '"::/0"')
+CIDR_ATTRIBUTES = ("cidr_blocks", "ipv6_cidr_blocks", "cidr_ipv4", "cidr_ipv6")
+SENSITIVE_PORTS = {22, 3389, 3306, 5432, 1433, 6379, 27017, 9200}
+SECRET_NAME = re.compile(r"(password|passwd|secret|token|api_?key|private_?key|access_?key|credential)", re.IGNORECASE)
+STATEMENT_KEY = re.compile(r'"?(Action|Resource|actions|resources)"?\s*[:=]\s*(\[[^\]]*\]|"[^"]*")', re.DOTALL)
+
+TAGGABLE_TYPES = {
+    "aws_vpc", "aws_subnet", "aws_internet_gateway", "aws_nat_gateway", "aws_eip",
+    "aws_route_table", "aws_security_group", "aws_instance", "aws_launch_template",
+    "aws_lb", "aws_alb", "aws_lb_target_group", "aws_alb_target_group",
+    "aws_ecs_cluster", "aws_ecs_service", "aws_ecs_task_definition", "aws_ecr_repository",
+    "aws_iam_role", "aws_iam_policy", "aws_iam_user", "aws_s3_bucket", "aws_db_instance",
+    "aws_rds_cluster", "aws_kms_key", "aws_cloudwatch_log_group", "aws_lambda_function",
+    "aws_dynamodb_table", "aws_sns_topic", "aws_sqs_queue", "aws_elasticache_cluster",
+    "aws_eks_cluster", "aws_efs_file_system", "aws_secretsmanager_secret"
+}
+
+
+def is_fully_covered_block(block: HclBlock) -> bool:
+    """Indique si toutes les vérifications du bloc sont faites par les règles locales"""
+    if block.block_type not in FULLY_COVERED_BLOCK_TYPES:
+        return False
+    if block.block_type == "terraform":
+        # backend "s3" { access_key = "..." }
+        return not any(SECRET_NAME.search(name) for child in block.blocks for name in child.attributes)
+    attribute = block.attributes.get(LITERAL_ATTRIBUTES[block.block_type])
+    return attribute is None or not LITERAL_VALUE.search(attribute.value)
+
+
+def _resources(blocks: List[HclBlock], *types: str) -> Iterator[HclBlock]:
+    for block in blocks:
+        if block.block_type == "resource" and (not types or block.resource_type in types):
+            yield block
+
+
+def _int(value: str) -> int:
+    try:
+        return int(value.strip().strip('"'))
+    except (ValueError, AttributeError):
+        return -1
+
+
+def _is_open(attributes: dict) -> bool:
+    cidrs = " ".join(attributes[k].value for k in CIDR_ATTRIBUTES if k in attributes)
+    return any(cidr in cidrs for cidr in OPEN_CIDRS)
+
+
+def _ingress_rules(blocks: List[HclBlock]) -> Iterator[tuple]:
+    """(bloc ressource, attributs de la règle d'ingress) pour chaque règle entrante"""
+    for block in _resources(blocks, "aws_security_group"):
+        for ingress in block.children("ingress"):
+            yield block, ingress.attributes
+    for block in _resources(blocks, "aws_security_group_rule"):
+        if block.attribute_literal("type") == "ingress":
+            yield block, block.attributes
+    for block in _resources(blocks, "aws_vpc_security_group_ingress_rule"):
+        yield block, block.attributes
+
+
+@rule(TERRAFORM_RULES, "TF-SG-OPEN-INGRESS", "terraform", 2, "high",
+      "Security Group ouvert à Internet",
+      'Restreindre cidr_blocks aux plages nécessaires (ex: cidr_blocks = ["10.0.0.0/16"]) ou référencer un security group source.')
+def sg_open_ingress(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    for block, attributes in _ingress_rules(blocks):
+        if not _is_open(attributes):
+            continue
+        
+        line = next(attributes[k].line for k in CIDR_ATTRIBUTES if k in attributes)
+        from_port = _int(attributes["from_port"].value) if "from_port" in attributes else -1
+        to_port = _int(attributes["to_port"].value) if "to_port" in attributes else -1
+        protocol = attributes["protocol"].literal() if "protocol" in attributes else None
+        
+        if protocol == "-1" or (from_port == 0 and to_port in (0, 65535)):
+            severity, ports = "critical", "tous les ports"
+        elif from_port in SENSITIVE_PORTS or to_port in SENSITIVE_PORTS:
+            severity, ports = "high", f"le port {from_port}"
+        elif from_port in (80, 443) and to_port == from_port:
+            severity, ports = "low", f"le port {from_port}"
+        else:
+            port = attributes["from_port"].value.strip() if "from_port" in attributes else "?"
+            severity, ports = "medium", f"les ports {from_port}-{to_port}" if from_port >= 0 else f"le port {port}"
+        
+        yield line, block.address, f"{block.address} autorise le trafic entrant depuis 0.0.0.0/0 sur {ports}.", severity
+
+
+@rule(TERRAFORM_RULES, "TF-SG-WIDE-PORTS", "terraform", 2, "medium",
+      "Plage de ports trop large",
+      "Limiter from_port/to_port aux seuls ports utilisés par le service.")
+def sg_wide_ports(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    for block, attributes in _ingress_rules(blocks):
+        # Une plage ouverte à Internet est déjà remontée par TF-SG-OPEN-INGRESS
+        if "from_port" not in attributes or "to_port" not in attributes or _is_open(attributes):
+            continue
+        from_port = _int(attributes["from_port"].value)
+        to_port = _int(attributes["to_port"].value)
+        if from_port >= 0 and to_port - from_port >= 1000:
+            yield attributes["from_port"].line, block.address, f"{block.address} ouvre les ports {from_port} à {to_port}."
+
+
+def _policy_statements(blocks: List[HclBlock]) -> Iterator[tuple]:
+    """(bloc, attribut) des documents de policy IAM (jsonencode, heredoc, policy_document)"""
+    for block in blocks:
+        for name in ("policy", "assume_role_policy", "inline_policy"):
+            if name in block.attributes:
+                yield block, block.attributes[name]
+        if block.block_type == "data" and block.resource_type == "aws_iam_policy_document":
+            for statement in block.children("statement"):
+                for name in ("actions", "resources"):
+                    if name in statement.attributes:
+                        yield block, statement.attributes[name]
+
+
+def _wildcards(attribute_value: str, key_names: tuple) -> Iterator[tuple]:
+    """(offset de ligne, clé, valeurs) des clés de statement contenant un wildcard"""
+    if attribute_value.lstrip().startswith(("[", '"')):
+        # Attribut actions/resources d'un aws_iam_policy_document
+        matches = [(0, None, attribute_value)]
+    else:
+        matches = [
+            (attribute_value[:m.start()].count("\n"), m.group(1), m.group(2))
+            for m in STATEMENT_KEY.finditer(attribute_value)
+        ]
+    
+    for offset, key, values in matches:
+        if key is not None and key.lower().rstrip("s") not in key_names:
+            continue
+        found = re.findall(r'"((?:[\w-]+:)?\*)"', values)
+        if found:
+            yield offset, found
+
+
+@rule(TERRAFORM_RULES, "TF-IAM-WILDCARD-ACTION", "terraform", 1, "critical",
+      "Policy IAM avec actions wildcard",
+      'Lister explicitement les actions nécessaires (ex: Action = ["ecr:GetAuthorizationToken", "logs:PutLogEvents"]).')
+def iam_wildcard_action(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    for block, attribute in _policy_statements(blocks):
+        if attribute.name == "resources":
+            continue
+        for offset, found in _wildcards(attribute.value, ("action",)):
+            severity = "critical" if "*" in found else "high"
+            yield attribute.line + offset, block.address, f"{block.address} accorde {', '.join(found)}.", severity
+
+
+@rule(TERRAFORM_RULES, "TF-IAM-WILDCARD-RESOURCE", "terraform", 1, "high",
+      "Policy IAM sur toutes les ressources",
+      "Restreindre Resource aux ARN concernés (ex: Resource = aws_ecr_repository.app.arn).")
+def iam_wildcard_resource(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    for block, attribute in _policy_statements(blocks):
+        if attribute.name in ("actions", "assume_role_policy"):
+            continue
+        for offset, found in _wildcards(attribute.value, ("resource",)):
+            if "*" in found:
+                yield attribute.line + offset, block.address, f'{block.address} s\'applique à Resource = "*".'
+
+
+@rule(TERRAFORM_RULES, "TF-MISSING-TAGS", "terraform", 6, "low",
+      "Absence de tags",
+      'Ajouter des tags (ex: tags = { Environment = var.environment, Project = var.project_name }) ou default_tags sur le provider.')
+def missing_tags(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    if context.flags.get("default_tags"):
+        return
+    for block in _resources(blocks, *TAGGABLE_TYPES):
+        if "tags" not in block.attributes:
+            yield block.start_line, block.address, f"{block.address} n'a pas de tags."
+
+
+@rule(TERRAFORM_RULES, "TF-VAR-NOT-SENSITIVE", "terraform", 9, "medium",
+      "Variable sensible sans sensitive = true",
+      "Ajouter sensitive = true à la variable et ne pas lui donner de valeur par défaut.")
+def variable_not_sensitive(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    for block in blocks:
+        if block.block_type != "variable" or not block.labels or not SECRET_NAME.search(block.labels[0]):
+            continue
+        default = block.attribute_literal("default")
+        if default:
+            yield (block.attributes["default"].line, block.address,
+                   f"{block.address} contient un secret en valeur par défaut.", "critical")
+        sensitive = block.attributes.get("sensitive")
+        if sensitive is None or sensitive.value.strip() != "true":
+            line = sensitive.line if sensitive else block.start_line
+            yield line, block.address, f"{block.address} n'est pas marquée sensitive."
+
+
+@rule(TERRAFORM_RULES, "TF-OUTPUT-NOT-SENSITIVE", "terraform", 10, "medium",
+      "Output sensible sans sensitive = true",
+      "Ajouter sensitive = true à l'output, ou supprimer l'output.")
+def output_not_sensitive(blocks: List[HclBlock], context: RuleContext) -> Iterator[Finding]:
+    for block in blocks:
+        if block.block_type != "output" or not block.labels:
+            continue
+        value = block.attributes["value"].value if "value" in block.attributes else ""
+        if not (SECRET_NAME.search(block.labels[0]) or SECRET_NAME.search(value)):
+            continue
+        sensitive = block.attributes.get("sensitive")
+        if sensitive is None or sensitive.value.strip() != "true":
+            yield block.start_line, block.address, f"{block.address} expose une valeur sensible."
@@ -1,5 +1,6 @@
 from .trivy_scanner import TrivyScanner
 from .tflint_scanner import TFLintScanner
 from .checkov_scanner import CheckovScanner
+from .supervisor import ProcessSupervisor
 
-__all__ = ['TrivyScanner', 'TFLintScanner', 'CheckovScanner']
+__all__ = ['TrivyScanner', 'TFLintScanner', 'CheckovScanner', 'ProcessSupervisor']
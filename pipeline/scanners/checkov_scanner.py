@@ -3,41 +3,69 @@
 Checkov Scanner - Scan IaC pour problèmes de sécurité et compliance
 """
 
-import subprocess
 import json
-import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from .input_cache import InputCache
+from .supervisor import ProcessSupervisor
 
 
 class CheckovScanner:
-    def __init__(self):
+    def __init__(self, snapshot: Optional[Any] = None, ignore: Optional[Any] = None,
+                 supervisor: Optional[ProcessSupervisor] = None, cache: Optional[Any] = None):
         self.results = []
+        # Index partagé du dépôt (RepoSnapshot), évite de reparcourir l'arbre
+        self.snapshot = snapshot
+        # Chemins ignorés (PathMatcher), traduits en --skip-path
+        self.ignore = ignore if ignore is not None else getattr(snapshot, "ignore", None)
+        # Timeouts, limites mémoire et consommation des process de l'outil
+        self.supervisor = supervisor if supervisor is not None else ProcessSupervisor()
+        # Résultats par hash des fichiers IaC, version de Checkov (qui embarque ses checks) et options
+        self.inputs = InputCache(cache, self.supervisor) if cache is not None and snapshot is not None else None
     
     def scan_iac(self, directory: str = ".") -> Dict[str, Any]:
         """Scan Infrastructure as Code avec Checkov"""
         try:
             cmd = [
                 "checkov",
-                "--directory", directory,
                 "--output", "json",
                 "--quiet",
                 "--compact",
                 "--framework", "terraform,dockerfile"
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            # --directory: Checkov résout modules, variables et locals entre les fichiers
+            entries = None
+            if self.snapshot is not None:
+                # Rien à scanner: Checkov n'est pas lancé
+                if not self._iac_entries(directory):
+                    return self._empty_result(directory)
+                # Modules locaux hors du répertoire: tous les fichiers IaC du dépôt comptent dans la clé
+                entries = self._iac_entries("")
+            cmd += ["--directory", directory]
+            if self.ignore:
+                cmd += [arg for regex in self.ignore.skip_regexes() for arg in ("--skip-path", regex)]
+            
+            key = None
+            if self.inputs is not None and entries is not None:
+                key = self.inputs.key("checkov", self.inputs.version("checkov", ["checkov", "--version"]), entries, cmd)
+                cached = self.inputs.get(key)
+                if cached is not None:
+                    return dict(cached, cached=True)
+            
+            result = self.supervisor.run("checkov", cmd, cwd=self.snapshot.root if self.snapshot is not None else None)
+            
+            if result.timed_out:
+                return {"error": f"Checkov timed out after {self.supervisor.timeout_for('checkov')}s"}
             
             # Checkov retourne exit code 1 si des issues sont trouvées
             if result.stdout:
                 data = json.loads(result.stdout)
-                return self._parse_checkov_results(data, directory)
+                parsed = self._parse_checkov_results(data, directory)
             else:
-                return {
-                    "scanner": "checkov",
-                    "source": directory,
-                    "issues": [],
-                    "summary": {"total": 0, "critical": 0, "high": 0, "medium": 0}
-                }
+                parsed = self._empty_result(directory)
+            if self.inputs is not None:
+                self.inputs.set(key, parsed)
+            return parsed
             
         except FileNotFoundError:
             return {
@@ -47,6 +75,24 @@ class CheckovScanner:
         except Exception as e:
             return {"error": str(e)}
     
+    def _iac_entries(self, directory: str) -> List[Any]:
+        """Fichiers Terraform et Dockerfile du snapshot (FileEntry) sous un répertoire"""
+        prefix = "" if directory in (".", "") else directory.rstrip("/") + "/"
+        return sorted(
+            (entry for entry in self.snapshot.files.values()
+             if entry.language in ("terraform", "dockerfile") and entry.path.startswith(prefix)),
+            key=lambda entry: entry.path
+        )
+    
+    def _empty_result(self, source: str) -> Dict[str, Any]:
+        """Résultat sans issue"""
+        return {
+            "scanner": "checkov",
+            "source": source,
+            "issues": [],
+            "summary": {"total": 0, "critical": 0, "high": 0, "medium": 0}
+        }
+    
     def _parse_checkov_results(self, data: Dict, source: str) -> Dict[str, Any]:
         """Parse les résultats Checkov en format standardisé"""
         issues = []
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Image Archive - Lecture d'une image `docker save` et correspondance couches / Dockerfile
+"""
+
+import hashlib
+import json
+import tarfile
+from typing import List, Optional
+
+from rules.dockerfile_parser import Instruction, parse_dockerfile
+
+
+DOCKERFILE_KEYWORDS = {
+    "ADD", "ARG", "CMD", "COPY", "ENTRYPOINT", "ENV", "EXPOSE", "HEALTHCHECK", "LABEL",
+    "MAINTAINER", "ONBUILD", "RUN", "SHELL", "STOPSIGNAL", "USER", "VOLUME", "WORKDIR"
+}
+
+
+class ImageLayer:
+    """Une couche de l'image: diff_id, chain_id et instruction qui l'a créée"""
+    
+    def __init__(self, index: int, diff_id: str, chain_id: str, created_by: str):
+        self.index = index
+        self.diff_id = diff_id
+        self.chain_id = chain_id
+        self.created_by = created_by
+        self.instruction: Optional[Instruction] = None
+
+
+def chain_ids(diff_ids: List[str]) -> List[str]:
+    """ChainID OCI: identifie une couche avec toutes les couches en dessous.
+
+    Deux images ne partagent un chain_id que si leurs couches sont
+    identiques jusqu'à ce niveau (même image de base, mêmes étapes).
+    """
+    chains = []
+    for diff_id in diff_ids:
+        if not chains:
+            chains.append(diff_id)
+        else:
+            chains.append("sha256:" + hashlib.sha256(f"{chains[-1]} {diff_id}".encode("utf-8")).hexdigest())
+    return chains
+
+
+def read_image_archive(archive_path: str) -> List[ImageLayer]:
+    """Couches d'une archive `docker save` (manifest.json + config), sans daemon ni registry"""
+    with tarfile.open(archive_path, "r:*") as archive:
+        manifest = json.load(archive.extractfile("manifest.json"))
+        if not manifest:
+            raise ValueError(f"Empty image manifest: {archive_path}")
+        config = json.load(archive.extractfile(manifest[0]["Config"]))
+    
+    diff_ids = config.get("rootfs", {}).get("diff_ids", [])
+    # Les entrées d'historique sans couche (ENV, CMD...) n'ont pas de diff_id
+    history = [h for h in config.get("history", []) if not h.get("empty_layer")]
+    if len(history) != len(diff_ids):
+        history = [{}] * len(diff_ids)
+    
+    return [
+        ImageLayer(index, diff_id, chain_id, entry.get("created_by", ""))
+        for index, (diff_id, chain_id, entry) in enumerate(zip(diff_ids, chain_ids(diff_ids), history))
+    ]
+
+
+def history_keyword(created_by: str) -> str:
+    """Instruction Dockerfile d'une entrée d'historique (builder classique ou BuildKit)"""
+    text = created_by.strip()
+    if "#(nop)" in text:
+        words = text.split("#(nop)", 1)[1].split()
+        return words[0].upper() if words else ""
+    words = text.split()
+    if words and words[0].upper() in DOCKERFILE_KEYWORDS:
+        return words[0].upper()
+    # "/bin/sh -c apt-get ..." ou "|2 ARG=... /bin/sh -c ...": RUN du builder classique
+    return "RUN" if text else ""
+
+
+def map_layers(layers: List[ImageLayer], dockerfile_content: str):
+    """Associe chaque couche à l'instruction du stage final qui l'a produite.
+
+    L'alignement part de la dernière couche: les instructions du stage final
+    sont retrouvées dans l'ordre inverse; les couches restantes viennent de
+    l'image de base et sont rattachées au FROM du stage final.
+    """
+    instructions = parse_dockerfile(dockerfile_content)
+    if not instructions:
+        return
+    final_stage = max(i.stage for i in instructions)
+    stage = [i for i in instructions if i.stage == final_stage]
+    base = next((i for i in stage if i.keyword == "FROM"), stage[0])
+    candidates = [i for i in stage if i.keyword != "FROM"]
+    
+    position = len(candidates) - 1
+    for layer in reversed(layers):
+        keyword = history_keyword(layer.created_by)
+        match = position
+        while match >= 0 and candidates[match].keyword != keyword:
+            match -= 1
+        if match < 0:
+            break
+        layer.instruction = candidates[match]
+        position = match - 1
+    
+    for layer in layers:
+        if layer.instruction is None:
+            layer.instruction = base
+
+
+def main():
+    """Test: couches d'une archive et instructions correspondantes"""
+    import sys
+    
+    if len(sys.argv) < 2:
+        print("Usage: image_archive.py <image.tar> [Dockerfile]")
+        return
+    
+    layers = read_image_archive(sys.argv[1])
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            map_layers(layers, f.read())
+    for layer in layers:
+        instruction = f"line {layer.instruction.line}: {layer.instruction}" if layer.instruction else ""
+        print(f"{layer.diff_id[:19]} {layer.created_by[:50]:<50} {instruction}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Input Cache - Résultats des scanners indexés par leurs entrées exactes
+"""
+
+import copy
+import os
+import threading
+from typing import Dict, List, Any, Optional
+
+
+# Fichiers lus par le scan de vulnérabilités de Trivy (dépendances déclarées)
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "requirements.txt", "Pipfile.lock", "poetry.lock", "uv.lock",
+    "go.mod", "go.sum", "Cargo.lock", "Gemfile.lock", "composer.lock",
+    "packages.lock.json", "pom.xml", "gradle.lockfile", "mix.lock", "pubspec.lock"
+}
+ARCHIVE_EXTENSIONS = (".jar", ".war", ".ear", ".par")
+
+
+def is_lockfile(path: str) -> bool:
+    """Fichier pris en compte par le scan de vulnérabilités (lockfile ou archive Java)"""
+    return os.path.basename(path) in LOCKFILES or path.endswith(ARCHIVE_EXTENSIONS)
+
+
+class InputCache:
+    """Cache des résultats normalisés d'un outil externe.
+
+    La clé couvre les hashes (snapshot) des fichiers lus par l'outil, sa
+    version avec celle de ses règles ou de sa base, et la ligne de commande.
+    Si aucune n'a changé, l'outil n'est pas relancé. Sans version connue
+    (commande --version en échec), rien n'est mis en cache.
+    """
+    
+    def __init__(self, cache: Any, supervisor: Any):
+        self.cache = cache
+        self.supervisor = supervisor
+        self.hits = 0
+        self.misses = 0
+        self._versions: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+    
+    def version(self, tool: str, cmd: List[str], cwd: Optional[str] = None) -> str:
+        """Sortie de la commande de version (outil, plugins, base), une fois par run"""
+        key = (tool, tuple(cmd), cwd)
+        with self._lock:
+            if key in self._versions:
+                return self._versions[key]
+        
+        result = self.supervisor.run(tool, cmd, cwd=cwd)
+        version = result.stdout.strip() if result.returncode == 0 and not result.timed_out else ""
+        with self._lock:
+            self._versions[key] = version
+        return version
+    
+    def key(self, tool: str, version: str, files: List[Any], cmd: List[str]) -> Optional[str]:
+        """Clé des entrées d'un scan; files sont des FileEntry du snapshot"""
+        if not version:
+            return None
+        inputs = sorted(f"{entry.path}:{entry.sha256}" for entry in files)
+        return self.cache.make_key("scanner", tool, version, "\0".join(cmd), *inputs)
+    
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        value = self.cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Copie: les étapes suivantes (triage) annotent les issues
+        return copy.deepcopy(value)
+    
+    def set(self, key: Optional[str], result: Dict[str, Any]):
+        """Seuls les résultats complets sont conservés, jamais les erreurs"""
+        if key is not None and "error" not in result:
+            self.cache.set(key, copy.deepcopy(result))
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def main():
+    """Test: même clé pour les mêmes entrées, clé différente si un fichier change"""
+    import sys
+    import tempfile
+    from result_cache import ResultCache
+    from snapshot import FileEntry
+    from scanners.supervisor import ProcessSupervisor
+    
+    cache = InputCache(ResultCache(tempfile.mkdtemp()), ProcessSupervisor())
+    version = cache.version("python", [sys.executable, "--version"])
+    lock = FileEntry("package-lock.json", 10, 0, "abc")
+    key = cache.key("trivy", version, [lock], ["trivy", "fs"])
+    cache.set(key, {"scanner": "trivy", "issues": []})
+    print(f"version: {version}")
+    print(f"hit: {cache.get(key) is not None}")
+    changed = FileEntry("package-lock.json", 10, 0, "def")
+    print(f"hit after change: {cache.get(cache.key('trivy', version, [changed], ['trivy', 'fs'])) is not None}")
+    print(f"lockfiles: {[p for p in ('package-lock.json', 'app/main.ts', 'lib/x.jar') if is_lockfile(p)]}")
+
+
+if __name__ == "__main__":
+    main()
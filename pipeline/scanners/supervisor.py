@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Process Supervisor - Exécution des scanners avec timeout, limites et mesure des ressources
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: pas de rlimit ni de rusage
+    resource = None
+
+
+class ProcessResult(subprocess.CompletedProcess):
+    """CompletedProcess avec le timeout et la consommation du process"""
+    
+    def __init__(self, args: List[str], returncode: int, stdout: str, stderr: str,
+                 timed_out: bool, usage: Dict[str, Any]):
+        super().__init__(args, returncode, stdout, stderr)
+        self.timed_out = timed_out
+        self.usage = usage
+
+
+class ProcessSupervisor:
+    """Lance les outils externes dans leur propre groupe de process.
+
+    Chaque outil a un timeout (wall-clock) et éventuellement une limite
+    mémoire (RLIMIT_DATA, qui ne compte pas les réservations d'espace
+    d'adressage des binaires Go comme trivy et tflint), posée par prlimit
+    après le lancement, ou par le shell (ulimit) là où prlimit n'existe
+    pas: jamais de preexec_fn, dangereux avec les threads du pipeline. Au
+    timeout, le groupe reçoit SIGTERM puis SIGKILL après kill_grace
+    secondes; les process restants du groupe sont tués à la fin de chaque
+    exécution, avant que le leader ne soit récupéré.
+
+    Le process est attendu avec wait4: le temps CPU et le pic de RSS sont
+    ceux de ce process et de ses descendants, pas de tout le pipeline.
+    """
+    
+    def __init__(self, timeouts: Optional[Dict[str, float]] = None, default_timeout: Optional[float] = 600,
+                 memory_limits_mb: Optional[Dict[str, int]] = None, kill_grace: float = 5):
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.memory_limits_mb = memory_limits_mb or {}
+        self.kill_grace = kill_grace
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ProcessSupervisor":
+        """Section "processes" de la configuration"""
+        return cls(
+            timeouts=config.get("timeouts"),
+            default_timeout=config.get("default_timeout", 600),
+            memory_limits_mb=config.get("memory_limit_mb"),
+            kill_grace=config.get("kill_grace", 5)
+        )
+    
+    def timeout_for(self, tool: str) -> Optional[float]:
+        return self.timeouts.get(tool, self.default_timeout)
+    
+    def run(self, tool: str, cmd: List[str], cwd: Optional[str] = None) -> ProcessResult:
+        """Exécute cmd; FileNotFoundError si l'outil n'est pas installé"""
+        timeout = self.timeout_for(tool)
+        memory_mb = self.memory_limits_mb.get(tool)
+        
+        limit_memory = bool(memory_mb) and resource is not None
+        popen_cmd = cmd
+        if limit_memory and not hasattr(resource, "prlimit"):
+            popen_cmd = self._ulimit_wrapper(cmd, memory_mb, cwd)
+        
+        started = time.monotonic()
+        process = subprocess.Popen(
+            popen_cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace",
+            start_new_session=True
+        )
+        if limit_memory and hasattr(resource, "prlimit"):
+            self._limit_memory(process, memory_mb)
+        
+        # Lecture des deux pipes en parallèle: un pipe plein bloquerait l'outil
+        output = {}
+        readers = [
+            threading.Thread(target=lambda name=name, stream=stream: output.__setitem__(name, stream.read()), daemon=True)
+            for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+        
+        expired = threading.Event()
+        # Signal au groupe et récupération du leader ne se croisent pas
+        reap_lock = threading.Lock()
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, self._expire, args=(process, expired, reap_lock))
+            timer.daemon = True
+            timer.start()
+        
+        try:
+            returncode, rusage = self._wait(process, reap_lock)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        
+        for reader in readers:
+            reader.join()
+        process.stdout.close()
+        process.stderr.close()
+        
+        usage = self._usage(tool, time.monotonic() - started, returncode, expired.is_set(), rusage)
+        with self._lock:
+            self.records.append(usage)
+        return ProcessResult(cmd, returncode, output.get("stdout", ""), output.get("stderr", ""), expired.is_set(), usage)
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Cumul par outil: exécutions, temps, CPU, pic mémoire, timeouts"""
+        with self._lock:
+            records = list(self.records)
+        
+        stats: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            tool = stats.setdefault(record["tool"], {
+                "tool": record["tool"], "runs": 0, "wall_time": 0.0, "cpu_time": 0.0,
+                "max_rss_mb": 0.0, "timeouts": 0
+            })
+            tool["runs"] += 1
+            tool["wall_time"] = round(tool["wall_time"] + record["wall_time"], 3)
+            tool["cpu_time"] = round(tool["cpu_time"] + record["cpu_user"] + record["cpu_system"], 3)
+            tool["max_rss_mb"] = max(tool["max_rss_mb"], record["max_rss_mb"])
+            tool["timeouts"] += int(record["timed_out"])
+        return list(stats.values())
+    
+    def _wait(self, process: subprocess.Popen, reap_lock: threading.Lock) -> tuple:
+        """Attend la fin du process: (code de sortie, rusage ou None).
+
+        Le leader est d'abord attendu sans être récupéré (WNOWAIT): tant
+        qu'il reste zombie son pgid ne peut pas être réattribué, et le
+        SIGKILL des descendants encore vivants (plugins, workers, qui
+        tiennent les pipes ouverts) ne peut pas viser un autre groupe.
+        """
+        if not hasattr(os, "waitid") or not hasattr(os, "wait4"):
+            return process.wait(), None
+        
+        while True:
+            try:
+                os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+                break
+            except InterruptedError:
+                continue
+        with reap_lock:
+            self._signal_group(process, signal.SIGKILL)
+            while True:
+                try:
+                    _, status, rusage = os.wait4(process.pid, 0)
+                    break
+                except InterruptedError:
+                    continue
+            # Process déjà récupéré: Popen ne doit plus l'attendre
+            process.returncode = os.waitstatus_to_exitcode(status)
+        return process.returncode, rusage
+    
+    def _expire(self, process: subprocess.Popen, expired: threading.Event, reap_lock: threading.Lock):
+        """Timeout: SIGTERM au groupe, puis SIGKILL si l'outil ne s'arrête pas"""
+        expired.set()
+        self._signal_running_group(process, signal.SIGTERM, reap_lock)
+        deadline = time.monotonic() + self.kill_grace
+        while process.returncode is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._signal_running_group(process, signal.SIGKILL, reap_lock)
+    
+    def _signal_running_group(self, process: subprocess.Popen, sig: int, reap_lock: threading.Lock):
+        """Signal au groupe tant que le leader n'est pas récupéré (pgid encore réservé)"""
+        with reap_lock:
+            if process.returncode is None:
+                self._signal_group(process, sig)
+    
+    @staticmethod
+    def _signal_group(process: subprocess.Popen, sig: int):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError, AttributeError):
+            pass
+    
+    @staticmethod
+    def _limit_memory(process: subprocess.Popen, memory_mb: int):
+        """RLIMIT_DATA du process lancé (Linux); ses descendants en héritent"""
+        limit = memory_mb * 1024 * 1024
+        try:
+            resource.prlimit(process.pid, resource.RLIMIT_DATA, (limit, limit))
+        except ProcessLookupError:
+            pass
+    
+    @staticmethod
+    def _ulimit_wrapper(cmd: List[str], memory_mb: int, cwd: Optional[str]) -> List[str]:
+        """Sans prlimit (macOS): limite posée par le shell juste avant exec"""
+        executable = cmd[0] if os.sep in cmd[0] else shutil.which(cmd[0])
+        if executable is None or not os.path.exists(os.path.join(cwd or "", executable)):
+            raise FileNotFoundError(f"No such file or directory: '{cmd[0]}'")
+        return ["/bin/sh", "-c", f'ulimit -d {memory_mb * 1024} && exec "$@"', cmd[0]] + cmd
+    
+    @staticmethod
+    def _usage(tool: str, wall_time: float, returncode: int, timed_out: bool, rusage: Any) -> Dict[str, Any]:
+        usage = {
+            "tool": tool,
+            "wall_time": round(wall_time, 3),
+            "cpu_user": 0.0,
+            "cpu_system": 0.0,
+            "max_rss_mb": 0.0,
+            "exit_code": returncode,
+            "timed_out": timed_out
+        }
+        if rusage is not None:
+            # ru_maxrss: kilo-octets sous Linux, octets sous macOS
+            rss_bytes = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+            usage.update({
+                "cpu_user": round(rusage.ru_utime, 3),
+                "cpu_system": round(rusage.ru_stime, 3),
+                "max_rss_mb": round(rss_bytes / (1024 * 1024), 1)
+            })
+        return usage
+
+
+def main():
+    """Test du superviseur: une commande normale et une commande trop longue"""
+    import json
+    
+    supervisor = ProcessSupervisor(timeouts={"sleep": 1}, kill_grace=1)
+    result = supervisor.run("python", [sys.executable, "-c", "x = bytearray(50 * 1024 * 1024); print(len(x))"])
+    print(f"python: exit {result.returncode}, stdout {result.stdout.strip()}")
+    result = supervisor.run("sleep", ["sh", "-c", "sleep 30 & sleep 30"])
+    print(f"sleep: exit {result.returncode}, timed out {result.timed_out}")
+    print(json.dumps(supervisor.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,54 +3,88 @@
 TFLint Scanner - Scan Terraform pour erreurs de syntaxe et best practices
 """
 
-import subprocess
 import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pathlib import Path
+from .input_cache import InputCache
+from .supervisor import ProcessSupervisor
 
 
 class TFLintScanner:
-    def __init__(self):
+    def __init__(self, snapshot: Optional[Any] = None, ignore: Optional[Any] = None,
+                 supervisor: Optional[ProcessSupervisor] = None, cache: Optional[Any] = None):
         self.results = []
+        # Index partagé du dépôt (RepoSnapshot), évite de reparcourir l'arbre
+        self.snapshot = snapshot
+        # Chemins ignorés (PathMatcher), traduits en --filter
+        self.ignore = ignore if ignore is not None else getattr(snapshot, "ignore", None)
+        # Timeouts, limites mémoire et consommation des process de l'outil
+        self.supervisor = supervisor if supervisor is not None else ProcessSupervisor()
+        # Résultats par hash des fichiers du module, version de TFLint et de ses plugins, et options
+        self.inputs = InputCache(cache, self.supervisor) if cache is not None and snapshot is not None else None
     
     def scan_terraform(self, terraform_dir: str = "terraform") -> Dict[str, Any]:
         """Scan les fichiers Terraform avec TFLint"""
-        if not os.path.exists(terraform_dir):
+        if self.snapshot is not None:
+            if not self.snapshot.exists(terraform_dir):
+                return {"error": f"Terraform directory not found: {terraform_dir}"}
+            if not self.snapshot.glob(f"{terraform_dir}/**/*.tf"):
+                return self._empty_result(terraform_dir)
+        elif not os.path.exists(terraform_dir):
             return {"error": f"Terraform directory not found: {terraform_dir}"}
         
+        if self.snapshot is not None:
+            terraform_cwd = os.path.join(self.snapshot.root, terraform_dir)
+        else:
+            terraform_cwd = terraform_dir
+        
+        # TFLint charge tout le module; --filter limite les issues aux fichiers non ignorés
+        filters = []
+        if self.ignore:
+            tf_files = sorted(name for name in os.listdir(terraform_cwd) if name.endswith(".tf"))
+            kept = [name for name in tf_files if not self.ignore.ignored(os.path.normpath(os.path.join(terraform_dir, name)).replace(os.sep, "/"))]
+            if not kept:
+                return self._empty_result(terraform_dir)
+            if len(kept) < len(tf_files):
+                filters = [f"--filter={name}" for name in kept]
+        
         try:
-            # Init TFLint
-            subprocess.run(
-                ["tflint", "--init"],
-                cwd=terraform_dir,
-                capture_output=True
-            )
-            
-            # Scan avec TFLint
             cmd = [
                 "tflint",
                 "--format", "json",
                 "--force"
-            ]
+            ] + filters
+            
+            # Un module inchangé (fichiers, .tflint.hcl, plugins) ne relance ni init ni scan
+            key = None
+            if self.inputs is not None:
+                files = self.snapshot.glob(f"{terraform_dir}/**/*") + self.snapshot.glob(".tflint.hcl")
+                version = self.inputs.version("tflint", ["tflint", "--version"], cwd=terraform_cwd)
+                key = self.inputs.key("tflint", version, files, cmd)
+                cached = self.inputs.get(key)
+                if cached is not None:
+                    return dict(cached, cached=True)
             
-            result = subprocess.run(
-                cmd,
-                cwd=terraform_dir,
-                capture_output=True,
-                text=True
-            )
+            # Init TFLint
+            init = self.supervisor.run("tflint", ["tflint", "--init"], cwd=terraform_cwd)
+            if init.timed_out:
+                return {"error": f"TFLint init timed out after {self.supervisor.timeout_for('tflint')}s"}
+            
+            # Scan avec TFLint
+            result = self.supervisor.run("tflint", cmd, cwd=terraform_cwd)
+            
+            if result.timed_out:
+                return {"error": f"TFLint timed out after {self.supervisor.timeout_for('tflint')}s"}
             
             if result.stdout:
                 data = json.loads(result.stdout)
-                return self._parse_tflint_results(data, terraform_dir)
+                parsed = self._parse_tflint_results(data, terraform_dir)
             else:
-                return {
-                    "scanner": "tflint",
-                    "source": terraform_dir,
-                    "issues": [],
-                    "summary": {"total": 0, "critical": 0, "high": 0, "medium": 0}
-                }
+                parsed = self._empty_result(terraform_dir)
+            if self.inputs is not None:
+                self.inputs.set(key, parsed)
+            return parsed
             
         except FileNotFoundError:
             return {
@@ -60,6 +94,15 @@ class TFLintScanner:
         except Exception as e:
             return {"error": str(e)}
     
+    def _empty_result(self, source: str) -> Dict[str, Any]:
+        """Résultat sans issue"""
+        return {
+            "scanner": "tflint",
+            "source": source,
+            "issues": [],
+            "summary": {"total": 0, "critical": 0, "high": 0, "medium": 0}
+        }
+    
     def _parse_tflint_results(self, data: Dict, source: str) -> Dict[str, Any]:
         """Parse les résultats TFLint en format standardisé"""
         issues = []
@@ -3,19 +3,50 @@
 Trivy Scanner - Scan Docker images et fichiers pour les vulnérabilités
 """
 
-import subprocess
 import json
 import os
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+from .image_archive import map_layers, read_image_archive
+from .input_cache import InputCache, is_lockfile
+from .supervisor import ProcessSupervisor
+
+
+IMAGE_SEVERITIES = "CRITICAL,HIGH,MEDIUM"
+
+# Un seul scan d'image à la fois: le cache de couches de Trivy n'accepte qu'un process,
+# et les couches de base communes sont analysées par le premier service seulement
+IMAGE_SCAN_LOCK = threading.Lock()
 
 
 class TrivyScanner:
-    def __init__(self):
+    def __init__(self, snapshot: Optional[Any] = None, server_url: Optional[str] = None,
+                 ignore: Optional[Any] = None, supervisor: Optional[ProcessSupervisor] = None,
+                 cache: Optional[Any] = None, cache_dir: Optional[str] = None):
         self.results = []
+        # Index partagé du dépôt (RepoSnapshot), évite de reparcourir l'arbre
+        self.snapshot = snapshot
+        # Chemins ignorés (PathMatcher), traduits en --skip-files/--skip-dirs
+        self.ignore = ignore if ignore is not None else getattr(snapshot, "ignore", None)
+        # Trivy en mode client/serveur: la base de vulnérabilités reste chargée côté serveur
+        self.server_url = server_url
+        self.root = snapshot.root if snapshot is not None else None
+        # Timeouts, limites mémoire et consommation des process de l'outil
+        self.supervisor = supervisor if supervisor is not None else ProcessSupervisor()
+        # Vulnérabilités par image (ResultCache), partagées entre services et projets
+        self.cache = cache
+        # Cache de couches de Trivy (--cache-dir), persistant d'un run à l'autre
+        self.cache_dir = cache_dir
+        # Résultats par hash des fichiers scannés, version de Trivy et de sa base, et options
+        self.inputs = InputCache(cache, self.supervisor) if cache is not None and snapshot is not None else None
+        self._version = None
     
     def scan_dockerfile(self, dockerfile_path: str = "Dockerfile") -> Dict[str, Any]:
         """Scan un Dockerfile avec Trivy"""
-        if not os.path.exists(dockerfile_path):
+        exists = self.snapshot.get(dockerfile_path) is not None if self.snapshot is not None else os.path.exists(dockerfile_path)
+        if not exists:
             return {"error": f"Dockerfile not found: {dockerfile_path}"}
         
         try:
@@ -28,8 +59,17 @@ class TrivyScanner:
                 dockerfile_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            key = None
+            if self.inputs is not None:
+                key = self.inputs.key("trivy", self._tool_version(), [self.snapshot.get(dockerfile_path)], cmd)
+                cached = self.inputs.get(key)
+                if cached is not None:
+                    return dict(cached, cached=True)
             
+            result = self.supervisor.run("trivy", cmd, cwd=self.root)
+            
+            if result.timed_out:
+                return {"error": f"Trivy timed out after {self.supervisor.timeout_for('trivy')}s"}
             if result.returncode != 0:
                 return {
                     "error": "Trivy scan failed",
@@ -37,7 +77,10 @@ class TrivyScanner:
                 }
             
             data = json.loads(result.stdout)
-            return self._parse_trivy_results(data, dockerfile_path)
+            parsed = self._parse_trivy_results(data, dockerfile_path)
+            if self.inputs is not None:
+                self.inputs.set(key, parsed)
+            return parsed
             
         except FileNotFoundError:
             return {
@@ -47,20 +90,103 @@ class TrivyScanner:
         except Exception as e:
             return {"error": str(e)}
     
+    def scan_dockerfiles(self, dockerfile_paths: List[str], max_workers: int = 4) -> Dict[str, Any]:
+        """Scan de plusieurs Dockerfiles en parallèle (un process Trivy par fichier, chacun en cache)"""
+        if not dockerfile_paths:
+            return {"error": "No Dockerfile found"}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(dockerfile_paths)))) as executor:
+            results = list(executor.map(self.scan_dockerfile, dockerfile_paths))
+        
+        errors = [(path, r) for path, r in zip(dockerfile_paths, results) if "error" in r]
+        if len(errors) == len(results):
+            return {"error": "; ".join(f"{path}: {r['error']}" for path, r in errors)}
+        
+        issues = [issue for r in results for issue in r.get("issues", [])]
+        return {
+            "scanner": "trivy",
+            "source": ", ".join(dockerfile_paths),
+            "files_analyzed": len(results) - len(errors),
+            "issues": issues,
+            "cached": all(r.get("cached") for r in results if "error" not in r),
+            "summary": self._summarize(issues)
+        }
+    
     def scan_filesystem(self, path: str = ".") -> Dict[str, Any]:
-        """Scan le filesystem pour secrets et vulnérabilités"""
+        """Scan le filesystem pour secrets et vulnérabilités.
+
+        Avec le cache, les vulnérabilités sont indexées sur les seuls
+        lockfiles: tant qu'ils ne changent pas (cas de la plupart des PR),
+        Trivy ne relance que les scanners secret et config.
+        """
+        if self.inputs is None:
+            return self._scan_filesystem(path, ["vuln", "secret", "config"])
+        
         try:
-            cmd = [
-                "trivy",
-                "fs",
-                "--format", "json",
-                "--severity", "CRITICAL,HIGH,MEDIUM",
-                "--scanners", "vuln,secret,config",
-                path
-            ]
+            version = self._tool_version()
+            directory = os.path.normpath(path).replace(os.sep, "/")
+            prefix = "" if directory == "." else directory + "/"
+            files = [entry for p, entry in sorted(self.snapshot.files.items()) if p.startswith(prefix)]
+            # Partie du scan -> (scanners Trivy, fichiers lus)
+            parts = {
+                "vuln": (["vuln"], [entry for entry in files if is_lockfile(entry.path)]),
+                "secret,config": (["secret", "config"], files)
+            }
+            keys = {
+                name: self.inputs.key("trivy", version, inputs, self._filesystem_cmd(path, scanners))
+                for name, (scanners, inputs) in parts.items()
+            }
+            cached = {name: self.inputs.get(key) for name, key in keys.items()}
+        except FileNotFoundError:
+            return {
+                "error": "Trivy not installed",
+                "message": "Install with: brew install trivy or apt-get install trivy"
+            }
+        
+        missing = [name for name, value in cached.items() if value is None]
+        if missing:
+            result = self._scan_filesystem(path, [s for name in missing for s in parts[name][0]])
+            if "error" in result:
+                return result
+            for name in missing:
+                issues = [i for i in result["issues"] if (i["type"] == "vulnerability") == (name == "vuln")]
+                cached[name] = {"issues": issues}
+                self.inputs.set(keys[name], cached[name])
+        
+        issues = [issue for value in cached.values() for issue in value["issues"]]
+        return {
+            "scanner": "trivy",
+            "source": path,
+            "issues": issues,
+            "cached": not missing,
+            "summary": self._summarize(issues)
+        }
+    
+    def _filesystem_cmd(self, path: str, scanners: List[str]) -> List[str]:
+        cmd = [
+            "trivy",
+            "fs",
+            "--format", "json",
+            "--severity", "CRITICAL,HIGH,MEDIUM",
+            "--scanners", ",".join(scanners),
+            path
+        ]
+        if self.server_url:
+            cmd[2:2] = ["--server", self.server_url]
+        if self.ignore:
+            skip_files, skip_dirs = self.ignore.skip_globs()
+            cmd[2:2] = [arg for glob in skip_files for arg in ("--skip-files", glob)]
+            cmd[2:2] = [arg for glob in skip_dirs for arg in ("--skip-dirs", glob)]
+        return cmd
+    
+    def _scan_filesystem(self, path: str, scanners: List[str]) -> Dict[str, Any]:
+        try:
+            cmd = self._filesystem_cmd(path, scanners)
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = self.supervisor.run("trivy", cmd, cwd=self.root)
             
+            if result.timed_out:
+                return {"error": f"Trivy timed out after {self.supervisor.timeout_for('trivy')}s"}
             if result.returncode != 0:
                 return {
                     "error": "Trivy filesystem scan failed",
@@ -73,6 +199,190 @@ class TrivyScanner:
         except Exception as e:
             return {"error": str(e)}
     
+    def scan_images(self, images: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Scan des images de plusieurs services: [{"archive", "dockerfile"}]"""
+        issues = []
+        summaries = []
+        for image in images:
+            result = self.scan_image(image["archive"], image.get("dockerfile", "Dockerfile"))
+            if "error" in result:
+                summaries.append({"archive": image["archive"], "error": result["error"]})
+                continue
+            issues.extend(result["issues"])
+            summaries.append({
+                "archive": image["archive"],
+                "layers": result["layers"],
+                "cached": result["cached"],
+                "total": result["summary"]["total"]
+            })
+        
+        if summaries and all("error" in s for s in summaries):
+            return {"error": "; ".join(s["error"] for s in summaries)}
+        
+        return {
+            "scanner": "trivy_image",
+            "source": ", ".join(image["archive"] for image in images),
+            "images": summaries,
+            "issues": issues,
+            "summary": self._summarize(issues)
+        }
+    
+    def scan_image(self, image_archive: str, dockerfile_path: str = "Dockerfile") -> Dict[str, Any]:
+        """Scan des vulnérabilités d'une image sauvegardée (docker save -o image.tar).
+
+        Les vulnérabilités sont mises en cache par image, sous le chain_id de
+        sa dernière couche (qui identifie toutes les couches): Trivy attribue
+        un paquet à la couche qui l'a modifié en dernier dans l'image
+        complète, ce n'est pas un fait propre à la couche. Une image déjà
+        scannée ne l'est pas à nouveau; sinon Trivy tourne avec son cache de
+        couches persistant (cache_dir) et n'analyse que les couches nouvelles. Chaque vulnérabilité est rattachée à la
+        ligne du Dockerfile qui a produit sa couche.
+        """
+        archive_path = os.path.join(self.root, image_archive) if self.root else image_archive
+        if not os.path.isfile(archive_path):
+            return {"error": f"Image archive not found: {image_archive}"}
+        
+        try:
+            layers = read_image_archive(archive_path)
+            dockerfile = self._read_text(dockerfile_path)
+            if dockerfile is not None:
+                map_layers(layers, dockerfile)
+            
+            key = None
+            cached = None
+            if self.cache is not None and layers:
+                version = self.version_info()
+                key = self.cache.make_key(
+                    "trivy_image", layers[-1].chain_id, version["version"], version["db"], IMAGE_SEVERITIES
+                )
+                cached = self.cache.get(key)
+            
+            if cached is not None:
+                per_layer = cached["layers"]
+            else:
+                by_diff_id = self._run_image_scan(archive_path)
+                # Sans couche connue: rattachée à la dernière couche
+                top = layers[-1].diff_id if layers else ""
+                for diff_id in list(by_diff_id):
+                    if diff_id not in {layer.diff_id for layer in layers}:
+                        by_diff_id.setdefault(top, []).extend(by_diff_id.pop(diff_id))
+                # Vulnérabilités de chaque couche, dans l'ordre des couches de cette image
+                per_layer = [by_diff_id.get(layer.diff_id, []) for layer in layers]
+                if key is not None:
+                    self.cache.set(key, {"layers": per_layer})
+            
+            issues = []
+            for layer in layers:
+                instruction = layer.instruction
+                for vuln in per_layer[layer.index]:
+                    issues.append(dict(
+                        vuln,
+                        file=dockerfile_path,
+                        line=instruction.line if instruction is not None else 0,
+                        layer=layer.diff_id,
+                        instruction=f"{instruction.keyword} {instruction.value}"[:120] if instruction is not None else layer.created_by[:120]
+                    ))
+            
+            return {
+                "scanner": "trivy_image",
+                "source": image_archive,
+                "layers": len(layers),
+                "cached": cached is not None,
+                "issues": issues,
+                "summary": self._summarize(issues)
+            }
+        
+        except FileNotFoundError:
+            return {
+                "error": "Trivy not installed",
+                "message": "Install with: brew install trivy or apt-get install trivy"
+            }
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def version_info(self) -> Dict[str, str]:
+        """Version de Trivy et date de sa base de vulnérabilités (clés de cache)"""
+        if self._version is None:
+            result = self.supervisor.run("trivy", ["trivy", "--version", "--format", "json"])
+            try:
+                data = json.loads(result.stdout)
+            except ValueError:
+                data = {}
+            db = data.get("VulnerabilityDB") or {}
+            self._version = {
+                "version": data.get("Version") or result.stdout.strip(),
+                # En mode client/serveur la base est celle du serveur
+                "db": self._server_db() if self.server_url else str(db.get("UpdatedAt", ""))
+            }
+        return self._version
+    
+    def _tool_version(self) -> str:
+        """Version de Trivy, de sa base et de ses règles, pour le cache d'entrées"""
+        version = self.inputs.version("trivy", ["trivy", "--version", "--format", "json"])
+        if version and self.server_url:
+            version += "\n" + self._server_db()
+        return version
+    
+    def _server_db(self) -> str:
+        # La base du serveur n'est pas visible du client: les résultats sont repris au plus un jour
+        return f"{self.server_url} {time.strftime('%Y-%m-%d')}"
+    
+    def _run_image_scan(self, archive_path: str) -> Dict[str, List[Dict[str, Any]]]:
+        """trivy image --input: vulnérabilités normalisées, groupées par diff_id de couche"""
+        cmd = [
+            "trivy",
+            "image",
+            "--input", archive_path,
+            "--format", "json",
+            "--severity", IMAGE_SEVERITIES,
+            "--scanners", "vuln"
+        ]
+        if self.server_url:
+            cmd[2:2] = ["--server", self.server_url]
+        elif self.cache_dir:
+            cmd[2:2] = ["--cache-dir", self.cache_dir]
+        
+        with IMAGE_SCAN_LOCK:
+            result = self.supervisor.run("trivy", cmd, cwd=self.root)
+        
+        if result.timed_out:
+            raise RuntimeError(f"Trivy timed out after {self.supervisor.timeout_for('trivy')}s")
+        if result.returncode != 0:
+            raise RuntimeError(f"Trivy image scan failed: {result.stderr.strip()[-500:]}")
+        
+        by_diff_id: Dict[str, List[Dict[str, Any]]] = {}
+        for target in json.loads(result.stdout).get("Results") or []:
+            for vuln in target.get("Vulnerabilities") or []:
+                by_diff_id.setdefault((vuln.get("Layer") or {}).get("DiffID", ""), []).append({
+                    "type": "vulnerability",
+                    "severity": vuln.get("Severity", "UNKNOWN").lower(),
+                    "title": vuln.get("VulnerabilityID", "Unknown"),
+                    "description": vuln.get("Title", "No description"),
+                    "package": vuln.get("PkgName", ""),
+                    "installed_version": vuln.get("InstalledVersion", ""),
+                    "fixed_version": vuln.get("FixedVersion", ""),
+                    "confidence": 1.0
+                })
+        return by_diff_id
+    
+    def _read_text(self, path: str) -> Optional[str]:
+        if self.snapshot is not None:
+            return self.snapshot.read_text(path) if self.snapshot.get(path) is not None else None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _summarize(issues: List[Dict[str, Any]]) -> Dict[str, int]:
+        return {
+            "total": len(issues),
+            "critical": len([i for i in issues if i["severity"] == "critical"]),
+            "high": len([i for i in issues if i["severity"] == "high"]),
+            "medium": len([i for i in issues if i["severity"] == "medium"])
+        }
+    
     def _parse_trivy_results(self, data: Dict, source: str) -> Dict[str, Any]:
         """Parse les résultats Trivy en format standardisé"""
         issues = []
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Pipeline Server - Daemon local gardant les clients et caches chauds entre les jobs
+"""
+
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Iterator
+
+from ai.bedrock_pool import create_bedrock_client
+from main import SmartPipeline
+from result_cache import ResultCache
+
+
+# Valeurs gardées en mémoire par le cache du daemon (le reste est relu du disque)
+DEFAULT_MEMORY_ENTRIES = 10000
+
+
+class TrivyServer:
+    """Process `trivy server`: la base de vulnérabilités est chargée une seule fois"""
+    
+    def __init__(self, listen: str = "127.0.0.1:4954", cache_dir: Optional[str] = None):
+        self.listen = listen
+        self.cache_dir = cache_dir
+        self.process = None
+    
+    @property
+    def url(self) -> Optional[str]:
+        return f"http://{self.listen}" if self.process is not None else None
+    
+    def start(self, timeout: float = 120) -> bool:
+        """Démarre le serveur et attend qu'il réponde; False si trivy est absent ou ne démarre pas"""
+        if shutil.which("trivy") is None:
+            return False
+        cmd = ["trivy", "server", "--listen", self.listen]
+        if self.cache_dir:
+            cmd += ["--cache-dir", self.cache_dir]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Téléchargement de la base au premier démarrage: les scans attendent le serveur
+        if not self.wait_ready(timeout):
+            self.stop()
+            return False
+        return True
+    
+    def wait_ready(self, timeout: float, interval: float = 0.5) -> bool:
+        """Poll GET /healthz jusqu'à une réponse 200; False si le process s'arrête ou au timeout"""
+        host, _, port = self.listen.rpartition(":")
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.process.poll() is not None:
+                return False
+            connection = http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=interval)
+            try:
+                connection.request("GET", "/healthz")
+                if connection.getresponse().status == 200:
+                    return True
+            except (OSError, http.client.HTTPException):
+                pass
+            finally:
+                connection.close()
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+    
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+
+class PipelineServer:
+    """État partagé du daemon: configuration, client Bedrock, cache, Trivy.
+
+    Chaque job construit son propre SmartPipeline (snapshot du dépôt,
+    scanners, analyzers) mais réutilise ces composants: pas de démarrage
+    Python, de construction de client boto3 ni de rechargement du cache.
+    """
+    
+    def __init__(self, config_path: str = "pipeline/config.json", max_jobs: int = 4):
+        with open(config_path, 'r') as f:
+            self.config = json.load(f)
+        
+        self.bedrock_client = create_bedrock_client(self.config["bedrock"])
+        
+        cache_config = self.config.get("cache", {})
+        cache_dir = cache_config.get("directory", ".pipeline_cache")
+        # Process de longue durée: mémoire du cache bornée (LRU)
+        memory_entries = cache_config.get("memory_entries", DEFAULT_MEMORY_ENTRIES)
+        self.cache = ResultCache(os.path.join(cache_dir, "results"), memory_entries) \
+            if cache_config.get("enabled", True) else None
+        
+        # Démarré et prêt avant le premier job; sinon les scans utilisent trivy en local
+        server_config = self.config.get("server", {})
+        self.trivy_server = TrivyServer(server_config.get("trivy_listen", "127.0.0.1:4954"))
+        if self.config["scanners"].get("trivy", False):
+            self.trivy_server.start(server_config.get("trivy_start_timeout", 120))
+        
+        self.max_jobs = max_jobs
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.jobs_total = 0
+        self.jobs_running = 0
+    
+    def run_job(self, root: str, batch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Exécute un job et produit ses événements (log, puis result ou error)"""
+        events: List[Dict[str, Any]] = []
+        ready = threading.Condition()
+        done = []
+        
+        def log(*args):
+            with ready:
+                events.append({"event": "log", "message": " ".join(str(a) for a in args)})
+                ready.notify()
+        
+        def worker():
+            try:
+                with self._slots:
+                    with self._lock:
+                        self.jobs_running += 1
+                    try:
+                        pipeline = SmartPipeline(
+                            root=root, batch=batch, config=self.config,
+                            bedrock_client=self.bedrock_client, cache=self.cache,
+                            trivy_server=self.trivy_server.url, log=log
+                        )
+                        result = pipeline.execute()
+                        final = {
+                            "event": "result",
+                            "decision": result["decision"],
+                            "risk_score": result["risk_score"],
+                            "severity_counts": result["severity_counts"],
+                            "total_issues": result["total_issues"]
+                        }
+                    finally:
+                        with self._lock:
+                            self.jobs_running -= 1
+                            self.jobs_total += 1
+            except Exception as e:
+                final = {"event": "error", "error": str(e)}
+            with ready:
+                events.append(final)
+                done.append(True)
+                ready.notify()
+        
+        threading.Thread(target=worker, daemon=True).start()
+        
+        sent = 0
+        while True:
+            with ready:
+                while sent == len(events) and not done:
+                    ready.wait()
+                pending = events[sent:]
+                sent = len(events)
+                finished = bool(done) and sent == len(events)
+            for event in pending:
+                yield event
+            if finished:
+                return
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "status": "ok",
+                "uptime": round(time.time() - self.started_at, 1),
+                "jobs_running": self.jobs_running,
+                "jobs_total": self.jobs_total,
+                "max_jobs": self.max_jobs,
+                "trivy_server": self.trivy_server.url
+            }
+        stats["bedrock_usage"] = self.bedrock_client.get_usage()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if hasattr(self.bedrock_client, "get_endpoint_stats"):
+            stats["endpoints"] = self.bedrock_client.get_endpoint_stats()
+        if hasattr(self.bedrock_client, "get_hedge_stats"):
+            stats["hedging"] = self.bedrock_client.get_hedge_stats()
+        if hasattr(self.bedrock_client, "get_tier_stats"):
+            stats["tiers"] = self.bedrock_client.get_tier_stats()
+        return stats
+    
+    def close(self):
+        self.trivy_server.stop()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """API locale: GET /health, POST /jobs (réponse NDJSON en streaming)"""
+    
+    protocol_version = "HTTP/1.0"
+    
+    def do_GET(self):
+        if self.path in ("/health", "/stats"):
+            self._send_json(200, self.server.pipeline_server.stats())
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+    
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "Invalid JSON body"})
+            return
+        
+        root = job.get("root")
+        if not root or not os.path.isdir(root):
+            self._send_json(400, {"error": f"Directory not found: {root}"})
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for event in self.server.pipeline_server.run_job(root, batch=bool(job.get("batch", False))):
+            try:
+                self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client parti: le job se termine quand même (cache alimenté)
+                continue
+    
+    def _send_json(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def address_string(self) -> str:
+        # Socket Unix: pas d'adresse client
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+    
+    def log_message(self, format: str, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def serve(config_path: str, socket_path: Optional[str] = None, host: str = "127.0.0.1",
+          port: int = 8765, max_jobs: int = 4):
+    """Démarre le daemon sur un socket Unix (prioritaire) ou en HTTP local"""
+    pipeline_server = PipelineServer(config_path, max_jobs=max_jobs)
+    
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        httpd = UnixHTTPServer(socket_path, JobRequestHandler)
+        address = f"unix://{socket_path}"
+    else:
+        httpd = ThreadingHTTPServer((host, port), JobRequestHandler)
+        address = f"http://{host}:{port}"
+    httpd.pipeline_server = pipeline_server
+    
+    def stop(signum, frame):
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Pipeline server listening on {address} (max {max_jobs} concurrent jobs)")
+    if pipeline_server.trivy_server.url:
+        print(f"Trivy server: {pipeline_server.trivy_server.url}")
+    elif pipeline_server.config["scanners"].get("trivy", False):
+        print("Trivy server unavailable: jobs run trivy locally")
+    
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        pipeline_server.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _connect(address: str) -> http.client.HTTPConnection:
+    """unix:///chemin/du/socket ou http://hote:port"""
+    if address.startswith("unix://"):
+        return UnixHTTPConnection(address[len("unix://"):])
+    host = address[len("http://"):] if address.startswith("http://") else address
+    return http.client.HTTPConnection(host)
+
+
+def submit_job(address: str, root: str, batch: bool = False) -> Iterator[Dict[str, Any]]:
+    """Envoie un job au daemon et produit les événements au fil de l'eau"""
+    connection = _connect(address)
+    body = json.dumps({"root": os.path.abspath(root), "batch": batch})
+    connection.request("POST", "/jobs", body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    
+    if response.status != 200:
+        data = json.loads(response.read() or b"{}")
+        yield {"event": "error", "error": data.get("error", f"HTTP {response.status}")}
+        return
+    
+    try:
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        connection.close()
+
+
+def main():
+    """Test du daemon: état d'un serveur déjà démarré"""
+    import sys
+    
+    address = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8765"
+    connection = _connect(address)
+    connection.request("GET", "/health")
+    print(json.dumps(json.loads(connection.getresponse().read()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
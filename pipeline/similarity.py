@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Similarity Index - Détection des fichiers quasi identiques (MinHash + LSH)
+"""
+
+import difflib
+import hashlib
+import random
+import re
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+
+# Nombre premier de Mersenne 2^61 - 1 pour les permutations MinHash
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 61) - 1
+
+COMMENT_PATTERN = re.compile(r'^\s*(#|//)')
+TOKEN_PATTERN = re.compile(r'[A-Za-z_][\w.-]*|\d+|\S')
+
+
+def normalize_tokens(content: str) -> List[str]:
+    """Tokens du fichier sans commentaires ni espaces (indentation, alignement)"""
+    tokens = []
+    for line in content.splitlines():
+        if COMMENT_PATTERN.match(line):
+            continue
+        tokens.extend(TOKEN_PATTERN.findall(line))
+    return tokens
+
+
+class SimilarityIndex:
+    """Index MinHash des fichiers déjà analysés.
+
+    Chaque fichier est réduit à une signature de num_perm minimums sur ses
+    shingles de tokens; la signature est découpée en bandes et chaque bande
+    est une clé de bucket (LSH). Une requête ne compare donc que les
+    fichiers partageant au moins une bande, sans comparaison deux à deux.
+    """
+    
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, max_changed_ratio: float = 0.5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_changed_ratio = max_changed_ratio
+        
+        rng = random.Random(42)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(bands)]
+        self._entries: Dict[str, Tuple[Tuple[int, ...], Any]] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.remapped_issues = 0
+    
+    def signature(self, content: str) -> Tuple[int, ...]:
+        """Signature MinHash du contenu normalisé"""
+        tokens = normalize_tokens(content)
+        size = min(self.shingle_size, max(len(tokens), 1))
+        hashes = {
+            int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode("utf-8"), digest_size=8).digest(), "big")
+            for i in range(max(len(tokens) - size + 1, 1))
+        }
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes) if hashes else MAX_HASH
+            for a, b in self._permutations
+        )
+    
+    def add(self, key: str, signature: Tuple[int, ...], payload: Any):
+        """Ajoute (ou remplace) un fichier analysé"""
+        with self._lock:
+            if key not in self._entries:
+                for band, bucket in zip(self._bands(signature), self._buckets):
+                    bucket.setdefault(band, []).append(key)
+            self._entries[key] = (signature, payload)
+    
+    def query(self, signature: Tuple[int, ...], exclude: Optional[str] = None) -> Optional[Tuple[str, float, Any]]:
+        """Fichier indexé le plus proche au-dessus du seuil: (clé, similarité, payload)"""
+        with self._lock:
+            candidates = set()
+            for band, bucket in zip(self._bands(signature), self._buckets):
+                candidates.update(bucket.get(band, ()))
+            candidates.discard(exclude)
+            
+            best = None
+            for key in candidates:
+                other, payload = self._entries[key]
+                score = self.estimate(signature, other)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (key, score, payload)
+            return best
+    
+    def estimate(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimation de la similarité de Jaccard entre deux signatures"""
+        return sum(1 for a, b in zip(first, second) if a == b) / self.num_perm
+    
+    def partition(self, items: List[Tuple[str, str]]) -> Tuple[List[str], List[str]]:
+        """Sépare (clé, contenu) en représentants et copies d'un représentant.
+
+        Les représentants sont analysés en premier, les copies peuvent
+        ensuite réutiliser leur analyse.
+        """
+        local = SimilarityIndex(self.threshold, self.num_perm, self.bands, self.shingle_size)
+        leaders, followers = [], []
+        for key, content in items:
+            signature = self.signature(content)
+            if local.query(signature) is not None or self.query(signature, exclude=key) is not None:
+                followers.append(key)
+            else:
+                leaders.append(key)
+                local.add(key, signature, None)
+        return leaders, followers
+    
+    def line_mapping(self, reference: str, content: str) -> "LineMapping":
+        """Correspondance des lignes entre un fichier indexé et sa copie"""
+        return LineMapping(reference, content)
+    
+    def record_reuse(self, remapped_issues: int):
+        with self._lock:
+            self.reused += 1
+            self.remapped_issues += remapped_issues
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"indexed": len(self._entries), "reused": self.reused, "remapped_issues": self.remapped_issues}
+    
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+
+class LineMapping:
+    """Correspondance des lignes entre un fichier de référence et sa copie"""
+    
+    def __init__(self, reference: str, content: str, context: int = 3):
+        self.old_lines = reference.splitlines()
+        self.new_lines = content.splitlines()
+        matcher = difflib.SequenceMatcher(None, self.old_lines, self.new_lines, autojunk=False)
+        self.opcodes = matcher.get_opcodes()
+        self.context = context
+    
+    def map_line(self, line: int) -> Optional[int]:
+        """Ligne (1-based) de la référence -> ligne de la copie, None si modifiée"""
+        for tag, i1, i2, j1, j2 in self.opcodes:
+            if tag == "equal" and i1 <= line - 1 < i2:
+                return j1 + (line - 1 - i1) + 1
+        return None
+    
+    def hunks(self) -> List[Tuple[int, int]]:
+        """Plages (début, fin) 1-based de la copie à ré-analyser, contexte inclus"""
+        ranges = []
+        for tag, i1, i2, j1, j2 in self.opcodes:
+            if tag == "equal":
+                continue
+            # Une suppression peut retirer un contrôle: on ré-analyse autour
+            start = max(j1 - self.context, 0)
+            end = min(max(j2, j1 + 1) + self.context, len(self.new_lines))
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+            else:
+                ranges.append((start, end))
+        return [(start + 1, end) for start, end in ranges if end > start]
+    
+    def changed_ratio(self) -> float:
+        """Part des lignes de la copie couvertes par les hunks"""
+        if not self.new_lines:
+            return 1.0
+        return sum(end - start + 1 for start, end in self.hunks()) / len(self.new_lines)
+    
+    def excerpt(self, start: int, end: int) -> str:
+        return "\n".join(self.new_lines[start - 1:end])
+
+
+def main():
+    """Test de l'index"""
+    import sys
+    
+    if len(sys.argv) < 3:
+        print("Usage: similarity.py <fichier> <fichier>")
+        return
+    
+    index = SimilarityIndex()
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        reference = f.read()
+    with open(sys.argv[2], 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    similarity = index.estimate(index.signature(reference), index.signature(content))
+    mapping = LineMapping(reference, content)
+    print(f"Similarity: {similarity:.2f}")
+    print(f"Changed ratio: {mapping.changed_ratio():.2f}")
+    print(f"Hunks: {mapping.hunks()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Repo Snapshot - Index unique des fichiers du dépôt, partagé par tous les composants
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+
+EXCLUDED_DIRS = {".git", "node_modules", ".next", "__pycache__", ".terraform", ".pipeline_cache", ".venv", "venv"}
+
+LANGUAGES = {
+    ".tf": "terraform",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".py": "python",
+    ".go": "go",
+    ".json": "json",
+    ".yml": "yaml",
+    ".yaml": "yaml"
+}
+
+
+def detect_language(path: str) -> Optional[str]:
+    """Langage d'un fichier d'après son nom"""
+    name = os.path.basename(path)
+    if name == "Dockerfile" or name.startswith("Dockerfile.") or name.endswith(".dockerfile"):
+        return "dockerfile"
+    return LANGUAGES.get(os.path.splitext(name)[1].lower())
+
+
+def glob_to_regex(pattern: str) -> "re.Pattern":
+    """Traduit un glob (avec ** et {a,b}) en regex sur chemins relatifs"""
+    return re.compile(glob_to_pattern(pattern) + r"\Z")
+
+
+def glob_to_pattern(pattern: str) -> str:
+    """Source de la regex d'un glob, pour la combiner avec d'autres"""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[" and pattern.find("]", i + 1) != -1:
+            end = pattern.find("]", i + 1)
+            chars = pattern[i + 1:end]
+            regex += "[" + ("^" + chars[1:] if chars.startswith("!") else chars) + "]"
+            i = end
+        elif char == "{":
+            end = pattern.find("}", i)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                options = pattern[i + 1:end].split(",")
+                regex += "(?:" + "|".join(re.escape(o) for o in options) + ")"
+                i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+class FileEntry:
+    """Un fichier du snapshot: métadonnées, hash et contenu si petit"""
+    
+    __slots__ = ("path", "size", "mtime_ns", "sha256", "language", "content")
+    
+    def __init__(self, path: str, size: int, mtime_ns: int, sha256: str = "",
+                 content: Optional[bytes] = None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        self.language = detect_language(path)
+        self.content = content
+
+
+class RepoSnapshot:
+    """Parcourt le dépôt une seule fois (en parallèle) et indexe chaque fichier.
+
+    Le hash de chaque fichier est conservé d'un run à l'autre avec sa taille
+    et son mtime: un fichier inchangé n'est ni relu ni re-hashé. Le contenu
+    des petits fichiers est gardé en mémoire pour les analyzers.
+
+    Les chemins ignorés (ignore: PathMatcher) sont écartés pendant le
+    parcours, répertoires compris: aucun composant ne les voit.
+    """
+    
+    def __init__(self, root: str = ".", cache_dir: str = ".pipeline_cache",
+                 max_content_size: int = 256 * 1024, max_workers: int = 8,
+                 ignore: Optional[Any] = None):
+        self.root = root
+        self.ignore = ignore
+        self.index_path = os.path.join(cache_dir, "snapshot_index.json")
+        self.max_content_size = max_content_size
+        self.max_workers = max_workers
+        self.files: Dict[str, FileEntry] = {}
+        self.stats = {"files": 0, "hashed": 0, "reused": 0, "ignored": 0}
+        self._patterns = {}
+    
+    def build(self) -> "RepoSnapshot":
+        """Parcourt l'arborescence et calcule les hashes manquants"""
+        previous = self._load_index()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            found = []
+            directories = [""]
+            while directories:
+                next_directories = []
+                for files, subdirs, ignored in executor.map(self._scan_directory, directories):
+                    found.extend(files)
+                    next_directories.extend(subdirs)
+                    self.stats["ignored"] += ignored
+                directories = next_directories
+            
+            to_hash = []
+            for path, size, mtime_ns in found:
+                known = previous.get(path)
+                if known and known[0] == size and known[1] == mtime_ns:
+                    self.files[path] = FileEntry(path, size, mtime_ns, known[2])
+                    self.stats["reused"] += 1
+                else:
+                    to_hash.append((path, size, mtime_ns))
+            
+            for entry in executor.map(self._hash_file, to_hash):
+                if entry is not None:
+                    self.files[entry.path] = entry
+                    self.stats["hashed"] += 1
+        
+        self.stats["files"] = len(self.files)
+        return self
+    
+    def save_index(self):
+        """Persiste taille/mtime/hash pour le prochain run"""
+        index = {path: [e.size, e.mtime_ns, e.sha256] for path, e in self.files.items()}
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+    
+    def get(self, path: str) -> Optional[FileEntry]:
+        """Retourne l'entrée d'un fichier (chemin relatif à la racine)"""
+        return self.files.get(self._normalize(path))
+    
+    def exists(self, path: str) -> bool:
+        """Indique si un fichier, ou un répertoire contenant des fichiers, existe"""
+        path = self._normalize(path)
+        if path in self.files:
+            return True
+        prefix = path.rstrip("/") + "/"
+        return any(p.startswith(prefix) for p in self.files)
+    
+    def glob(self, pattern: str) -> List[FileEntry]:
+        """Fichiers correspondant à un glob (supporte ** et {a,b})"""
+        regex = self._patterns.get(pattern)
+        if regex is None:
+            regex = self._patterns[pattern] = glob_to_regex(self._normalize(pattern))
+        return [e for path, e in sorted(self.files.items()) if regex.match(path)]
+    
+    def by_language(self, language: str, directory: str = "") -> List[FileEntry]:
+        """Fichiers d'un langage, éventuellement limités à un répertoire"""
+        prefix = self._normalize(directory).rstrip("/") + "/" if directory else ""
+        return [
+            e for path, e in sorted(self.files.items())
+            if e.language == language and path.startswith(prefix)
+        ]
+    
+    def read_bytes(self, path: str) -> bytes:
+        """Contenu d'un fichier, depuis la mémoire si possible"""
+        entry = self.get(path)
+        if entry is not None and entry.content is not None:
+            return entry.content
+        
+        with open(os.path.join(self.root, self._normalize(path)), 'rb') as f:
+            content = f.read()
+        
+        if entry is not None and len(content) <= self.max_content_size:
+            entry.content = content
+        return content
+    
+    def read_text(self, path: str) -> str:
+        return self.read_bytes(path).decode("utf-8")
+    
+    def _normalize(self, path: str) -> str:
+        """Chemin relatif à la racine, séparateurs /"""
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        path = path.replace(os.sep, "/")
+        while path.startswith("./"):
+            path = path[2:]
+        return "" if path == "." else path
+    
+    def _scan_directory(self, relative_dir: str) -> Tuple[List[Tuple[str, int, int]], List[str], int]:
+        """Liste un répertoire: (fichiers avec stat, sous-répertoires, entrées ignorées)"""
+        files = []
+        subdirs = []
+        ignored = 0
+        try:
+            with os.scandir(os.path.join(self.root, relative_dir) if relative_dir else self.root) as it:
+                for entry in it:
+                    path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in EXCLUDED_DIRS:
+                            continue
+                        if self.ignore and self.ignore.match(path, is_dir=True):
+                            ignored += 1
+                        else:
+                            subdirs.append(path)
+                    elif entry.is_file(follow_symlinks=False):
+                        if self.ignore and self.ignore.match(path):
+                            ignored += 1
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            pass
+        return files, subdirs, ignored
+    
+    def _hash_file(self, item: Tuple[str, int, int]) -> Optional[FileEntry]:
+        """Lit et hashe un fichier; garde le contenu s'il est petit"""
+        path, size, mtime_ns = item
+        try:
+            with open(os.path.join(self.root, path), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        
+        return FileEntry(
+            path, size, mtime_ns,
+            hashlib.sha256(content).hexdigest(),
+            content if size <= self.max_content_size else None
+        )
+    
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+def main():
+    """Test du snapshot"""
+    snapshot = RepoSnapshot(".").build()
+    print(f"Snapshot: {snapshot.stats}")
+    for entry in snapshot.glob("terraform/**/*.tf"):
+        print(f"  {entry.path} {entry.size}B {entry.sha256[:12]}")
+
+
+if __name__ == "__main__":
+    main()
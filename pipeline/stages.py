@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Stages - Graphe d'étapes du pipeline et exécution parallèle
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Callable, Optional
+
+
+class Stage:
+    """Une étape du pipeline.
+
+    inputs sont des noms d'artefacts: l'étape démarre dès que toutes les
+    étapes produisant ces artefacts sont terminées, et reçoit pour chacun la
+    liste des valeurs produites. output est l'artefact produit (None: aucun);
+    une valeur None n'est pas publiée.
+    """
+    
+    def __init__(self, name: str, run: Callable[[Dict[str, List[Any]]], Any],
+                 inputs: Optional[List[str]] = None, output: Optional[str] = None):
+        self.name = name
+        self.run = run
+        self.inputs = inputs or []
+        self.output = output
+
+
+class StageGraph:
+    """Graphe d'étapes exécuté au plus tôt sur un pool de threads"""
+    
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self.stages: List[Stage] = []
+        self.timeline: List[Dict[str, Any]] = []
+        self._subscribers: Dict[str, List[Callable[[str, Any], None]]] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, stage: Stage) -> Stage:
+        if any(s.name == stage.name for s in self.stages):
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        self.stages.append(stage)
+        return stage
+    
+    def subscribe(self, artifact: str, callback: Callable[[str, Any], None]):
+        """callback(stage, valeur) appelé dès qu'une étape publie l'artefact"""
+        self._subscribers.setdefault(artifact, []).append(callback)
+    
+    def dependencies(self, stage: Stage) -> List[str]:
+        """Étapes produisant les artefacts attendus par une étape"""
+        return [s.name for s in self.stages if s.output in stage.inputs and s is not stage]
+    
+    def run(self) -> Dict[str, List[Any]]:
+        """Exécute toutes les étapes et retourne les artefacts produits"""
+        dependencies = {s.name: set(self.dependencies(s)) for s in self.stages}
+        self._check_cycles(dependencies)
+        
+        # Valeurs dans l'ordre d'enregistrement des étapes, pour un résultat stable
+        produced: Dict[str, Any] = {}
+        pending = {s.name: s for s in self.stages}
+        done = set()
+        started_at = time.time()
+        self.timeline = []
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name in [n for n in pending if dependencies[n] <= done]:
+                    stage = pending.pop(name)
+                    running[executor.submit(self._run_stage, stage, produced, started_at)] = stage
+                
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    value = future.result()
+                    done.add(stage.name)
+                    if stage.output is not None and value is not None:
+                        with self._lock:
+                            produced[stage.name] = value
+                        for callback in self._subscribers.get(stage.output, []):
+                            callback(stage.name, value)
+        
+        return self._artifacts(produced)
+    
+    def critical_path(self) -> List[str]:
+        """Chaîne d'étapes dépendantes qui a déterminé la durée totale"""
+        if not self.timeline:
+            return []
+        entries = {entry["stage"]: entry for entry in self.timeline}
+        stages = {s.name: s for s in self.stages}
+        
+        path = [max(self.timeline, key=lambda e: e["end"])["stage"]]
+        while True:
+            previous = [entries[d] for d in self.dependencies(stages[path[-1]]) if d in entries]
+            if not previous:
+                break
+            path.append(max(previous, key=lambda e: e["end"])["stage"])
+        return list(reversed(path))
+    
+    def _run_stage(self, stage: Stage, produced: Dict[str, Any], started_at: float) -> Any:
+        with self._lock:
+            inputs = {name: values for name, values in self._artifacts(produced).items() if name in stage.inputs}
+        for name in stage.inputs:
+            inputs.setdefault(name, [])
+        
+        start = time.time()
+        try:
+            return stage.run(inputs)
+        finally:
+            end = time.time()
+            with self._lock:
+                self.timeline.append({
+                    "stage": stage.name,
+                    "start": round(start - started_at, 3),
+                    "end": round(end - started_at, 3),
+                    "duration": round(end - start, 3)
+                })
+    
+    def _artifacts(self, produced: Dict[str, Any]) -> Dict[str, List[Any]]:
+        artifacts: Dict[str, List[Any]] = {}
+        for stage in self.stages:
+            if stage.name in produced:
+                artifacts.setdefault(stage.output, []).append(produced[stage.name])
+        return artifacts
+    
+    def _check_cycles(self, dependencies: Dict[str, set]):
+        visiting, visited = set(), set()
+        
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in stage graph at: {name}")
+            visiting.add(name)
+            for dependency in dependencies[name]:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+        
+        for name in dependencies:
+            visit(name)
+
+
+def main():
+    """Test du graphe: deux branches parallèles puis une étape finale"""
+    graph = StageGraph()
+    graph.add(Stage("slow", lambda inputs: time.sleep(0.3) or "slow", output="results"))
+    graph.add(Stage("fast", lambda inputs: time.sleep(0.1) or "fast", output="results"))
+    graph.add(Stage("gate", lambda inputs: sorted(inputs["results"]), inputs=["results"], output="decision"))
+    
+    started = time.time()
+    artifacts = graph.run()
+    print(f"Artifacts: {artifacts}")
+    print(f"Wall time: {time.time() - started:.2f}s")
+    print(f"Critical path: {' -> '.join(graph.critical_path())}")
+
+
+if __name__ == "__main__":
+    main()
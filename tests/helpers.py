@@ -0,0 +1,72 @@
+"""
+Helpers de test - Bedrock local (LocalDirectoryBackend, runtime local) et dépôts temporaires
+"""
+
+import io
+import json
+import os
+import re
+from typing import Dict, List, Any, Callable
+
+from ai.bedrock_client import BedrockClient
+from snapshot import RepoSnapshot
+
+
+MODEL_ID = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+
+
+class LocalRuntime:
+    """Remplace le client boto3 bedrock-runtime: chaque modelInput passe par processor.
+
+    processor a la même signature que celui de LocalDirectoryBackend
+    (modelInput -> modelOutput): un même processor sert au mode batch et
+    aux appels directs.
+    """
+    
+    def __init__(self, processor: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.processor = processor
+        self.calls: List[Dict[str, Any]] = []
+    
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        model_input = json.loads(body)
+        self.calls.append(model_input)
+        return {"body": io.BytesIO(json.dumps(self.processor(model_input)).encode("utf-8"))}
+
+
+def local_client(processor: Callable[[Dict[str, Any]], Dict[str, Any]], model_id: str = MODEL_ID) -> BedrockClient:
+    """BedrockClient dont les appels passent par processor"""
+    client = BedrockClient(model_id=model_id, region="us-east-1")
+    client.client = LocalRuntime(processor)
+    return client
+
+
+def model_output(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Réponse Anthropic (modelOutput) contenant payload en JSON"""
+    return {
+        "content": [{"type": "text", "text": json.dumps(payload)}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": 10, "output_tokens": 5}
+    }
+
+
+def prompt_text(model_input: Dict[str, Any]) -> str:
+    """Partie variable du prompt (message utilisateur)"""
+    content = model_input["messages"][0]["content"]
+    if isinstance(content, list):
+        return "\n".join(block.get("text", "") for block in content)
+    return content
+
+
+def tagged_lines(model_input: Dict[str, Any], pattern: str) -> List[int]:
+    """Numéros "N|" des lignes compactées dont le code correspond à pattern"""
+    return [int(n) for n, code in re.findall(r"(?m)^(\d+)\|(.*)$", prompt_text(model_input)) if re.search(pattern, code)]
+
+
+def write_repo(root: str, files: Dict[str, str]) -> RepoSnapshot:
+    """Écrit les fichiers sous root et retourne le snapshot du dépôt"""
+    for path, content in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return RepoSnapshot(root, cache_dir=os.path.join(root, ".pipeline_cache")).build()
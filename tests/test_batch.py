@@ -0,0 +1,148 @@
+"""
+Tests du mode batch avec le backend local (LocalDirectoryBackend)
+"""
+
+from ai.batch_runner import BatchRunner, LocalDirectoryBackend
+from ai.docker_analyzer import DockerAnalyzer
+from ai.terraform_analyzer import TerraformAnalyzer
+from result_cache import ResultCache
+from helpers import local_client, model_output, prompt_text, tagged_lines, write_repo
+
+
+DOCKERFILE = """# Image de l'API
+
+FROM node:20
+
+# Dépendances
+RUN npm install
+CMD ["node", "index.js"]
+"""
+
+
+def test_batch_job_through_local_backend(tmp_path):
+    """Le job passe par le backend local; les lignes compactées sont retraduites"""
+    snapshot = write_repo(str(tmp_path / "repo"), {"Dockerfile": DOCKERFILE})
+    
+    def processor(model_input):
+        # Le modèle compte les lignes du texte compacté (FROM=1, RUN=2)
+        return model_output({"issues": [{"line": 2, "severity": "medium", "title": "npm install",
+                                         "description": "d", "confidence": 0.9}]})
+    
+    client = local_client(processor)
+    analyzer = DockerAnalyzer(client, snapshot=snapshot, compact_prompts=True)
+    backend = LocalDirectoryBackend(str(tmp_path / "batch"), processor=processor)
+    runner = BatchRunner(client, backend, poll_interval=0, min_records=1)
+    
+    assert runner.add_file(analyzer, "Dockerfile")
+    results = runner.run(job_name="job")
+    
+    assert (tmp_path / "batch" / "job.jsonl.out").exists()
+    assert client.client.calls == []
+    [result] = results
+    assert result["scanner"] == "ai_docker"
+    assert [(i["file"], i["line"]) for i in result["issues"]] == [("Dockerfile", 6)]
+
+
+def test_batch_prompt_keeps_original_line_numbers(tmp_path):
+    """Les enregistrements du job portent les numéros de ligne d'origine"""
+    snapshot = write_repo(str(tmp_path / "repo"), {"Dockerfile": DOCKERFILE})
+    seen = []
+    
+    def processor(model_input):
+        seen.append(tagged_lines(model_input, r"^RUN"))
+        return model_output({"issues": []})
+    
+    client = local_client(processor)
+    runner = BatchRunner(client, LocalDirectoryBackend(str(tmp_path / "batch"), processor=processor),
+                         poll_interval=0, min_records=1)
+    runner.add_file(DockerAnalyzer(client, snapshot=snapshot, compact_prompts=True), "Dockerfile")
+    runner.run(job_name="job")
+    
+    assert seen == [[6]]
+
+
+MAIN_TF = """resource "aws_s3_bucket" "logs" {
+  bucket = "acme-logs"
+}
+
+resource "aws_s3_bucket" "assets" {
+  bucket = "acme-assets"
+}
+"""
+
+WORKER_DOCKERFILE = """FROM python:3.12-slim
+RUN pip install celery
+CMD ["celery", "worker"]
+"""
+
+
+class FailingBackend(LocalDirectoryBackend):
+    """Backend local dont les enregistrements du worker (celery) échouent"""
+    
+    def download_outputs(self, job_id):
+        records = super().download_outputs(job_id)
+        for record in records:
+            if "celery" in prompt_text(record["modelInput"]):
+                del record["modelOutput"]
+                record["error"] = {"errorCode": 408, "errorMessage": "Model timeout"}
+        return records
+
+
+def batch_run(tmp_path, files, analyzer_class, name="job", backend_class=LocalDirectoryBackend, **kwargs):
+    """Un job batch sur un dépôt; retourne (résultats, prompts du job)"""
+    snapshot = write_repo(str(tmp_path / "repo"), files)
+    prompts = []
+    
+    def processor(model_input):
+        prompts.append(prompt_text(model_input))
+        return model_output({"issues": [{"line": 1, "severity": "low", "title": "t", "description": "d", "confidence": 0.9}]})
+    
+    client = local_client(processor)
+    analyzer = analyzer_class(client, snapshot=snapshot, cache=ResultCache(str(tmp_path / "results")), **kwargs)
+    backend = backend_class(str(tmp_path / "batch"), processor)
+    runner = BatchRunner(client, backend, poll_interval=0, min_records=1)
+    for path in files:
+        runner.add_file(analyzer, path)
+    results = runner.run(job_name=name)
+    assert client.client.calls == []
+    return results, prompts
+
+
+def test_batch_reuses_and_fills_the_result_cache(tmp_path):
+    files = {"Dockerfile": DOCKERFILE}
+    first, prompts = batch_run(tmp_path, files, DockerAnalyzer, "first")
+    assert len(prompts) == 1
+    
+    second, prompts = batch_run(tmp_path, files, DockerAnalyzer, "second")
+    assert prompts == []
+    assert not (tmp_path / "batch" / "second.jsonl").exists()
+    assert [i["line"] for i in second[0]["issues"]] == [i["line"] for i in first[0]["issues"]]
+
+
+def test_batch_sends_only_changed_terraform_blocks(tmp_path):
+    batch_run(tmp_path, {"terraform/main.tf": MAIN_TF}, TerraformAnalyzer, "first", block_granular=True)
+    
+    changed = MAIN_TF.replace('"acme-assets"', '"acme-static"')
+    _, prompts = batch_run(tmp_path, {"terraform/main.tf": changed}, TerraformAnalyzer, "second", block_granular=True)
+    [prompt] = prompts
+    assert "acme-static" in prompt
+    assert "acme-logs" not in prompt
+
+
+def test_batch_sends_shared_docker_stages_once(tmp_path):
+    files = {"Dockerfile": DOCKERFILE, "services/api/Dockerfile": DOCKERFILE}
+    results, prompts = batch_run(tmp_path, files, DockerAnalyzer, stage_granular=True)
+    assert len(prompts) == 1
+    assert sorted({i["file"] for i in results[0]["issues"]}) == sorted(files)
+
+
+def test_failed_record_is_reported_for_its_file(tmp_path):
+    files = {"Dockerfile": DOCKERFILE, "worker/Dockerfile": WORKER_DOCKERFILE}
+    results, _ = batch_run(tmp_path, files, DockerAnalyzer, backend_class=FailingBackend)
+    [result, error] = results
+    assert error == {"error": "Model timeout", "file": "worker/Dockerfile", "scanner": "ai_docker"}
+    assert {i["file"] for i in result["issues"]} == {"Dockerfile"}
+    
+    # L'échec n'est pas mis en cache: le fichier repart dans le job suivant
+    _, prompts = batch_run(tmp_path, files, DockerAnalyzer, "retry")
+    assert len(prompts) == 1 and "celery" in prompts[0]
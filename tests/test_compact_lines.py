@@ -0,0 +1,94 @@
+"""
+Tests des numéros de ligne avec compact_prompts: le modèle compte parfois les lignes de l'extrait compacté
+"""
+
+import re
+
+from ai.docker_analyzer import DockerAnalyzer
+from ai.prompt_compactor import compact
+from ai.terraform_analyzer import TerraformAnalyzer
+from similarity import SimilarityIndex
+from helpers import local_client, model_output, prompt_text, write_repo
+
+
+ACL_BLOCK = """resource "aws_s3_bucket_acl" "logs" {
+  # ACL reprise de l'ancien compte
+  # à revoir avec l'équipe réseau
+  bucket = aws_s3_bucket.logs.id
+  acl    = "public-read"
+}
+"""
+
+FINAL_STAGE = """FROM node:20-slim
+# image finale
+# sans outils de build
+COPY --from=build /app /app
+USER root
+CMD ["node", "/app/server.js"]
+"""
+
+REFERENCE_TF = "".join(f'resource "aws_s3_bucket" "b{n}" {{\n  bucket = "b{n}"\n}}\n\n' for n in range(6))
+
+
+def counting_processor(pattern, title="ACL publique", resource="aws_s3_bucket_acl.logs"):
+    """Rend la position de la ligne qui correspond à pattern, comptée dans son extrait compacté"""
+    def processor(model_input):
+        excerpts = [re.findall(r"(?m)^\d+\|(.*)$", part) for part in prompt_text(model_input).split("```")[1::2]]
+        excerpt = next((lines for lines in excerpts if any(re.search(pattern, code) for code in lines)), None)
+        if excerpt is None:
+            return model_output({"issues": []})
+        position = next(n for n, code in enumerate(excerpt, 1) if re.search(pattern, code))
+        return model_output({"issues": [{"line": position, "severity": "high", "title": title,
+                                         "description": "d", "confidence": 0.9, "resource": resource}]})
+    return processor
+
+
+def acl_line(content):
+    return next(n for n, line in enumerate(content.splitlines(), 1) if re.search(r"acl\s+=", line))
+
+
+def test_block_line_counted_in_compacted_excerpt_is_mapped_to_the_file():
+    content = 'resource "aws_s3_bucket" "logs" {\n  bucket = "logs"\n}\n\n' + ACL_BLOCK
+    analyzer = TerraformAnalyzer(local_client(counting_processor(r"acl\s+=")), block_granular=True, compact_prompts=True)
+    result = analyzer.analyze_content("main.tf", content)
+    assert [i["line"] for i in result["issues"]] == [acl_line(content)]
+
+
+def test_hunk_line_counted_in_compacted_excerpt_is_mapped_to_the_file():
+    content = REFERENCE_TF + ACL_BLOCK
+    analyzer = TerraformAnalyzer(local_client(counting_processor(r"acl\s+=")), compact_prompts=True,
+                                 similarity=SimilarityIndex())
+    match = ("reference.tf", 0.9, (REFERENCE_TF, []))
+    result = analyzer._analyze_near_duplicate("copy.tf", content, match)
+    assert result["reused_from"] == "reference.tf"
+    assert [i["line"] for i in result["issues"]] == [acl_line(content)]
+
+
+def test_stage_line_counted_in_compacted_excerpt_is_mapped_in_every_file(tmp_path):
+    files = {
+        "api/Dockerfile": "FROM node:20 AS build\nRUN npm ci\n\n" + FINAL_STAGE,
+        "worker/Dockerfile": "FROM node:20 AS build\nRUN npm ci\nRUN npm run build\n\n" + FINAL_STAGE
+    }
+    snapshot = write_repo(str(tmp_path), files)
+    client = local_client(counting_processor(r"^USER root", "Utilisateur root", "final"))
+    analyzer = DockerAnalyzer(client, snapshot=snapshot, compact_prompts=True, stage_granular=True)
+    result = analyzer.analyze_dockerfiles(list(files))
+    # Stage final commun: un seul appel pour les deux fichiers
+    assert len(client.client.calls) == 3
+    assert result["unique_stages"] == 3
+    assert sorted((i["file"], i["line"]) for i in result["issues"]) == [
+        ("api/Dockerfile", 8), ("worker/Dockerfile", 9)
+    ]
+
+
+def test_compaction_savings_count_line_tags_as_tokens():
+    # Rien à retirer: les préfixes "N|" rendent le texte envoyé plus coûteux
+    compacted = compact('locals {\nname = "api"\nport = 8080\n}', "hcl")
+    assert compacted.compact_tokens > compacted.original_tokens
+    
+    analyzer = TerraformAnalyzer(local_client(lambda model_input: model_output({"issues": []})), compact_prompts=True)
+    analyzer.analyze_content("main.tf", ACL_BLOCK)
+    stats = analyzer.compaction
+    assert 0 < stats["compact_tokens"] < stats["original_tokens"]
+    # Le gain en tokens est plus faible que le gain en caractères
+    assert stats["compact_tokens"] / stats["original_tokens"] > stats["compact_chars"] / stats["original_chars"]
@@ -0,0 +1,58 @@
+"""
+Tests des décisions du hedging, via le runtime local
+"""
+
+import time
+
+import pytest
+
+from ai.bedrock_client import BedrockClient
+from helpers import LocalRuntime, MODEL_ID, model_output
+
+
+def hedged_client(max_extra_requests):
+    """Client dont le runtime principal devient lent après 3 appels; le doublon répond tout de suite"""
+    client = BedrockClient(MODEL_ID, region="us-east-1", hedging={
+        "enabled": True, "min_samples": 3, "max_extra_requests": max_extra_requests, "region": "eu-west-1"
+    })
+    
+    def primary(model_input):
+        if len(client.client.calls) > 3:
+            time.sleep(0.5)
+        return model_output({"issues": []})
+    client.client = LocalRuntime(primary)
+    client.hedge_client = LocalRuntime(lambda model_input: model_output({"issues": []}))
+    return client
+
+
+def test_slow_request_is_hedged_once_enough_latencies_are_known():
+    client = hedged_client(max_extra_requests=1.0)
+    for _ in range(3):
+        # Moins de min_samples latences: jamais de doublon
+        assert client.hedger.delay() is None
+        client.invoke_json("prompt")
+    assert client.hedge_client.calls == []
+    assert client.hedger.delay() is not None
+    
+    started = time.monotonic()
+    client.invoke_json("prompt")
+    assert time.monotonic() - started < 0.4
+    assert len(client.hedge_client.calls) == 1
+    stats = client.get_hedge_stats()[0]
+    assert (stats["requests"], stats["hedged"], stats["hedge_wins"]) == (4, 1, 1)
+
+
+def test_hedging_budget_is_respected():
+    client = hedged_client(max_extra_requests=0.0)
+    for _ in range(4):
+        client.invoke_json("prompt")
+    assert client.hedge_client.calls == []
+    assert client.get_hedge_stats()[0]["hedged"] == 0
+
+
+def test_hedge_model_must_share_the_request_format():
+    with pytest.raises(ValueError):
+        BedrockClient(MODEL_ID, hedging={"enabled": True, "model_id": "amazon.nova-pro-v1:0"})
+    # Inference profile cross-region du même modèle: même format
+    client = BedrockClient(MODEL_ID, hedging={"enabled": True, "model_id": f"eu.{MODEL_ID}"})
+    assert client.hedge_model_id == f"eu.{MODEL_ID}"
@@ -0,0 +1,34 @@
+"""
+Tests de l'historique des runs: un seul répertoire pour l'écriture et pipeline history
+"""
+
+import json
+import os
+
+from main import SmartPipeline, run_history
+from helpers import local_client, model_output, write_repo
+
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "pipeline", "config.json")
+
+
+def test_history_of_another_root_is_found_by_pipeline_history(tmp_path, monkeypatch, capsys):
+    write_repo(str(tmp_path / "repos" / "api"), {"terraform/main.tf": 'resource "aws_s3_bucket" "logs" {\n  bucket = "logs"\n}\n'})
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+    with open(CONFIG_PATH, "r") as f:
+        config = json.load(f)
+    config["history"]["repo"] = "api"
+    
+    client = local_client(lambda model_input: model_output({"issues": []}))
+    pipeline = SmartPipeline(root=str(tmp_path / "repos" / "api"), config=config, bedrock_client=client, log=lambda *args: None)
+    pipeline.execute()
+    
+    # Rien sous la racine analysée, tout dans le répertoire courant
+    assert not (tmp_path / "repos" / "api" / ".pipeline_cache" / "history").exists()
+    assert (workdir / ".pipeline_cache" / "history").is_dir()
+    
+    run_history(CONFIG_PATH, "risk", "api", None, "day", 10, True)
+    rows = json.loads(capsys.readouterr().out)
+    assert sum(row["runs"] for row in rows) == 1
@@ -0,0 +1,48 @@
+"""
+Tests de l'extraction JSON tolérante
+"""
+
+import json
+
+from ai.json_extractor import extract_json
+from helpers import local_client, model_output
+
+
+ISSUES = {"issues": [
+    {"title": "Bucket public", "recommendation": "Utiliser:\n```hcl\nacl = \"private\"\n```"},
+    {"title": "Pas de tags", "recommendation": "Ajouter tags"}
+]}
+
+
+def test_fence_inside_json_string_does_not_close_block():
+    """Un ``` dans une valeur (exemple de code) ne coupe pas le bloc ```json"""
+    content = f"Voici l'analyse:\n```json\n{json.dumps(ISSUES)}\n```\nFin."
+    assert extract_json(content) == ISSUES
+
+
+def test_fence_inside_pretty_printed_json():
+    content = "```json\n" + json.dumps(ISSUES, indent=2) + "\n```"
+    result = extract_json(content)
+    assert [i["title"] for i in result["issues"]] == ["Bucket public", "Pas de tags"]
+    assert "truncated" not in result
+
+
+def test_truncated_fenced_block_keeps_complete_issues():
+    content = '```json\n{"issues": [{"title": "a"}, {"title": "b", "desc'
+    assert extract_json(content) == {"issues": [{"title": "a"}], "truncated": True}
+
+
+def test_several_fenced_blocks_are_merged():
+    content = '```json\n{"issues": [{"title": "a"}]}\n```\net\n```json\n{"issues": [{"title": "b"}]}\n```'
+    assert [i["title"] for i in extract_json(content)["issues"]] == ["a", "b"]
+
+
+def test_client_response_with_code_sample():
+    """Bout en bout: réponse texte du modèle local avec un exemple de code"""
+    def processor(model_input):
+        output = model_output({})
+        output["content"][0]["text"] = f"```json\n{json.dumps(ISSUES)}\n```"
+        return output
+    
+    result = local_client(processor).invoke_json("prompt", schema=None)
+    assert len(result["issues"]) == 2
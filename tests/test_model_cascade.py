@@ -0,0 +1,77 @@
+"""
+Tests des décisions de la cascade de modèles, via le runtime local
+"""
+
+from ai.batch_runner import BatchRunner, LocalDirectoryBackend
+from ai.model_cascade import ModelCascade, Tier
+from ai.terraform_analyzer import TerraformAnalyzer
+from helpers import MODEL_ID, local_client, model_output, write_repo
+
+
+SMALL_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+MAIN_TF = 'resource "aws_s3_bucket" "logs" {\n  bucket = "logs"\n}\n'
+
+
+def issue(severity, confidence, title="Issue"):
+    return {"line": 1, "severity": severity, "title": title, "description": "d",
+            "confidence": confidence, "resource": "aws_s3_bucket.logs"}
+
+
+def cascade_with(small_issues, large_issues=None):
+    small = local_client(lambda model_input: model_output({"issues": small_issues}), SMALL_MODEL_ID)
+    large = local_client(lambda model_input: model_output({"issues": large_issues or []}))
+    return ModelCascade([Tier(small), Tier(large)], ["critical", "high"], min_confidence=0.7)
+
+
+def calls(cascade):
+    return [len(tier.client.client.calls) for tier in cascade.tiers]
+
+
+def test_confident_low_severity_answer_stays_on_the_small_model():
+    cascade = cascade_with([issue("low", 0.9, "Tags")])
+    result = TerraformAnalyzer(cascade).analyze_content("main.tf", MAIN_TF)
+    assert calls(cascade) == [1, 0]
+    assert [i["title"] for i in result["issues"]] == ["Tags"]
+    assert cascade.get_tier_stats()[0]["escalation_rate"] == 0.0
+
+
+def test_risky_or_uncertain_answers_are_escalated_and_replaced():
+    for small_issues in ([issue("high", 0.95)], [issue("medium", 0.4)]):
+        cascade = cascade_with(small_issues, [issue("critical", 0.9, "Bucket public")])
+        result = TerraformAnalyzer(cascade).analyze_content("main.tf", MAIN_TF)
+        assert calls(cascade) == [1, 1]
+        assert [i["title"] for i in result["issues"]] == ["Bucket public"]
+        assert cascade.get_tier_stats()[0]["escalated"] == 1
+
+
+def test_compact_answers_and_triage_verdicts_drive_escalation():
+    cascade = cascade_with([])
+    assert cascade.should_escalate({"issues": [{"k": "TF-S3", "s": "high", "c": 0.9}]})
+    assert not cascade.should_escalate({"issues": [{"k": "TF-S3", "s": "low", "c": 0.9}]})
+    assert cascade.should_escalate({"issues": [], "triage": [["F1", "dismiss", 0.5]]})
+    assert not cascade.should_escalate({"issues": [], "triage": [{"id": "F1", "verdict": "confirm", "confidence": 0.9}]})
+    assert cascade.should_escalate({"error": "JSON invalide"})
+
+
+class RecordingBackend(LocalDirectoryBackend):
+    """Backend local qui garde le modelId des jobs soumis"""
+    
+    def __init__(self, directory, processor):
+        super().__init__(directory, processor)
+        self.model_ids = []
+    
+    def submit(self, job_name, input_uri, model_id):
+        self.model_ids.append(model_id)
+        return super().submit(job_name, input_uri, model_id)
+
+
+def test_batch_job_is_submitted_with_the_primary_model_id(tmp_path):
+    cascade = cascade_with([])
+    snapshot = write_repo(str(tmp_path / "repo"), {"terraform/main.tf": MAIN_TF})
+    backend = RecordingBackend(str(tmp_path / "batch"), lambda model_input: model_output({"issues": []}))
+    runner = BatchRunner(cascade, backend, poll_interval=0, min_records=1)
+    runner.add_file(TerraformAnalyzer(cascade, snapshot=snapshot), "terraform/main.tf")
+    runner.run(job_name="job")
+    assert backend.model_ids == [MODEL_ID]
+    # Les clés de cache restent propres au mode cascade
+    assert cascade.model_id == MODEL_ID and cascade.cache_id == f"{SMALL_MODEL_ID} > {MODEL_ID}"
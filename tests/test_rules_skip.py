@@ -0,0 +1,103 @@
+"""
+Tests du saut des fichiers couverts par les règles locales (rule_engine)
+"""
+
+from ai.docker_analyzer import DockerAnalyzer
+from ai.terraform_analyzer import TerraformAnalyzer
+from rules.engine import RuleEngine
+from helpers import local_client, model_output, prompt_text
+
+
+VARIABLES_TF = """variable "region" {
+  type    = string
+  default = "eu-west-3"
+}
+
+variable "instance_count" {
+  type    = number
+  default = 2
+}
+"""
+
+TYPED_ONLY_TF = """variable "db_password" {
+  type      = string
+  sensitive = true
+}
+
+output "bucket_arn" {
+  value = aws_s3_bucket.logs.arn
+}
+
+terraform {
+  required_version = ">= 1.5"
+}
+"""
+
+
+IAM_TF = """resource "aws_iam_policy" "deploy" {
+  policy = jsonencode({
+    Statement = [{
+      Effect   = "Allow"
+      Action   = "*"
+      Resource = aws_s3_bucket.logs.arn
+    }]
+  })
+}
+"""
+
+DOCKERFILE = """FROM node:20.11-alpine
+WORKDIR /app
+COPY package*.json ./
+RUN npm ci --omit=dev
+USER node
+"""
+
+
+def analyzer_with(analyzer_class=TerraformAnalyzer, **kwargs):
+    def processor(model_input):
+        return model_output({"issues": []})
+    return analyzer_class(local_client(processor), rule_engine=RuleEngine(), **kwargs)
+
+
+def test_variables_without_literal_values_are_skipped():
+    for block_granular in (False, True):
+        analyzer = analyzer_with(block_granular=block_granular)
+        analyzer.analyze_content("variables.tf", TYPED_ONLY_TF)
+        assert analyzer.client.client.calls == []
+
+
+def test_literal_variable_default_is_sent_to_the_model():
+    for block_granular in (False, True):
+        analyzer = analyzer_with(block_granular=block_granular)
+        analyzer.analyze_content("variables.tf", VARIABLES_TF)
+        assert len(analyzer.client.client.calls) == 1
+        assert "eu-west-3" in prompt_text(analyzer.client.client.calls[0])
+
+
+def test_literal_output_value_and_backend_secret_are_sent_to_the_model():
+    engine = RuleEngine()
+    assert not engine.is_fully_covered('output "conn" {\n  value = "postgres://admin:pw@db"\n}\n', "terraform")
+    assert not engine.is_fully_covered('terraform {\n  backend "s3" {\n    access_key = "AKIA"\n  }\n}\n', "terraform")
+    assert engine.is_fully_covered(TYPED_ONLY_TF, "terraform")
+
+
+def test_partially_covered_category_stays_in_prompt_with_rule_findings():
+    for block_granular in (False, True):
+        analyzer = analyzer_with(block_granular=block_granular)
+        assert "Politiques IAM trop permissives" in analyzer.system_prompt
+        analyzer.analyze_content("iam.tf", IAM_TF)
+        prompt = prompt_text(analyzer.client.client.calls[0])
+        assert "[TF-IAM-WILDCARD-ACTION]" in prompt
+        assert "L5 " in prompt
+
+
+def test_only_full_coverage_rules_remove_their_category():
+    analyzer = analyzer_with(DockerAnalyzer)
+    assert "Absence de HEALTHCHECK" not in analyzer.system_prompt
+    assert "Exécution en tant que root" not in analyzer.system_prompt
+    # DF-ENV-SECRET ne repère que des noms et formats connus: le modèle garde la catégorie
+    assert "Variables d'environnement sensibles en clair" in analyzer.system_prompt
+    assert "Images sans version spécifique" in analyzer.system_prompt
+    
+    analyzer.analyze_content("Dockerfile", DOCKERFILE)
+    assert "règles locales" not in prompt_text(analyzer.client.client.calls[0])
@@ -0,0 +1,192 @@
+"""
+Tests des caches de scanners: lockfiles du scan trivy fs, images, entrées de Checkov
+"""
+
+import io
+import json
+import os
+import tarfile
+
+from result_cache import ResultCache
+from scanners.checkov_scanner import CheckovScanner
+from scanners.supervisor import ProcessResult
+from scanners.trivy_scanner import TrivyScanner
+from helpers import write_repo
+
+
+OPENSSL_VULN = {"VulnerabilityID": "CVE-2026-0002", "Severity": "HIGH", "PkgName": "openssl",
+                "Layer": {"DiffID": "sha256:bbb"}}
+
+REPO = {
+    "package-lock.json": '{"lockfileVersion": 3}\n',
+    "app/config.js": 'const key = "AKIAEXAMPLE";\n'
+}
+
+
+class FakeSupervisor:
+    """Rejoue les sorties de Trivy et Checkov et garde les commandes lancées"""
+    
+    def __init__(self, image_vulns=None):
+        self.calls = []
+        self.cwds = []
+        # Archive -> vulnérabilités rendues par trivy image
+        self.image_vulns = image_vulns or {}
+    
+    def run(self, tool, cmd, cwd=None):
+        self.calls.append(cmd)
+        self.cwds.append(cwd)
+        if "--version" in cmd:
+            return ProcessResult(cmd, 0, json.dumps({"Version": "0.50.0", "VulnerabilityDB": {"UpdatedAt": "2026-10-01"}}), "", False, {})
+        if "image" in cmd:
+            vulns = self.image_vulns.get(os.path.basename(cmd[cmd.index("--input") + 1]), [OPENSSL_VULN])
+            return ProcessResult(cmd, 0, json.dumps({"Results": [{"Vulnerabilities": vulns}]}), "", False, {})
+        if tool == "checkov":
+            checks = [{"check_id": "CKV_AWS_20", "check_name": "S3 bucket public", "check_class": "public",
+                       "file_path": "/terraform/main.tf", "file_line_range": [1, 3]}]
+            return ProcessResult(cmd, 1, json.dumps({"results": {"failed_checks": checks}}), "", False, {})
+        scanners = cmd[cmd.index("--scanners") + 1].split(",")
+        results = []
+        if "vuln" in scanners:
+            results.append({"Target": "package-lock.json", "Vulnerabilities": [
+                {"VulnerabilityID": "CVE-2026-0001", "Severity": "HIGH", "PkgName": "lodash", "InstalledVersion": "4.17.0"}
+            ]})
+        if "secret" in scanners:
+            results.append({"Target": "app/config.js", "Secrets": [{"Title": "AWS access key", "StartLine": 1}]})
+        return ProcessResult(cmd, 0, json.dumps({"Results": results}), "", False, {})
+    
+    def timeout_for(self, tool):
+        return None
+    
+    def scans(self):
+        return [cmd[cmd.index("--scanners") + 1] for cmd in self.calls if "fs" in cmd]
+    
+    def image_scans(self):
+        return [cmd for cmd in self.calls if "image" in cmd]
+
+
+def scan(root, files):
+    snapshot = write_repo(root, files)
+    supervisor = FakeSupervisor()
+    scanner = TrivyScanner(snapshot, supervisor=supervisor, cache=ResultCache(os.path.join(root, ".pipeline_cache", "results")))
+    return scanner.scan_filesystem("."), supervisor
+
+
+def test_unchanged_lockfiles_are_not_rescanned(tmp_path):
+    root = str(tmp_path)
+    result, supervisor = scan(root, REPO)
+    assert supervisor.scans() == ["vuln,secret,config"]
+    assert not result["cached"]
+    
+    # Seul le code change: les vulnérabilités viennent du cache
+    result, supervisor = scan(root, {"app/config.js": 'const key = process.env.KEY;\n'})
+    assert supervisor.scans() == ["secret,config"]
+    assert sorted(i["type"] for i in result["issues"]) == ["secret", "vulnerability"]
+    
+    result, supervisor = scan(root, {})
+    assert supervisor.scans() == []
+    assert result["cached"]
+    
+    # Un lockfile modifié relance aussi secret et config (tous les fichiers en entrée)
+    result, supervisor = scan(root, {"package-lock.json": '{"lockfileVersion": 3, "packages": {}}\n'})
+    assert supervisor.scans() == ["vuln,secret,config"]
+
+
+def write_image_archive(path, diff_ids, history):
+    """Archive docker save minimale: manifest.json et config de l'image"""
+    files = {
+        "manifest.json": [{"Config": "config.json", "Layers": []}],
+        "config.json": {"rootfs": {"type": "layers", "diff_ids": diff_ids}, "history": history}
+    }
+    with tarfile.open(path, "w") as archive:
+        for name, data in files.items():
+            raw = json.dumps(data).encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(raw)
+            archive.addfile(info, io.BytesIO(raw))
+
+
+def test_known_image_is_not_rescanned(tmp_path):
+    root = str(tmp_path)
+    snapshot = write_repo(root, {"api/Dockerfile": "FROM node:20-slim\nRUN apt-get install -y openssl\n",
+                                 "worker/Dockerfile": "FROM node:20-slim\nRUN apt-get install -y openssl\n"})
+    history = [{"created_by": "/bin/sh -c #(nop) ADD file:abc in /"}, {"created_by": "RUN apt-get install -y openssl"}]
+    write_image_archive(os.path.join(root, "api.tar"), ["sha256:aaa", "sha256:bbb"], history)
+    write_image_archive(os.path.join(root, "worker.tar"), ["sha256:aaa", "sha256:bbb"], history)
+    cache = ResultCache(os.path.join(root, ".pipeline_cache", "results"))
+    
+    supervisor = FakeSupervisor()
+    first = TrivyScanner(snapshot, supervisor=supervisor, cache=cache).scan_image("api.tar", "api/Dockerfile")
+    assert len(supervisor.image_scans()) == 1
+    assert [(i["title"], i["line"]) for i in first["issues"]] == [("CVE-2026-0002", 2)]
+    
+    # Même image pour un autre service: rien n'est rescanné, les lignes suivent son Dockerfile
+    supervisor = FakeSupervisor()
+    second = TrivyScanner(snapshot, supervisor=supervisor, cache=cache).scan_image("worker.tar", "worker/Dockerfile")
+    assert supervisor.image_scans() == []
+    assert second["cached"]
+    assert [(i["title"], i["file"], i["line"]) for i in second["issues"]] == [("CVE-2026-0002", "worker/Dockerfile", 2)]
+
+
+def test_child_image_scan_does_not_hide_parent_vulnerabilities(tmp_path):
+    root = str(tmp_path)
+    snapshot = write_repo(root, {"Dockerfile": "FROM node:20-slim\nRUN apt-get install -y openssl\n",
+                                 "child/Dockerfile": "FROM parent\nRUN apk upgrade\n"})
+    history = [{"created_by": "/bin/sh -c #(nop) ADD file:abc in /"}, {"created_by": "RUN apt-get install -y openssl"}]
+    write_image_archive(os.path.join(root, "parent.tar"), ["sha256:aaa", "sha256:bbb"], history)
+    write_image_archive(os.path.join(root, "child.tar"), ["sha256:aaa", "sha256:bbb", "sha256:ccc"],
+                        history + [{"created_by": "RUN apk upgrade"}])
+    cache = ResultCache(os.path.join(root, ".pipeline_cache", "results"))
+    
+    # L'enfant met openssl à jour: Trivy ne rapporte plus rien pour ses couches
+    supervisor = FakeSupervisor({"child.tar": []})
+    child = TrivyScanner(snapshot, supervisor=supervisor, cache=cache).scan_image("child.tar", "child/Dockerfile")
+    assert child["issues"] == []
+    
+    # Le parent, scanné ensuite, garde sa vulnérabilité
+    supervisor = FakeSupervisor()
+    parent = TrivyScanner(snapshot, supervisor=supervisor, cache=cache).scan_image("parent.tar", "Dockerfile")
+    assert len(supervisor.image_scans()) == 1
+    assert not parent["cached"]
+    assert [(i["title"], i["line"]) for i in parent["issues"]] == [("CVE-2026-0002", 2)]
+
+
+CHECKOV_REPO = {
+    "terraform/main.tf": 'module "logs" {\n  source = "../modules/bucket"\n}\n',
+    "modules/bucket/main.tf": 'resource "aws_s3_bucket" "this" {\n  acl = "public-read"\n}\n'
+}
+
+
+def checkov_scan(root, files, directory="terraform"):
+    snapshot = write_repo(root, files)
+    supervisor = FakeSupervisor()
+    scanner = CheckovScanner(snapshot, supervisor=supervisor, cache=ResultCache(os.path.join(root, ".pipeline_cache", "results")))
+    return scanner.scan_iac(directory), supervisor
+
+
+def checkov_runs(supervisor):
+    return [cmd for cmd in supervisor.calls if "--version" not in cmd]
+
+
+def test_checkov_scans_the_directory_and_caches_on_all_iac_inputs(tmp_path):
+    root = str(tmp_path)
+    result, supervisor = checkov_scan(root, CHECKOV_REPO)
+    [cmd] = checkov_runs(supervisor)
+    # Un seul --directory, pas de --file: modules et variables restent résolus entre fichiers
+    assert cmd[cmd.index("--directory") + 1] == "terraform" and "--file" not in cmd
+    assert supervisor.cwds[-1] == root
+    assert [i["check_id"] for i in result["issues"]] == ["CKV_AWS_20"]
+    
+    result, supervisor = checkov_scan(root, {})
+    assert checkov_runs(supervisor) == [] and result["cached"]
+    
+    # Le module local, hors du répertoire scanné, fait partie des entrées
+    result, supervisor = checkov_scan(root, {"modules/bucket/main.tf": 'resource "aws_s3_bucket" "this" {}\n'})
+    assert len(checkov_runs(supervisor)) == 1
+
+
+def test_checkov_without_snapshot_runs_without_input_cache(tmp_path):
+    supervisor = FakeSupervisor()
+    scanner = CheckovScanner(supervisor=supervisor, cache=ResultCache(str(tmp_path / "results")))
+    result = scanner.scan_iac("terraform")
+    assert "error" not in result
+    assert [i["check_id"] for i in result["issues"]] == ["CKV_AWS_20"]
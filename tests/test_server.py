@@ -0,0 +1,60 @@
+"""
+Tests des composants de longue durée du daemon: cache mémoire borné, attente du trivy server
+"""
+
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from result_cache import ResultCache
+from server import TrivyServer
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """/healthz en 503 tant que le serveur n'a pas fini de charger sa base"""
+    
+    def do_GET(self):
+        self.server.calls += 1
+        status = 200 if self.path == "/healthz" and self.server.calls > self.server.loading_calls else 503
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def test_result_cache_keeps_only_recent_values_in_memory(tmp_path):
+    cache = ResultCache(str(tmp_path), max_memory_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.set("c", {"v": 3})
+    
+    assert cache.stats()["memory_entries"] == 2
+    # "b" évincé de la mémoire, toujours sur disque
+    assert cache.get("b") == {"v": 2}
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_trivy_server_is_ready_once_health_endpoint_answers():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), HealthHandler)
+    httpd.calls, httpd.loading_calls = 0, 2
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    trivy = TrivyServer(f"127.0.0.1:{httpd.server_address[1]}")
+    trivy.process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        assert trivy.wait_ready(timeout=5, interval=0.01)
+        assert httpd.calls == 3
+    finally:
+        trivy.stop()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_trivy_server_that_exits_is_not_used():
+    trivy = TrivyServer("127.0.0.1:9")
+    trivy.process = subprocess.Popen([sys.executable, "-c", "pass"])
+    trivy.process.wait()
+    assert not trivy.wait_ready(timeout=5, interval=0.01)
@@ -0,0 +1,60 @@
+"""
+Tests du superviseur de process: limite mémoire sans preexec_fn, groupe tué avant récupération du leader
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scanners.supervisor import ProcessSupervisor
+
+
+ALLOCATE = [sys.executable, "-c", "x = bytearray(512 * 1024 * 1024); print(len(x))"]
+
+
+@pytest.fixture
+def popen_kwargs(monkeypatch):
+    """Arguments de chaque Popen lancé par le superviseur"""
+    seen = []
+    popen = subprocess.Popen
+    
+    def recording_popen(*args, **kwargs):
+        seen.append(kwargs)
+        return popen(*args, **kwargs)
+    monkeypatch.setattr(subprocess, "Popen", recording_popen)
+    return seen
+
+
+def test_memory_limit_is_applied_without_preexec_fn(popen_kwargs):
+    supervisor = ProcessSupervisor(memory_limits_mb={"python": 128})
+    result = supervisor.run("python", ALLOCATE)
+    assert result.returncode != 0
+    assert "MemoryError" in result.stderr
+    assert all(kwargs.get("preexec_fn") is None for kwargs in popen_kwargs)
+    assert supervisor.run("other", [sys.executable, "-c", "print(1)"]).stdout.strip() == "1"
+
+
+def test_memory_limit_falls_back_to_ulimit_without_prlimit(monkeypatch, popen_kwargs):
+    monkeypatch.delattr(resource, "prlimit", raising=False)
+    supervisor = ProcessSupervisor(memory_limits_mb={"python": 128, "missing": 128})
+    result = supervisor.run("python", ALLOCATE)
+    assert result.returncode != 0
+    with pytest.raises(FileNotFoundError):
+        supervisor.run("missing", ["definitely-not-installed-tool", "--version"])
+
+
+def test_descendants_holding_the_pipes_are_killed():
+    started = time.monotonic()
+    result = ProcessSupervisor().run("sh", ["sh", "-c", "sleep 30 & echo done"])
+    assert result.stdout.strip() == "done"
+    assert time.monotonic() - started < 5
+
+
+def test_timeout_kills_the_group():
+    supervisor = ProcessSupervisor(timeouts={"sh": 0.5}, kill_grace=0.5)
+    result = supervisor.run("sh", ["sh", "-c", "sleep 30 & sleep 30"])
+    assert result.timed_out
+    assert supervisor.stats()[0]["timeouts"] == 1
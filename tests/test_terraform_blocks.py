@@ -0,0 +1,59 @@
+"""
+Tests de l'analyse Terraform par bloc (block_granular)
+"""
+
+from ai.terraform_analyzer import TerraformAnalyzer
+from rules.hcl_parser import parse_hcl, uncovered_lines
+from helpers import local_client, model_output, prompt_text
+
+
+MAIN_TF = """resource "aws_s3_bucket" "logs" {
+  bucket = "logs"
+}
+
+resource "aws_s3_bucket_acl" "logs" {
+  bucket = aws_s3_bucket.logs.id
+  acl    = "public-read"
+}
+"""
+
+
+def analyzer_with(issues, **kwargs):
+    def processor(model_input):
+        return model_output({"issues": issues})
+    return TerraformAnalyzer(local_client(processor), block_granular=True, **kwargs)
+
+
+def test_one_line_blocks_are_parsed():
+    content = 'resource "aws_s3_bucket_acl" "a" { acl = "public-read" }\nvariable "x" {}\n'
+    blocks = parse_hcl(content)
+    assert [(b.address, b.start_line, b.end_line) for b in blocks] == [
+        ("aws_s3_bucket_acl.a", 1, 1), ("var.x", 2, 2)
+    ]
+    assert blocks[0].attribute_literal("acl") == "public-read"
+    assert uncovered_lines(content, blocks) == []
+
+
+def test_file_of_one_line_blocks_is_sent_to_the_model():
+    analyzer = analyzer_with([{"line": 1, "severity": "high", "title": "ACL publique", "description": "d",
+                               "confidence": 0.9, "resource": "aws_s3_bucket_acl.a"}])
+    result = analyzer.analyze_content("acl.tf", 'resource "aws_s3_bucket_acl" "a" { acl = "public-read" }\n')
+    assert len(analyzer.client.client.calls) == 1
+    assert [(i["line"], i["resource"]) for i in result["issues"]] == [(1, "aws_s3_bucket_acl.a")]
+
+
+def test_text_outside_blocks_falls_back_to_whole_file():
+    content = MAIN_TF + 'unparsed_thing "x" "y" ( acl = "public-read" )\n'
+    analyzer = analyzer_with([])
+    result = analyzer.analyze_content("main.tf", content)
+    assert len(analyzer.client.client.calls) == 1
+    assert "unparsed_thing" in prompt_text(analyzer.client.client.calls[0])
+    assert "blocks" not in result
+
+
+def test_block_lines_counted_from_excerpt_are_mapped_to_the_file():
+    # Ligne 3 comptée depuis le début du bloc aws_s3_bucket_acl.logs (lignes 5-8)
+    analyzer = analyzer_with([{"line": 3, "severity": "high", "title": "ACL publique", "description": "d",
+                               "confidence": 0.9, "resource": "aws_s3_bucket_acl.logs"}])
+    result = analyzer.analyze_content("main.tf", MAIN_TF)
+    assert [(i["line"], i["resource"]) for i in result["issues"]] == [(7, "aws_s3_bucket_acl.logs")]